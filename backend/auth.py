@@ -2,14 +2,19 @@
 # File: backend/auth.py
 # ==============================================================================
 from datetime import datetime, timedelta, timezone
+import hmac
+import uuid
+import hashlib
+import secrets
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from .database import get_db
-from .models import User
-from .schemas import TokenData
+from .models import User, Employee, Team, RefreshToken
+from .cache import TTLCache
+from dataclasses import dataclass
 import os
 from typing import Optional
 
@@ -17,6 +22,7 @@ from typing import Optional
 SECRET_KEY = os.getenv("SECRET_KEY", "a_very_secret_key_for_development")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
@@ -29,16 +35,104 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+# --- Refresh tokens ---
+# Refresh tokens are random strings; only their HMAC is stored, so a database
+# leak does not expose usable tokens, and checking one is a cheap indexed lookup
+# instead of a bcrypt verify. Timestamps are naive UTC, as the DB returns them.
+def _utcnow_naive() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def hash_refresh_token(token: str) -> str:
+    return hmac.new(SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+def issue_refresh_token(db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+    """Stages a new refresh token for the user; the caller commits."""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        family_id=family_id or uuid.uuid4().hex,
+        expires_at=_utcnow_naive() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+def revoke_refresh_tokens(db: Session, user_id: Optional[int] = None, family_id: Optional[str] = None):
+    """Revokes all live refresh tokens of a user or of a token family; the caller commits."""
+    query = db.query(RefreshToken).filter(RefreshToken.revoked_at.is_(None))
+    query = query.filter(RefreshToken.user_id == user_id) if user_id is not None else query.filter(RefreshToken.family_id == family_id)
+    query.update({"revoked_at": _utcnow_naive()}, synchronize_session=False)
+
+# --- Authenticated principal cache ---
+# The identity and scope of a token subject (role, employee, team, BA) are
+# cached so that most requests need no user/employee/team queries at all.
+# Routes that change any of these call invalidate_principal(); the TTL bounds
+# staleness across worker processes.
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    username: str
+    role: str
+    is_active: bool
+    force_password_reset: bool
+    employee_id: Optional[int]
+    employee_name: Optional[str]
+    team_id: Optional[int]
+    ba_id: Optional[int]
+
+principal_cache = TTLCache("principal", ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+def invalidate_principal(username: Optional[str] = None, employee_id: Optional[int] = None):
+    """Drops cached principals for a user or an employee, or all of them if neither is given."""
+    if username is not None:
+        principal_cache.invalidate(username)
+    elif employee_id is not None:
+        principal_cache.invalidate(predicate=lambda _, p: p.employee_id == employee_id)
+    else:
+        principal_cache.invalidate()
+
+def _load_principal(db: Session, username: str) -> Optional[Principal]:
+    row = db.query(
+        User.id, User.username, User.role, User.is_active, User.force_password_reset,
+        User.employee_id, Employee.name, Employee.team_id, Team.ba_id
+    ).outerjoin(Employee, User.employee_id == Employee.id).outerjoin(Team, Employee.team_id == Team.id).filter(User.username == username).first()
+    return Principal(*row) if row else None
+
+def _decode_subject(token: str) -> str:
     credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None: raise credentials_exception
-        token_data = TokenData(username=username)
     except JWTError: raise credentials_exception
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None: raise credentials_exception
+    return username
+
+def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    username = _decode_subject(token)
+    principal = principal_cache.get(username)
+    if principal is None:
+        principal = _load_principal(db, username)
+        if principal is None: raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+        principal_cache.set(username, principal)
+    return principal
+
+def principal_from_token(db: Session, token: str) -> Optional[Principal]:
+    """The principal for a bearer token, or None if it is invalid. For code outside route dependencies."""
+    try:
+        return get_current_principal(token, db)
+    except HTTPException:
+        return None
+
+def get_current_active_principal(current_user: Principal = Depends(get_current_principal)) -> Principal:
+    if not current_user.is_active: raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    """Loads the full User row, for the few routes that modify it."""
+    username = _decode_subject(token)
+    user = db.query(User).filter(User.username == username).first()
+    if user is None: raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
     return user
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
@@ -46,7 +140,7 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     return current_user
 
 def require_role(required_role: str):
-    def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
+    def role_checker(current_user: Principal = Depends(get_current_active_principal)) -> Principal:
         if current_user.role == "admin": return current_user
         if current_user.role != required_role:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Access denied. Requires role '{required_role}'.")
@@ -0,0 +1,473 @@
+# ==============================================================================
+# File: backend/benchmarks/campaign_day.py
+# Description: Offline load test that replays a compressed campaign day
+# against a local uvicorn instance, to size capacity before a campaign.
+# - Seeds a synthetic circle with the production seeder (every BA in
+#   ba_seed.xlsx, its coordinator and the admin) plus TEAMS_PER_BA teams of
+#   one leader, one coordinator and MEMBERS_PER_TEAM employees per BA.
+# - Every seeded user is a virtual user with its own keep-alive connection
+#   and a role-specific mix of actions, separated by random think time.
+# - The day runs in phases: a morning login storm, steady sales
+#   submissions, midday event uploads with photos and evening leaderboard
+#   polling and dashboard loads.
+# - Reports requests, throughput, p50/p95/p99 latency and the error rate per
+#   endpoint, for each phase and for the whole day.
+#
+# Usage: python -m backend.benchmarks.campaign_day [options]  (see --help)
+# Run from the repository root. Needs no external services: the database is a
+# temporary SQLite file (SQLITE_PATH) and the server runs from a temporary
+# directory, so backend/sales_portal.db and backend/uploads are not touched.
+# ==============================================================================
+import io
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import itertools
+import tempfile
+import threading
+import subprocess
+import http.client
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from PIL import Image
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEAMS_PER_BA = 3
+MEMBERS_PER_TEAM = 6
+LOAD_TEST_PASSWORD = "pwd"
+SERVER_START_TIMEOUT = 60
+REQUEST_TIMEOUT = 60
+LOGIN_ATTEMPTS = 3
+
+SALES_ACTIVITY_TYPES = ("SIM Sales", "MNP", "4G SIM Upgradation")
+
+
+# ============================ SEEDING ============================
+
+@dataclass
+class VirtualUser:
+    username: str
+    password: str
+    role: str
+    team_id: int
+    ba_id: int
+    token: Optional[str] = None
+
+
+def seed_circle(teams_per_ba: int, members_per_team: int) -> Tuple[int, List[VirtualUser]]:
+    """Seeds the database named by SQLITE_PATH. Returns the campaign id and the users to replay."""
+    # Imported here: the engine is created on import, after SQLITE_PATH is set.
+    from ..database import SessionLocal
+    from ..models import BusinessArea, Campaign, Employee, Team, User
+    from ..production_seeder import seed_production_database
+    from ..provisioning import DEFAULT_PASSWORD, NewAccount, create_accounts
+
+    seed_production_database()
+    db = SessionLocal()
+    try:
+        campaign = db.query(Campaign).first()
+        if campaign is None:
+            raise RuntimeError("The production seeder did not create a campaign; see its output above.")
+        accounts = []
+        for ba in db.query(BusinessArea).order_by(BusinessArea.name).all():
+            for t in range(1, teams_per_ba + 1):
+                # Team codes _00 (admin teams) and TVM_01 (the demo team) are taken by the seeder.
+                code = f"{ba.name}_{t + 1:02d}"
+                team = Team(name=f"{ba.name} Load {t}", team_code=code, campaign_id=campaign.id, ba_id=ba.id)
+                db.add(team)
+                db.flush()
+                accounts.append(NewAccount(name=f"Leader {code}", employee_code=f"TL_{code}", role="team_leader", team_id=team.id, password=LOAD_TEST_PASSWORD, force_password_reset=False))
+                accounts.append(NewAccount(name=f"Coordinator {code}", employee_code=f"TC_{code}", role="team_coordinator", team_id=team.id, password=LOAD_TEST_PASSWORD, force_password_reset=False))
+                for m in range(1, members_per_team + 1):
+                    accounts.append(NewAccount(name=f"Member {m} {code}", employee_code=f"TM_{code}_{m:02d}", role="employee", team_id=team.id, password=LOAD_TEST_PASSWORD, force_password_reset=False))
+        create_accounts(db, accounts)
+        db.commit()
+
+        # The seeder gives coordinators the onboarding password and the admin 'pwd'.
+        passwords = {"ba_coordinator": DEFAULT_PASSWORD}
+        rows = db.query(User.username, User.role, Employee.team_id, Team.ba_id).join(Employee, User.employee_id == Employee.id).join(Team, Employee.team_id == Team.id).all()
+        users = [VirtualUser(username, passwords.get(role, LOAD_TEST_PASSWORD), role, team_id, ba_id) for username, role, team_id, ba_id in rows]
+        return campaign.id, users
+    finally:
+        db.close()
+
+
+# ============================ SERVER ============================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(work_dir: str, port: int, workers: int) -> subprocess.Popen:
+    """Starts uvicorn on 127.0.0.1:port with work_dir as its working directory, so uploads land there."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")]))}
+    log = open(os.path.join(work_dir, "server.log"), "wb")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            break
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/openapi.json")
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.25)
+    server.kill()
+    raise RuntimeError(f"uvicorn did not start; see {log.name}")
+
+
+def stop_server(server: subprocess.Popen):
+    server.terminate()
+    try:
+        server.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+# ============================ STATISTICS ============================
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class Stats:
+    """Latencies and statuses per (phase, endpoint). An error is a 4xx/5xx status or a failed connection."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        self.statuses: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        self.phase_seconds: Dict[str, float] = {}
+
+    def record(self, phase: str, endpoint: str, seconds: float, status):
+        with self._lock:
+            self.latencies[(phase, endpoint)].append(seconds)
+            self.statuses[(phase, endpoint)][status] += 1
+
+    def rows(self, phase: Optional[str] = None) -> List[dict]:
+        """One summary per endpoint, for one phase or (phase=None) for the whole day."""
+        merged: Dict[str, List[float]] = defaultdict(list)
+        statuses: Dict[str, Counter] = defaultdict(Counter)
+        with self._lock:
+            for (p, endpoint), values in self.latencies.items():
+                if phase is None or p == phase:
+                    merged[endpoint] += values
+                    statuses[endpoint].update(self.statuses[(p, endpoint)])
+        seconds = self.phase_seconds.get(phase) if phase else sum(self.phase_seconds.values())
+        rows = []
+        for endpoint in sorted(merged):
+            values = sorted(merged[endpoint])
+            errors = sum(count for status, count in statuses[endpoint].items() if not isinstance(status, int) or status >= 400)
+            rows.append({
+                "endpoint": endpoint,
+                "requests": len(values),
+                "rps": round(len(values) / seconds, 2) if seconds else None,
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+                "error_rate": round(errors / len(values), 4),
+                "statuses": {str(status): count for status, count in sorted(statuses[endpoint].items(), key=str)},
+            })
+        return rows
+
+
+def print_table(title: str, rows: List[dict]):
+    print(f"\n{title}")
+    header = f"  {'endpoint':<58} {'reqs':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}"
+    print(header)
+    print("  " + "-" * (len(header) - 2))
+    for r in rows:
+        print(f"  {r['endpoint']:<58} {r['requests']:>7} {r['rps'] or 0:>8.2f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['error_rate']:>7.1%}")
+        failures = {s: c for s, c in r["statuses"].items() if not s.isdigit() or int(s) >= 400}
+        if failures:
+            print(f"  {'':<58} failures: {failures}")
+
+
+# ============================ CLIENT ============================
+
+class Client:
+    """One virtual user's keep-alive connection. Every request is timed into `stats` under the current phase."""
+    def __init__(self, port: int, stats: Stats):
+        self.port = port
+        self.stats = stats
+        self.phase = ""
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, endpoint: str, method: str, path: str, body: bytes = None, content_type: str = None, token: str = None) -> Tuple[Optional[int], bytes]:
+        headers = {}
+        if content_type:
+            headers["Content-Type"] = content_type
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        started = time.perf_counter()
+        try:
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=REQUEST_TIMEOUT)
+            self._conn.request(method, path, body=body, headers=headers)
+            response = self._conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            self.stats.record(self.phase, endpoint, time.perf_counter() - started, type(e).__name__)
+            return None, b""
+        self.stats.record(self.phase, endpoint, time.perf_counter() - started, status)
+        return status, data
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _multipart(fields: Dict[str, str], files: Dict[str, Tuple[str, bytes, str]]) -> Tuple[bytes, str]:
+    boundary = f"campaign-day-{random.getrandbits(64):016x}"
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, mime) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\nContent-Type: {mime}\r\n\r\n'.encode() + content + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def _photo(rng: random.Random) -> bytes:
+    """A distinct phone-sized JPEG, so uploads are not deduplicated by the media store."""
+    image = Image.frombytes("RGB", (96, 72), rng.randbytes(96 * 72 * 3)).resize((1280, 960))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+
+# ============================ ACTIONS ============================
+
+@dataclass
+class Day:
+    """What the actions need to know about the seeded circle."""
+    campaign_id: int
+    sales_type_ids: List[int]
+    mobiles: itertools.count = field(default_factory=lambda: itertools.count(9_000_000_000))
+
+
+def login(client: Client, user: VirtualUser, day: Day, rng: random.Random):
+    # The app retries a login the server turned away (503 when bcrypt is saturated).
+    for attempt in range(LOGIN_ATTEMPTS):
+        status, data = client.request("POST /api/auth/token", "POST", "/api/auth/token",
+                                      urlencode({"username": user.username, "password": user.password}).encode(), "application/x-www-form-urlencoded")
+        if status == 200:
+            user.token = json.loads(data)["access_token"]
+            return
+        if status not in (None, 503):
+            return
+        time.sleep(rng.uniform(0.5, 2.0) * (attempt + 1))
+
+
+def landing(client: Client, user: VirtualUser, day: Day, rng: random.Random):
+    client.request("GET /api/users/me", "GET", "/api/users/me", token=user.token)
+    if user.role == "admin":
+        admin_dashboard(client, user, day, rng)
+    elif user.role == "ba_coordinator":
+        ba_dashboard(client, user, day, rng)
+    else:
+        my_dashboard(client, user, day, rng)
+
+
+def submit_sale(client: Client, user: VirtualUser, day: Day, rng: random.Random):
+    body = {"activity_type_id": rng.choice(day.sales_type_ids), "customer_mobile": str(next(day.mobiles)), "campaign_id": day.campaign_id, "customer_name": "Load Test"}
+    client.request("POST /api/activities/", "POST", "/api/activities/", json.dumps(body).encode(), "application/json", user.token)
+
+
+def upload_mela(client: Client, user: VirtualUser, day: Day, rng: random.Random):
+    body, content_type = _multipart(
+        {"mela_date": "2025-08-15T10:00:00", "location": "Load test ground", "territory": "Urban",
+         "participants_count": str(rng.randint(20, 300)), "campaign_id": str(day.campaign_id)},
+        {"photo": ("mela.jpg", _photo(rng), "image/jpeg")},
+    )
+    client.request("POST /api/events/mela", "POST", "/api/events/mela", body, content_type, user.token)
+
+
+def poll_leaderboard(client: Client, user: VirtualUser, day: Day, rng: random.Random):
+    board = rng.choice(("employee", "team", "ba"))
+    client.request(f"GET /api/leaderboard/{board}/{{campaign_id}}", "GET", f"/api/leaderboard/{board}/{day.campaign_id}", token=user.token)
+
+
+def my_dashboard(client: Client, user: VirtualUser, day: Day, rng: random.Random):
+    client.request("GET /api/dashboard/my_summary/{campaign_id}", "GET", f"/api/dashboard/my_summary/{day.campaign_id}", token=user.token)
+    client.request("GET /api/dashboard/team_members/{campaign_id}/{team_id}", "GET", f"/api/dashboard/team_members/{day.campaign_id}/{user.team_id}", token=user.token)
+
+
+def ba_dashboard(client: Client, user: VirtualUser, day: Day, rng: random.Random):
+    for endpoint in ("ba_kpis", "team_performance", "ba_rank"):
+        client.request(f"GET /api/dashboard/{endpoint}/{{campaign_id}}/{{ba_id}}", "GET", f"/api/dashboard/{endpoint}/{day.campaign_id}/{user.ba_id}", token=user.token)
+
+
+def admin_dashboard(client: Client, user: VirtualUser, day: Day, rng: random.Random):
+    for endpoint in ("circle_kpis", "ba_performance"):
+        client.request(f"GET /api/dashboard/{endpoint}/{{campaign_id}}", "GET", f"/api/dashboard/{endpoint}/{day.campaign_id}", token=user.token)
+
+
+def monitor_activities(client: Client, user: VirtualUser, day: Day, rng: random.Random):
+    client.request("GET /api/activities/monitor", "GET", "/api/activities/monitor", token=user.token)
+
+
+Action = Callable[[Client, VirtualUser, Day, random.Random], None]
+FIELD_ROLES = ("employee", "team_leader", "team_coordinator")
+
+
+@dataclass
+class Phase:
+    name: str
+    seconds: float
+    # role -> [(action, weight)]; roles missing from the mix idle through the phase.
+    mix: Dict[str, List[Tuple[Action, float]]]
+
+
+def campaign_day(scale: float) -> List[Phase]:
+    """The phases of a day, each `scale` times its nominal length in seconds."""
+    field_mix = lambda sale, upload, board, dash: {role: [(submit_sale, sale), (upload_mela, upload if role != "employee" else 0), (poll_leaderboard, board), (my_dashboard, dash)] for role in FIELD_ROLES}
+    office_mix = lambda board, dash: {
+        "ba_coordinator": [(ba_dashboard, dash), (poll_leaderboard, board), (monitor_activities, 1)],
+        "admin": [(admin_dashboard, dash), (poll_leaderboard, board), (monitor_activities, 1)],
+    }
+    return [
+        Phase("morning_sales", 60 * scale, {**field_mix(8, 0, 1, 1), **office_mix(1, 2)}),
+        Phase("midday_uploads", 60 * scale, {**field_mix(5, 3, 1, 1), **office_mix(1, 2)}),
+        Phase("evening_leaderboards", 60 * scale, {**field_mix(1, 0, 6, 3), **office_mix(4, 4)}),
+    ]
+
+
+# ============================ RUNNER ============================
+
+def _virtual_user(user: VirtualUser, day: Day, phases: List[Phase], schedule: List[float], login_ramp: float, think: float, port: int, stats: Stats, seed: int):
+    rng = random.Random(seed)
+    client = Client(port, stats)
+    try:
+        client.phase = "login_storm"
+        time.sleep(rng.uniform(0, login_ramp))
+        login(client, user, day, rng)
+        if user.token is None:
+            return
+        landing(client, user, day, rng)
+
+        for phase, (starts, ends) in zip(phases, zip(schedule, schedule[1:])):
+            mix = [(action, weight) for action, weight in phase.mix.get(user.role, []) if weight > 0]
+            time.sleep(max(0.0, starts - time.monotonic()))
+            client.phase = phase.name
+            if not mix:
+                continue
+            actions, weights = zip(*mix)
+            # Spread users out so they do not act in lockstep at the start of a phase.
+            time.sleep(rng.uniform(0, think))
+            while time.monotonic() < ends:
+                rng.choices(actions, weights)[0](client, user, day, rng)
+                time.sleep(min(rng.expovariate(1 / think), max(0.0, ends - time.monotonic())))
+    finally:
+        client.close()
+
+
+def _day_context(port: int, campaign_id: int, users: List[VirtualUser]) -> Day:
+    admin = next(u for u in users if u.role == "admin")
+    client = Client(port, Stats())
+    login(client, admin, None, random.Random())
+    status, data = client.request("", "GET", "/api/activities/types/all", token=admin.token)
+    client.close()
+    if status != 200:
+        raise RuntimeError(f"Could not read the activity types as admin (status {status}).")
+    types = {t["name"]: t["id"] for t in json.loads(data)}
+    admin.token = None
+    return Day(campaign_id=campaign_id, sales_type_ids=[types[name] for name in SALES_ACTIVITY_TYPES])
+
+
+def replay(port: int, campaign_id: int, users: List[VirtualUser], scale: float, login_ramp: float, think: float, seed: int) -> Stats:
+    stats = Stats()
+    day = _day_context(port, campaign_id, users)
+    phases = campaign_day(scale)
+
+    # The login storm lasts the ramp plus a grace period for retries; the other phases follow back to back.
+    started = time.monotonic()
+    schedule = [started + login_ramp + 10 * scale]
+    for phase in phases:
+        schedule.append(schedule[-1] + phase.seconds)
+
+    threads = [
+        threading.Thread(target=_virtual_user, args=(u, day, phases, schedule, login_ramp, think, port, stats, seed + i), daemon=True)
+        for i, u in enumerate(users)
+    ]
+    for t in threads:
+        t.start()
+    boundaries = [("login_storm", started, schedule[0])] + [(p.name, s, e) for p, s, e in zip(phases, schedule, schedule[1:])]
+    for name, starts, ends in boundaries:
+        time.sleep(max(0.0, ends - time.monotonic()))
+        stats.phase_seconds[name] = ends - starts
+        print(f"--- Phase '{name}' finished ---")
+    for t in threads:
+        # An action in flight when the day ends finishes within the request timeout.
+        t.join(REQUEST_TIMEOUT)
+    return stats
+
+
+def run(args):
+    if os.getenv("ENV", "development") == "production":
+        sys.exit("The load test reseeds its database from scratch; refusing to run with ENV=production.")
+
+    with tempfile.TemporaryDirectory(prefix="campaign_day_") as work_dir:
+        os.environ["SQLITE_PATH"] = os.path.join(work_dir, "campaign_day.db")
+        print(f"Seeding a synthetic circle into {os.environ['SQLITE_PATH']} ...")
+        campaign_id, users = seed_circle(args.teams_per_ba, args.members)
+        print(f"  {len(users)} users: {dict(Counter(u.role for u in users))}")
+
+        port = args.port or _free_port()
+        server = start_server(work_dir, port, args.workers)
+        print(f"Server on 127.0.0.1:{port} with {args.workers} worker(s). Replaying the day ...")
+        try:
+            stats = replay(port, campaign_id, users, args.scale, args.login_ramp, args.think, args.seed)
+        finally:
+            stop_server(server)
+
+        for phase in stats.phase_seconds:
+            print_table(f"Phase '{phase}' ({stats.phase_seconds[phase]:.0f} s)", stats.rows(phase))
+        print_table(f"Whole day ({sum(stats.phase_seconds.values()):.0f} s)", stats.rows())
+
+        server_errors = any(s.startswith("5") for r in stats.rows() for s in r["statuses"])
+        if server_errors:
+            with open(os.path.join(work_dir, "server.log"), errors="replace") as f:
+                tail = f.readlines()[-30:]
+            print("\nThe server answered with 5xx; the end of its log:\n" + "".join(tail))
+
+        if args.json:
+            report = {"phases": {phase: stats.rows(phase) for phase in stats.phase_seconds}, "day": stats.rows(), "users": len(users), "workers": args.workers}
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a compressed campaign day against a local uvicorn instance.")
+    parser.add_argument("--teams-per-ba", type=int, default=TEAMS_PER_BA, help="Synthetic teams per BA.")
+    parser.add_argument("--members", type=int, default=MEMBERS_PER_TEAM, help="Employees per synthetic team, besides its leader and coordinator.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplies the length of every phase (nominally 60 s each).")
+    parser.add_argument("--login-ramp", type=float, default=20.0, help="Seconds over which all users log in.")
+    parser.add_argument("--think", type=float, default=10.0, help="Mean think time between a user's actions, in seconds.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes.")
+    parser.add_argument("--port", type=int, default=None, help="Port for the server (default: a free one).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the traffic.")
+    parser.add_argument("--json", default=None, help="Also write the report to this JSON file.")
+    run(parser.parse_args())
@@ -0,0 +1,121 @@
+# ==============================================================================
+# File: backend/benchmarks/open_lead_lookup.py
+# Description: Measures the FTTH conversion lead lookup against a large table
+# of House Visits. The lookup is served by the unique key index
+# 'uq_campaign_activity_customer'; for comparison the same query is also run
+# with the index disabled (SQLite 'NOT INDEXED'), i.e. as a full table scan.
+#
+# Usage: python -m backend.benchmarks.open_lead_lookup [house_visits] [db_path]
+# The benchmark builds its own SQLite database (a temporary file by default)
+# and never touches backend/sales_portal.db.
+# ==============================================================================
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from ..database import Base
+from ..models import Campaign, ActivityType, BusinessArea, Team, Employee, Activity
+from ..routes.activity_routes import find_open_lead
+
+EMPLOYEES = 2000
+LOOKUPS = 2000
+CHUNK_SIZE = 50000
+
+
+def _seed(engine, house_visits: int):
+    with engine.begin() as conn:
+        conn.execute(insert(Campaign), [{"id": 1, "name": "Benchmark", "start_date": datetime(2025, 8, 1), "end_date": datetime(2025, 8, 31)}])
+        conn.execute(insert(ActivityType), [{"id": 1, "name": "House Visit"}])
+        conn.execute(insert(BusinessArea), [{"id": 1, "name": "BEN"}])
+        conn.execute(insert(Team), [{"id": 1, "team_code": "BEN_01", "campaign_id": 1, "ba_id": 1}])
+        conn.execute(insert(Employee), [{"id": i, "employee_code": f"E{i}", "team_id": 1} for i in range(1, EMPLOYEES + 1)])
+
+    started = datetime(2025, 8, 1)
+    rng = random.Random(42)
+    written = 0
+    while written < house_visits:
+        rows = []
+        for i in range(written, min(written + CHUNK_SIZE, house_visits)):
+            is_lead = rng.random() < 0.3
+            rows.append({
+                "campaign_id": 1,
+                "employee_id": rng.randint(1, EMPLOYEES),
+                "team_id": 1,
+                "activity_type_id": 1,
+                "customer_mobile": f"9{i:09d}",
+                "logged_at": started + timedelta(seconds=i),
+                "updated_at": started + timedelta(seconds=i),
+                "is_lead": is_lead,
+                "is_converted": is_lead and rng.random() < 0.5,
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(Activity), rows)
+        written += len(rows)
+
+
+def _time_lookups(Session, probes) -> float:
+    db = Session()
+    try:
+        started = time.perf_counter()
+        for employee_id, mobile in probes:
+            find_open_lead(db, 1, employee_id, 1, mobile)
+        return (time.perf_counter() - started) / len(probes)
+    finally:
+        db.close()
+
+
+_LOOKUP_SQL = (
+    "SELECT id FROM activities {hint} WHERE campaign_id = 1 AND activity_type_id = 1 AND customer_mobile = :m "
+    "AND employee_id = :e AND is_lead = 1 AND is_converted = 0 LIMIT 1"
+)
+
+
+def _time_full_scans(engine, probes) -> float:
+    with engine.connect() as conn:
+        started = time.perf_counter()
+        for employee_id, mobile in probes:
+            conn.execute(text(_LOOKUP_SQL.format(hint="NOT INDEXED")), {"e": employee_id, "m": mobile}).first()
+        return (time.perf_counter() - started) / len(probes)
+
+
+def _query_plan(engine, employee_id: int, mobile: str, hint: str = "") -> str:
+    with engine.connect() as conn:
+        rows = conn.execute(text("EXPLAIN QUERY PLAN " + _LOOKUP_SQL.format(hint=hint)), {"e": employee_id, "m": mobile}).all()
+    return "; ".join(str(r[-1]) for r in rows)
+
+
+def run(house_visits: int, db_path: str):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    print(f"Seeding {house_visits:,} House Visits into {db_path} ...")
+    started = time.perf_counter()
+    _seed(engine, house_visits)
+    print(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT employee_id, customer_mobile FROM activities ORDER BY RANDOM() LIMIT :n"), {"n": LOOKUPS}).all()
+    probes = [(r[0], r[1]) for r in rows]
+
+    print(f"Indexed lookup (ORM, as in submit_activity): {_time_lookups(Session, probes) * 1e6:,.0f} us/lookup")
+    print(f"  plan: {_query_plan(engine, *probes[0])}")
+
+    # A full scan per lookup is slow, so sample fewer probes.
+    slow_probes = probes[:20]
+    print(f"Full table scan (NOT INDEXED)              : {_time_full_scans(engine, slow_probes) * 1e6:,.0f} us/lookup")
+    print(f"  plan: {_query_plan(engine, *slow_probes[0], hint='NOT INDEXED')}")
+
+if __name__ == "__main__":
+    house_visits = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    if len(sys.argv) > 2:
+        run(house_visits, sys.argv[2])
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            run(house_visits, os.path.join(tmp_dir, "open_lead_benchmark.db"))
@@ -0,0 +1,79 @@
+# ==============================================================================
+# File: backend/cache.py
+# Description: A small thread-safe in-process cache with TTL expiry and LRU
+# eviction, used for data that is read on almost every request but changes
+# rarely. Each cache counts its hits and misses so the ratio can be reported.
+# ==============================================================================
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+# Every cache created with a name is registered here for reporting.
+caches: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    def __init__(self, name: str, ttl: float, max_entries: int = 10000):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not _MISSING:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None, predicate: Optional[Callable[[Hashable, Any], bool]] = None):
+        """Drops one key, every entry matching `predicate`, or (with no arguments) everything."""
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+            elif predicate is not None:
+                for k in [k for k, (_, v) in self._entries.items() if predicate(k, v)]:
+                    del self._entries[k]
+            else:
+                self._entries.clear()
+
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def values(self) -> list:
+        """The values of all unexpired entries, without counting hits or misses."""
+        now = time.monotonic()
+        with self._lock:
+            return [value for expires_at, value in self._entries.values() if expires_at > now]
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
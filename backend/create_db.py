@@ -16,6 +16,7 @@ from backend.database import Base, engine
 # and can create the corresponding tables.
 from backend.models import (
     User,
+    RefreshToken,
     Campaign,
     ScoringWeight,
     BonusPoint,
@@ -24,13 +25,19 @@ from backend.models import (
     Employee,
     ActivityType,
     Activity,
+    ActivityTombstone,
     BATarget,
     TeamTarget,
     Score,
+    ScoringRun,
     Mela,
     BrandingActivity,
     SpecialEvent,
-    PressRelease
+    PressRelease,
+    MediaObject,
+    EventMedia,
+    MediaVariant,
+    ProvisioningJobRecord
 )
 # --- END OF FIX ---
 
@@ -22,7 +22,9 @@ if ENVIRONMENT == "production":
 else:
     print("Running in DEVELOPMENT mode. Using SQLite.")
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'sales_portal.db')}"
+    # SQLITE_PATH points a scratch run (e.g. the load-test harness) at another file.
+    SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(BASE_DIR, 'sales_portal.db'))
+    DATABASE_URL = f"sqlite:///{SQLITE_PATH}"
     engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1,191 @@
+# ==============================================================================
+# File: backend/dedup.py
+# Description: Duplicate-customer pre-check for activity submissions. Mobile
+# numbers are normalised, and each campaign keeps an in-memory counting Bloom
+# filter of (activity type, mobile) pairs. A "definitely not seen" answer lets
+# the submission skip the duplicate SELECT. The unique constraint
+# 'uq_campaign_activity_customer' remains the source of truth, so a stale
+# filter (e.g. another worker inserted the row) only ever costs a failed insert.
+# ==============================================================================
+import os
+import re
+import math
+import hashlib
+import threading
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from . import models
+
+DEDUP_EXPECTED_ENTRIES = int(os.getenv("DEDUP_EXPECTED_ENTRIES", "500000"))
+DEDUP_FALSE_POSITIVE_RATE = float(os.getenv("DEDUP_FALSE_POSITIVE_RATE", "0.01"))
+
+
+def normalize_mobile(raw: str) -> str:
+    """
+    Reduces a mobile number to its 10 significant digits, so that
+    '+91 98470 12345', '098470-12345' and '9847012345' are the same customer.
+    """
+    digits = re.sub(r"\D", "", raw or "")
+    if len(digits) > 10 and (digits.startswith("91") or digits.startswith("0")):
+        digits = digits[-10:]
+    return digits or (raw or "").strip()
+
+
+def mobile_candidates(raw: str) -> List[str]:
+    """
+    The values a stored row for this customer may hold: the normalised mobile
+    and, for rows written before normalisation and not yet backfilled
+    (python -m backend.dedup), the mobile as entered and its common prefixed
+    forms. All are point lookups on 'uq_campaign_activity_customer'.
+    """
+    normalized = normalize_mobile(raw)
+    candidates = [normalized, (raw or "").strip()]
+    if len(normalized) == 10 and normalized.isdigit():
+        candidates += [f"+91{normalized}", f"91{normalized}", f"0{normalized}"]
+    return list(dict.fromkeys(candidates))
+
+
+def backfill_normalized_mobiles(db: Session, batch_size: int = 1000) -> Dict[str, list]:
+    """
+    Rewrites stored mobiles to their normalised form. A row whose normalised
+    mobile is already taken in its campaign and activity type would break
+    'uq_campaign_activity_customer'; it is left as entered and its id is
+    reported for review, since one of the two entries is a duplicate.
+    """
+    updated, collisions = [], []
+    last_id = 0
+    while True:
+        batch = db.query(models.Activity.id, models.Activity.campaign_id, models.Activity.activity_type_id, models.Activity.customer_mobile).filter(
+            models.Activity.id > last_id
+        ).order_by(models.Activity.id).limit(batch_size).all()
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        pending = [(activity_id, campaign_id, type_id, normalize_mobile(mobile)) for activity_id, campaign_id, type_id, mobile in batch if normalize_mobile(mobile) != mobile]
+        if not pending:
+            continue
+        taken = set(db.query(models.Activity.campaign_id, models.Activity.activity_type_id, models.Activity.customer_mobile).filter(
+            models.Activity.customer_mobile.in_({normalized for _, _, _, normalized in pending})
+        ).all())
+
+        mappings = []
+        for activity_id, campaign_id, type_id, normalized in pending:
+            key = (campaign_id, type_id, normalized)
+            if key in taken:
+                collisions.append(activity_id)
+                continue
+            taken.add(key)
+            mappings.append({"id": activity_id, "customer_mobile": normalized})
+        if mappings:
+            db.bulk_update_mappings(models.Activity, mappings)
+            db.commit()
+        updated += [m["id"] for m in mappings]
+    return {"updated": updated, "collisions": collisions}
+
+
+class CountingBloomFilter:
+    """
+    A Bloom filter with one saturating byte counter per slot, so entries can be
+    removed again when an activity is deleted. Saturated counters are never
+    decremented, which keeps the filter free of false negatives.
+    """
+    def __init__(self, expected_entries: int, false_positive_rate: float):
+        expected_entries = max(expected_entries, 1)
+        self.size = max(8, int(-expected_entries * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / expected_entries * math.log(2)))
+        self.counters = bytearray(self.size)
+
+    def _slots(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        for slot in self._slots(item):
+            if self.counters[slot] < 255:
+                self.counters[slot] += 1
+
+    def remove(self, item: str):
+        slots = self._slots(item)
+        if not all(self.counters[slot] for slot in slots):
+            return
+        for slot in slots:
+            if 0 < self.counters[slot] < 255:
+                self.counters[slot] -= 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.counters[slot] for slot in self._slots(item))
+
+
+class MobileDedupService:
+    """Per-campaign filters, built lazily from the database on first use."""
+    def __init__(self, expected_entries: int, false_positive_rate: float):
+        self.expected_entries = expected_entries
+        self.false_positive_rate = false_positive_rate
+        self._filters: Dict[int, CountingBloomFilter] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(activity_type_id: int, mobile: str) -> str:
+        return f"{activity_type_id}:{normalize_mobile(mobile)}"
+
+    def _load(self, db: Session, campaign_id: int) -> CountingBloomFilter:
+        bloom = CountingBloomFilter(self.expected_entries, self.false_positive_rate)
+        rows = db.query(models.Activity.activity_type_id, models.Activity.customer_mobile).filter(
+            models.Activity.campaign_id == campaign_id
+        ).yield_per(10000)
+        for activity_type_id, mobile in rows:
+            bloom.add(self._key(activity_type_id, mobile))
+        return bloom
+
+    def _filter_for(self, db: Session, campaign_id: int) -> CountingBloomFilter:
+        bloom = self._filters.get(campaign_id)
+        if bloom is None:
+            with self._lock:
+                bloom = self._filters.get(campaign_id)
+                if bloom is None:
+                    bloom = self._load(db, campaign_id)
+                    self._filters[campaign_id] = bloom
+        return bloom
+
+    def warm(self, db: Session):
+        """Builds the filters for every campaign. Called once at startup."""
+        for (campaign_id,) in db.query(models.Campaign.id).all():
+            self._filter_for(db, campaign_id)
+
+    def might_exist(self, db: Session, campaign_id: int, activity_type_id: int, mobile: str) -> bool:
+        return self._key(activity_type_id, mobile) in self._filter_for(db, campaign_id)
+
+    def add(self, db: Session, campaign_id: int, activity_type_id: int, mobile: str):
+        bloom = self._filter_for(db, campaign_id)
+        with self._lock:
+            bloom.add(self._key(activity_type_id, mobile))
+
+    def discard(self, campaign_id: int, activity_type_id: int, mobile: str):
+        bloom = self._filters.get(campaign_id)
+        if bloom is not None:
+            with self._lock:
+                bloom.remove(self._key(activity_type_id, mobile))
+
+    def reset(self):
+        with self._lock:
+            self._filters.clear()
+
+
+mobile_dedup = MobileDedupService(DEDUP_EXPECTED_ENTRIES, DEDUP_FALSE_POSITIVE_RATE)
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+    db = SessionLocal()
+    try:
+        result = backfill_normalized_mobiles(db)
+        print(f"--- Normalised the mobile of {len(result['updated'])} activities ---")
+        if result["collisions"]:
+            print(f"--- {len(result['collisions'])} activities duplicate another entry once normalised and were left as entered: {result['collisions']} ---")
+    finally:
+        db.close()
@@ -0,0 +1,79 @@
+# ==============================================================================
+# File: backend/events.py
+# Description: Read side of the event tables (melas, branding, special events,
+# press releases), shared by the listing endpoints and the scoring engine.
+# - Listings use keyset pagination on the id: each page is an index range scan
+#   on (campaign_id, [team_id | ba_id], id) however deep the client scrolls.
+# - Counts per team or BA come from one GROUP BY query per table.
+# - The media of a page is fetched in one query, with thumbnail references.
+# ==============================================================================
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from .models import Mela, BrandingActivity, SpecialEvent, PressRelease, EventMedia, MediaObject, MediaVariant
+
+MEDIA_URL_PREFIX = "/api/media"
+
+
+@dataclass(frozen=True)
+class EventKind:
+    owner_type: str      # EventMedia.owner_type
+    model: type
+    scope_column: str    # "team_id" for melas, "ba_id" for BA-level events
+
+
+MELA = EventKind("mela", Mela, "team_id")
+BRANDING = EventKind("branding", BrandingActivity, "ba_id")
+SPECIAL_EVENT = EventKind("special_event", SpecialEvent, "ba_id")
+PRESS_RELEASE = EventKind("press_release", PressRelease, "ba_id")
+
+
+def grouped_counts(db: Session, kind: EventKind, campaign_id: int, *criteria) -> Dict[int, int]:
+    """Number of events of `kind` in a campaign per team (melas) or BA (the rest)."""
+    scope = getattr(kind.model, kind.scope_column)
+    rows = db.query(scope, func.count(kind.model.id)).filter(kind.model.campaign_id == campaign_id, *criteria).group_by(scope).all()
+    return dict(rows)
+
+
+def page(db: Session, kind: EventKind, campaign_id: int, criteria: list, cursor: Optional[int], limit: int) -> tuple:
+    """
+    One page of events, newest first. `cursor` is the id of the last row the
+    client has seen. Returns (rows, next_cursor); next_cursor is None on the
+    last page.
+    """
+    model = kind.model
+    query = db.query(model).filter(model.campaign_id == campaign_id, *criteria)
+    if cursor is not None:
+        query = query.filter(model.id < cursor)
+    # One extra row tells whether there is a next page without a COUNT.
+    rows = query.order_by(model.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+def media_refs(db: Session, owner_type: str, owner_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    """The media of each event row, in upload order, with the URL of its thumbnail if one has been rendered."""
+    owner_ids = list(owner_ids)
+    if not owner_ids:
+        return {}
+    rows = db.query(
+        EventMedia.owner_id, MediaObject.sha256, MediaObject.content_type, MediaVariant.id
+    ).join(MediaObject, EventMedia.media_id == MediaObject.id).outerjoin(
+        MediaVariant, and_(MediaVariant.media_id == MediaObject.id, MediaVariant.kind == "thumbnail")
+    ).filter(
+        EventMedia.owner_type == owner_type, EventMedia.owner_id.in_(owner_ids)
+    ).order_by(EventMedia.owner_id, EventMedia.position).all()
+
+    refs: Dict[int, List[dict]] = {}
+    for owner_id, sha256, content_type, thumbnail_id in rows:
+        refs.setdefault(owner_id, []).append({
+            "sha256": sha256,
+            "content_type": content_type,
+            "url": f"{MEDIA_URL_PREFIX}/{sha256}",
+            "thumbnail_url": f"{MEDIA_URL_PREFIX}/{sha256}/thumbnail" if thumbnail_id else None,
+        })
+    return refs
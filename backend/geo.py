@@ -0,0 +1,96 @@
+# ==============================================================================
+# File: backend/geo.py
+# Description: Geohash helpers for activity coordinates. Every activity with a
+# location stores a full-precision geohash; a heatmap cell at zoom level N is
+# simply the first N characters, so coverage maps are a GROUP BY on an
+# indexed prefix instead of shipping raw points to the browser.
+#
+# Backfill existing rows with: python -m backend.geo
+# ==============================================================================
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+
+from . import models
+
+GEOHASH_PRECISION = 9 # ~5m x 5m cells
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {c: i for i, c in enumerate(_BASE32)}
+
+
+def encode_geohash(latitude: Optional[float], longitude: Optional[float], precision: int = GEOHASH_PRECISION) -> Optional[str]:
+    """Encodes a coordinate as a geohash, or returns None if it is missing or invalid."""
+    if latitude is None or longitude is None:
+        return None
+    if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+        return None
+
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def decode_geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """Returns (min_lat, min_lon, max_lat, max_lon) of a geohash cell."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _BASE32_INDEX[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def backfill_geohashes(db: Session, batch_size: int = 1000) -> int:
+    """Computes the geohash for activities that have coordinates but no cell yet."""
+    updated = 0
+    last_id = 0
+    while True:
+        batch = db.query(models.Activity.id, models.Activity.latitude, models.Activity.longitude).filter(
+            models.Activity.id > last_id,
+            models.Activity.geohash.is_(None),
+            models.Activity.latitude.isnot(None),
+            models.Activity.longitude.isnot(None)
+        ).order_by(models.Activity.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        mappings = []
+        for activity_id, latitude, longitude in batch:
+            geohash = encode_geohash(latitude, longitude)
+            if geohash:
+                mappings.append({"id": activity_id, "geohash": geohash})
+        if mappings:
+            db.bulk_update_mappings(models.Activity, mappings)
+            db.commit()
+        updated += len(mappings)
+        last_id = batch[-1][0]
+    return updated
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+    db = SessionLocal()
+    try:
+        print(f"--- Backfilled geohash for {backfill_geohashes(db)} activities ---")
+    finally:
+        db.close()
@@ -0,0 +1,80 @@
+# ==============================================================================
+# File: backend/hierarchy.py
+# Description: Resolves the BA -> team -> employee hierarchy for scope checks.
+# - SQL filters use a subquery on teams.ba_id, so the database answers
+#   "activities in my BA" with an indexed semi-join instead of the route first
+#   fetching every team id and sending it back as a large IN list.
+# - Python-side checks ("which BA owns team X?") read a cached in-memory index
+#   that is rebuilt after team/employee mutations and uploads. A team missing
+#   from it is looked up on its own and merged in.
+# ==============================================================================
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+from .cache import TTLCache
+
+HIERARCHY_CACHE_TTL_SECONDS = int(os.getenv("HIERARCHY_CACHE_TTL_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class HierarchyIndex:
+    team_to_ba: Dict[int, int] = field(default_factory=dict)
+
+
+_cache = TTLCache("hierarchy", ttl=HIERARCHY_CACHE_TTL_SECONDS, max_entries=1)
+
+
+def _load(db: Session) -> HierarchyIndex:
+    return HierarchyIndex(team_to_ba=dict(db.query(models.Team.id, models.Team.ba_id).all()))
+
+
+def get_index(db: Session) -> HierarchyIndex:
+    return _cache.get_or_load("index", lambda: _load(db))
+
+
+def invalidate():
+    """Call after creating, deleting or re-homing teams or employees."""
+    _cache.invalidate()
+
+
+def ba_of_team(db: Session, team_id: int) -> Optional[int]:
+    """The BA that owns a team, or None if the team does not exist."""
+    index = get_index(db)
+    ba_id = index.team_to_ba.get(team_id)
+    if ba_id is None:
+        # The team may have been created by another worker since the last load.
+        # A point lookup, so a bogus team id cannot force a reload of the index.
+        ba_id = db.scalar(select(models.Team.ba_id).where(models.Team.id == team_id))
+        if ba_id is not None:
+            index.team_to_ba[team_id] = ba_id
+    return ba_id
+
+
+def ba_team_ids(ba_id: int):
+    """A subquery of the team ids in a BA, for use as `column.in_(ba_team_ids(ba_id))`."""
+    return select(models.Team.id).where(models.Team.ba_id == ba_id)
+
+
+def apply_scope(query, current_user, team_column, employee_column):
+    """
+    Restricts a query to the rows the current principal may see:
+    - Admin: All rows.
+    - BA Coordinator: All rows for their Business Area.
+    - Team Leader/Coordinator: All rows for their team.
+    - Employee: Only their own rows.
+    """
+    if current_user.role == "admin":
+        return query
+    if current_user.role == "ba_coordinator":
+        return query.filter(team_column.in_(ba_team_ids(current_user.ba_id)))
+    if current_user.role in ["team_leader", "team_coordinator"]:
+        if not current_user.team_id:
+            raise HTTPException(status_code=403, detail="User is not assigned to a team.")
+        return query.filter(team_column == current_user.team_id)
+    return query.filter(employee_column == current_user.employee_id)
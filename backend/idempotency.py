@@ -0,0 +1,218 @@
+# ==============================================================================
+# File: backend/idempotency.py
+# Description: Idempotency-Key support for submissions made from flaky mobile
+# networks. The first response for a key is remembered for a limited time and
+# replayed verbatim on retries, before the route runs, so a retried sale or
+# photo upload never touches the database or the disk again.
+# - The response is stored with a hash of the request body. Reusing a key with
+#   a different body is a client bug and gets 422 instead of a replay.
+# - A plain ASGI middleware: the body is hashed chunk by chunk as the route
+#   reads it (or as a retry is drained), so a photo upload is never held in
+#   memory just to fingerprint it. The response streams to the client while a
+#   copy is kept for the store.
+# ==============================================================================
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .auth import SECRET_KEY, ALGORITHM
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 60 * 60)))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+# Only these POST endpoints honour the header.
+IDEMPOTENT_PATH_PREFIXES = ("/api/activities/", "/api/events/")
+
+_IN_PROGRESS = object()
+
+
+class IdempotencyStore:
+    """
+    A small in-memory LRU map of key -> (expires_at, stored response).
+    Entries expire after `ttl` seconds and the oldest are evicted first once
+    `max_entries` is reached. Only the request fingerprint and the response's
+    status, raw headers and body are kept.
+    """
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    def reserve(self, key: Tuple) -> Optional[object]:
+        """
+        Returns the stored entry for `key`, or None after reserving the key for
+        the caller. A reserved key that is still being processed returns _IN_PROGRESS.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+            self._entries[key] = (now + self.ttl, _IN_PROGRESS)
+            return None
+
+    def save(self, key: Tuple, fingerprint: str, status_code: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, (fingerprint, status_code, headers, body))
+            self._entries.move_to_end(key)
+
+    def release(self, key: Tuple):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+store = IdempotencyStore(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_ENTRIES)
+
+
+def _token_subject(headers: Headers) -> Optional[str]:
+    """Reads the username from the bearer token without a database round trip."""
+    authorization = headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+
+_BOUNDARY = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+
+
+class _BodyHasher:
+    """
+    Hashes a request body as it streams past. Clients pick a new multipart
+    boundary for every attempt, so it is left out; the last few bytes of each
+    chunk are held back in case a boundary straddles two chunks.
+    """
+    def __init__(self, content_type: str):
+        boundary = _BOUNDARY.search(content_type)
+        self.boundary = boundary.group(1).encode() if boundary else b""
+        self.complete = False
+        self._hash = hashlib.sha256()
+        self._tail = b""
+
+    def update(self, message: Message):
+        if message["type"] != "http.request":
+            return
+        data = self._tail + message.get("body", b"")
+        if self.boundary:
+            data = data.replace(self.boundary, b"")
+            split = max(0, len(data) - (len(self.boundary) - 1))
+            data, self._tail = data[:split], data[split:]
+        self._hash.update(data)
+        if not message.get("more_body", False):
+            self._hash.update(self._tail)
+            self._tail = b""
+            self.complete = True
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+async def _drain(receive: Receive, hasher: _BodyHasher):
+    """Reads the rest of the body into the hasher. Stops early if the client disconnects."""
+    while not hasher.complete:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+        hasher.update(message)
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(IDEMPOTENT_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        subject = _token_subject(headers) if idempotency_key else None
+        if subject is None:
+            # No key, or no valid token: the route handles it (and rejects the latter with its usual 401).
+            await self.app(scope, receive, send)
+            return
+
+        key = (subject, scope["path"], idempotency_key)
+        hasher = _BodyHasher(headers.get("content-type", ""))
+        stored = store.reserve(key)
+        if stored is _IN_PROGRESS:
+            response = JSONResponse(
+                status_code=409,
+                content={"detail": "A request with this Idempotency-Key is still being processed."}
+            )
+            await response(scope, receive, send)
+            return
+        if stored is not None:
+            stored_fingerprint, status_code, stored_headers, body = stored
+            await _drain(receive, hasher)
+            if stored_fingerprint != hasher.hexdigest():
+                response = JSONResponse(
+                    status_code=422,
+                    content={"detail": "This Idempotency-Key was already used for a request with a different body."}
+                )
+                await response(scope, receive, send)
+                return
+            await send({"type": "http.response.start", "status": status_code, "headers": stored_headers + [(b"idempotency-replayed", b"true")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def hashing_receive() -> Message:
+            message = await receive()
+            hasher.update(message)
+            return message
+
+        start: dict = {}
+        chunks: List[bytes] = []
+
+        async def recording_send(message: Message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body" and start["status"] < 500:
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, hashing_receive, recording_send)
+            # A route that failed before reading the whole body still needs the full fingerprint.
+            await _drain(receive, hasher)
+        except BaseException:
+            # Including CancelledError from a client disconnect: the retry must not get 409.
+            store.release(key)
+            raise
+        # Server errors are not final, so the client is allowed to retry them;
+        # neither is a response to a body that never fully arrived.
+        if not start or start["status"] >= 500 or not hasher.complete:
+            store.release(key)
+            return
+        store.save(key, hasher.hexdigest(), start["status"], list(start.get("headers", [])), b"".join(chunks))
@@ -8,7 +8,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from .routes import (
     auth_routes, user_routes, employee_routes, campaign_routes, 
     activity_routes, leaderboard_routes, team_routes, target_routes, 
-    upload_routes, dashboard_routes, events_routes, admin_routes
+    upload_routes, dashboard_routes, events_routes, admin_routes, media_routes,
+    metrics_routes
 )
 from pathlib import Path
 from fastapi.staticfiles import StaticFiles
@@ -20,11 +21,21 @@ from .database import SessionLocal
 from .scoring_engine import recalculate_all_scores
 from .models import Campaign
 # --- END OF NEW IMPORTS ---
+from .idempotency import IdempotencyMiddleware
+from .dedup import mobile_dedup
+from .password_verifier import password_verifier
+from . import provisioning, thumbnails, media
+from .database import engine
+from .sql_stats import sql_stats_middleware, install as install_sql_stats
+from .metrics import metrics_middleware, Counter
+from .slow_queries import slow_query_log
+from . import request_profiler
 
 app = FastAPI(title="Sales Performance Portal API", version="2")
 
 # --- NEW: Instantiate the scheduler ---
 scheduler = AsyncIOScheduler()
+SCORING_JOB_RUNS = Counter("scoring_job_runs_total", "Scheduled scoring job runs, by result.", ("result",))
 
 def scoring_job():
     """
@@ -41,32 +52,72 @@ def scoring_job():
         # flag to the Campaign model to find the correct one.
         active_campaign = db.query(Campaign).filter_by(id=1).first()
         if active_campaign:
-            recalculate_all_scores(db, campaign_id=active_campaign.id)
+            recalculate_all_scores(db, campaign_id=active_campaign.id, trigger="scheduler")
+            SCORING_JOB_RUNS.inc(result="succeeded")
             print(f"--- Scoring job completed for campaign '{active_campaign.name}' ---")
         else:
+            SCORING_JOB_RUNS.inc(result="skipped")
             print("--- No active campaign found (ID=1), skipping scoring job ---")
     except Exception as e:
+        SCORING_JOB_RUNS.inc(result="failed")
         print(f"--- ERROR in scheduled scoring job: {e} ---")
     finally:
         db.close()
 
+def media_sweep_job():
+    """Removes media files left behind by uploads that failed to commit."""
+    db = SessionLocal()
+    try:
+        removed = media.sweep_orphaned_files(db)
+        if removed:
+            print(f"--- Media sweep removed {len(removed)} orphaned file(s) ---")
+    except Exception as e:
+        print(f"--- ERROR in media sweep: {e} ---")
+    finally:
+        db.close()
+
 # --- NEW: Add the startup event to configure and start the scheduler ---
 @app.on_event("startup")
 async def startup_event():
     # Schedule the scoring_job to run every 5 minutes.
     # The job is given a unique ID to prevent duplicates.
     scheduler.add_job(scoring_job, 'interval', minutes=5, id="scoring_job_5min")
+    scheduler.add_job(media_sweep_job, 'interval', hours=1, id="media_sweep_hourly")
     scheduler.start()
     print("Scheduler started. Scoring job will run automatically every 5 minutes.")
 
+    # Warm the duplicate-mobile filters so the first submissions skip the SELECT.
+    db = SessionLocal()
+    try:
+        mobile_dedup.warm(db)
+    except Exception as e:
+        print(f"--- Could not warm duplicate-mobile filters, they will load on first use: {e} ---")
+    finally:
+        db.close()
+
 # --- NEW: Add the shutdown event to gracefully stop the scheduler ---
 @app.on_event("shutdown")
 async def shutdown_event():
     scheduler.shutdown()
+    password_verifier.shutdown()
+    provisioning.shutdown()
+    thumbnails.shutdown()
+    slow_query_log.shutdown()
     print("Scheduler shut down.")
 
 # --- Standard Middleware and Route Inclusions ---
 
+# Innermost, so that a profiled request is not one replayed by the idempotency middleware.
+app.add_middleware(request_profiler.RequestProfilerMiddleware)
+# Registered before CORS so that replayed responses still get CORS headers.
+app.add_middleware(IdempotencyMiddleware)
+# Outside the idempotency middleware, which reads the body to fingerprint it.
+app.middleware("http")(media.upload_size_middleware)
+# Outside the idempotency middleware so that replayed responses are timed too.
+install_sql_stats(engine)
+app.middleware("http")(sql_stats_middleware)
+app.middleware("http")(metrics_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:5174", "http://127.0.0.1:5173", "http://127.0.0.1:5174","http://127.0.0.1"],
@@ -87,6 +138,8 @@ app.include_router(upload_routes.router, prefix="/api/upload", tags=["9. Bulk Up
 app.include_router(dashboard_routes.router, prefix="/api/dashboard", tags=["10. Dashboard Data"]) 
 app.include_router(events_routes.router, prefix="/api/events", tags=["11. Event Logging"])
 app.include_router(admin_routes.router, prefix="/api/admin", tags=["12. Admin Utilities"])
+app.include_router(media_routes.router, prefix="/api/media", tags=["13. Media"])
+app.include_router(metrics_routes.router)
 
 # --- Static File Serving for Frontend ---
 
@@ -0,0 +1,308 @@
+# ==============================================================================
+# File: backend/media.py
+# Description: Content-addressed storage for event photos, videos and clippings.
+# - Requests whose Content-Length is over the per-request limit are refused by
+#   upload_size_middleware before the body is received. Starlette spools the
+#   multipart body to temporary files before the route runs, so the per-file
+#   and per-request limits are checked again while each upload is hashed
+#   (SHA-256) in fixed-size chunks, before anything is written to the store.
+# - A file is stored once per digest under backend/uploads/media/ab/<digest>.
+#   An upload whose digest is already stored costs no write and no space.
+# - MediaObject rows count their EventMedia references so a file can be
+#   deleted when nothing points at it any more. A file's name is its digest,
+#   so verifying the store only needs a re-hash (python -m backend.media verify).
+# - A failed request never deletes files: another request, possibly in another
+#   worker, may be about to commit the same digest. Files that no MediaObject
+#   owns are removed by a periodic sweep once they are MEDIA_ORPHAN_GRACE_SECONDS
+#   old (python -m backend.media sweep).
+# ==============================================================================
+import os
+import sys
+import time
+import uuid
+import shutil
+import hashlib
+import mimetypes
+from dataclasses import dataclass
+from typing import List, Optional
+
+import anyio
+from fastapi import HTTPException, Request, UploadFile, status
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from . import metrics
+from .models import MediaObject, EventMedia, Mela, BrandingActivity, SpecialEvent, PressRelease
+
+UPLOAD_DIRECTORY = "backend/uploads"
+MEDIA_DIRECTORY = os.path.join(UPLOAD_DIRECTORY, "media")
+os.makedirs(MEDIA_DIRECTORY, exist_ok=True)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_FILE_BYTES = int(os.getenv("MAX_UPLOAD_FILE_BYTES", str(50 * 1024 * 1024)))
+MAX_UPLOAD_REQUEST_BYTES = int(os.getenv("MAX_UPLOAD_REQUEST_BYTES", str(200 * 1024 * 1024)))
+# Room for the multipart boundaries and form fields around the files.
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+# POSTs under these prefixes carry event media.
+MEDIA_UPLOAD_PATH_PREFIXES = ("/api/events/",)
+MEDIA_ORPHAN_GRACE_SECONDS = int(os.getenv("MEDIA_ORPHAN_GRACE_SECONDS", str(60 * 60)))
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+MEDIA_BYTES = metrics.Counter("media_upload_bytes_total", "Bytes of event media received, by whether the content was new to the store.", ("content",))
+
+
+@dataclass
+class StoredUpload:
+    sha256: str
+    size: int
+    content_type: Optional[str]
+    path: str
+    filename: str
+    created_file: bool
+
+
+def media_path(sha256: str, extension: str = "") -> str:
+    return os.path.join(MEDIA_DIRECTORY, sha256[:2], f"{sha256}{extension.lower()}")
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+async def upload_size_middleware(request: Request, call_next):
+    """Answers 413 from the Content-Length header, before the form is received and parsed."""
+    if request.method == "POST" and request.url.path.startswith(MEDIA_UPLOAD_PATH_PREFIXES):
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > MAX_UPLOAD_REQUEST_BYTES + MULTIPART_OVERHEAD_BYTES:
+            return JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": f"The files in this request are larger than the {MAX_UPLOAD_REQUEST_BYTES // (1024 * 1024)} MB limit per request."},
+                headers={"Connection": "close"},
+            )
+    return await call_next(request)
+
+
+async def _digest(upload_file: UploadFile, budget: List[int]) -> tuple:
+    """Hashes an upload chunk by chunk, enforcing the per-file and per-request limits."""
+    sha256, size = hashlib.sha256(), 0
+    while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > MAX_UPLOAD_FILE_BYTES:
+            raise _too_large(f"'{upload_file.filename}' is larger than the {MAX_UPLOAD_FILE_BYTES // (1024 * 1024)} MB limit per file.")
+        if size > budget[0]:
+            raise _too_large(f"The files in this request are larger than the {MAX_UPLOAD_REQUEST_BYTES // (1024 * 1024)} MB limit per request.")
+        sha256.update(chunk)
+    budget[0] -= size
+    await upload_file.seek(0)
+    return sha256.hexdigest(), size
+
+
+async def _write(upload_file: UploadFile, path: str):
+    """Streams an upload to `path` via a temporary name, so a stored file is always complete."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.part"
+    try:
+        async with await anyio.open_file(temp_path, "wb") as buffer:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                await buffer.write(chunk)
+        os.replace(temp_path, path)
+    except BaseException:
+        remove_files([temp_path])
+        raise
+
+
+def remove_files(paths: List[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def store_uploads(db: Session, upload_files: List[UploadFile]) -> List[StoredUpload]:
+    """
+    Stores the files of one request against a shared size budget, writing only
+    content the store does not have yet. If the request fails later, files it
+    wrote are left to sweep_orphaned_files().
+    """
+    budget = [MAX_UPLOAD_REQUEST_BYTES]
+    digests = []
+    for upload_file in upload_files:
+        if not upload_file.filename:
+            raise HTTPException(status_code=400, detail="File has no name.")
+        digests.append(await _digest(upload_file, budget))
+
+    known = await run_in_threadpool(lambda: dict(db.execute(
+        select(MediaObject.sha256, MediaObject.path).where(MediaObject.sha256.in_({sha for sha, _ in digests}))
+    ).all()))
+
+    stored: List[StoredUpload] = []
+    for upload_file, (sha256, size) in zip(upload_files, digests):
+        owned = sha256 in known
+        path = known.get(sha256) or media_path(sha256, os.path.splitext(upload_file.filename)[1])
+        created = not os.path.exists(path)
+        if created:
+            await _write(upload_file, path)
+        elif not owned:
+            # A file with no row yet: keep the sweep off it until this request has committed.
+            os.utime(path)
+        known[sha256] = path
+        stored.append(StoredUpload(sha256, size, upload_file.content_type, path, upload_file.filename, created))
+    for s in stored:
+        MEDIA_BYTES.inc(s.size, content="new" if s.created_file else "duplicate")
+    return stored
+
+
+def attach_media(db: Session, owner_type: str, owner_id: int, uploads: List[StoredUpload]) -> List[int]:
+    """
+    Records `uploads` as the media of an event row and takes a reference on
+    each object. Runs in the caller's transaction; returns the media ids.
+    """
+    if not uploads:
+        return []
+    insert = _DIALECT_INSERTS[db.get_bind().dialect.name](MediaObject)
+    db.execute(insert.on_conflict_do_nothing(index_elements=[MediaObject.sha256]), [
+        {"sha256": u.sha256, "size": u.size, "content_type": u.content_type, "path": u.path, "ref_count": 0}
+        for u in {u.sha256: u for u in uploads}.values()
+    ])
+    ids = dict(db.execute(select(MediaObject.sha256, MediaObject.id).where(MediaObject.sha256.in_({u.sha256 for u in uploads}))).all())
+
+    references = {}
+    for u in uploads:
+        references[ids[u.sha256]] = references.get(ids[u.sha256], 0) + 1
+    for media_id, count in references.items():
+        db.execute(update(MediaObject).where(MediaObject.id == media_id).values(ref_count=MediaObject.ref_count + count))
+
+    db.add_all([
+        EventMedia(media_id=ids[u.sha256], owner_type=owner_type, owner_id=owner_id, position=position, original_filename=u.filename)
+        for position, u in enumerate(uploads)
+    ])
+    return [ids[u.sha256] for u in uploads]
+
+
+def sweep_orphaned_files(db: Session, grace_seconds: int = MEDIA_ORPHAN_GRACE_SECONDS, batch_size: int = 500) -> List[str]:
+    """
+    Removes files under the media directory, variants included, whose digest
+    no MediaObject row owns, and abandoned partial writes. Only files not
+    modified for `grace_seconds` are considered, so uploads still on their way
+    to a commit are left alone. Returns the removed paths.
+    """
+    cutoff = time.time() - grace_seconds
+    candidates = {}
+    for root, _, names in os.walk(MEDIA_DIRECTORY):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            # Originals are '<digest>.ext' and variants '<digest>_<kind>.jpg'.
+            candidates[path] = None if name.endswith(".part") else name[:64]
+
+    removed = [path for path, digest in candidates.items() if digest is None]
+    digests = sorted({digest for digest in candidates.values() if digest})
+    owned = set()
+    for i in range(0, len(digests), batch_size):
+        owned.update(db.scalars(select(MediaObject.sha256).where(MediaObject.sha256.in_(digests[i:i + batch_size]))).all())
+    removed += [path for path, digest in candidates.items() if digest and digest not in owned]
+    remove_files(removed)
+    return removed
+
+
+# Event columns that hold comma-separated media paths, by EventMedia.owner_type.
+EVENT_MEDIA_COLUMNS = (
+    ("mela", Mela, "photo_url"),
+    ("branding", BrandingActivity, "photo_urls"),
+    ("special_event", SpecialEvent, "media_urls"),
+    ("press_release", PressRelease, "clipping_url"),
+)
+
+
+def _file_digest(path: str) -> tuple:
+    sha256, size = hashlib.sha256(), 0
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            sha256.update(chunk)
+    return sha256.hexdigest(), size
+
+
+def adopt_legacy_uploads(db: Session) -> int:
+    """
+    Moves files saved before the media store (uuid names directly in
+    backend/uploads) into it: each file is hard-linked under its digest,
+    referenced from EventMedia and the event's URL column is rewritten.
+    The old file is removed once the row has committed. Returns the number
+    of event rows adopted.
+    """
+    adopted = 0
+    for owner_type, model, column in EVENT_MEDIA_COLUMNS:
+        for row in db.query(model).filter(getattr(model, column).isnot(None)).all():
+            paths = [p for p in getattr(row, column).split(",") if p]
+            if not paths or all(p.startswith(MEDIA_DIRECTORY) for p in paths):
+                continue
+            missing = [p for p in paths if not os.path.exists(p)]
+            if missing:
+                print(f"--- Skipping {owner_type} {row.id}: missing {', '.join(missing)} ---")
+                continue
+
+            uploads, linked = [], []
+            try:
+                for legacy_path in paths:
+                    sha256, size = _file_digest(legacy_path)
+                    existing = db.scalar(select(MediaObject.path).where(MediaObject.sha256 == sha256))
+                    path = existing or media_path(sha256, os.path.splitext(legacy_path)[1])
+                    if not os.path.exists(path):
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        try:
+                            os.link(legacy_path, path)
+                        except OSError:
+                            shutil.copyfile(legacy_path, path)
+                        linked.append(path)
+                    uploads.append(StoredUpload(sha256, size, mimetypes.guess_type(legacy_path)[0], path, os.path.basename(legacy_path), path in linked))
+                attach_media(db, owner_type, row.id, uploads)
+                setattr(row, column, ",".join(u.path for u in uploads))
+                db.commit()
+            except Exception:
+                db.rollback()
+                remove_files(linked)
+                raise
+            remove_files([p for p in paths if p not in {u.path for u in uploads}])
+            adopted += 1
+    return adopted
+
+
+def verify_media(db: Session) -> List[str]:
+    """Re-hashes every stored object and returns a description of each problem found."""
+    problems = []
+    for media in db.query(MediaObject).yield_per(500):
+        if not os.path.exists(media.path):
+            problems.append(f"missing: {media.path}")
+            continue
+        if _file_digest(media.path)[0] != media.sha256:
+            problems.append(f"corrupt: {media.path}")
+    return problems
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+    if sys.argv[1:] not in (["verify"], ["sweep"]):
+        print("Usage: python -m backend.media verify|sweep")
+        sys.exit(2)
+    db = SessionLocal()
+    try:
+        if sys.argv[1] == "sweep":
+            print(f"--- Removed {len(sweep_orphaned_files(db))} orphaned media file(s) ---")
+            sys.exit(0)
+        problems = verify_media(db)
+        for problem in problems:
+            print(problem)
+        print(f"--- Media verification finished: {len(problems)} problem(s) ---")
+        sys.exit(1 if problems else 0)
+    finally:
+        db.close()
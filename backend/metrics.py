@@ -0,0 +1,210 @@
+# ==============================================================================
+# File: backend/metrics.py
+# Description: Minimal in-process metrics in the Prometheus text format, so
+# the API can be scraped without a client library or an external service.
+# - Counter, Gauge and Histogram keep their values per label set in memory
+#   (per worker process) and register themselves for GET /metrics.
+# - Values that already live elsewhere (cache counters, queue depths, the DB
+#   pool) are read at scrape time by collectors instead of being copied.
+# - metrics_middleware records per-route latency, in-flight requests and the
+#   size and duration of uploads.
+# ==============================================================================
+import time
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request
+
+# Request latency buckets in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPLOAD_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# POSTs under these prefixes carry files; their size and duration are recorded.
+UPLOAD_PATH_PREFIXES = ("/api/upload/", "/api/events/")
+
+registry: Dict[str, "_Metric"] = {}
+# Callables returning [(name, type, help, [(labels, value), ...]), ...] at scrape time.
+collectors: List[Callable[[], Iterable[Tuple]]] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+        registry[name] = self
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> List[Tuple[str, dict, float]]:
+        with self._lock:
+            return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines += [f"{name}{_labels(labels)} {_number(value)}" for name, labels, value in self._samples()]
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # [cumulative bucket counts, sum, count]
+            state = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> List[Tuple[str, dict, float]]:
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                labels = dict(zip(self.labelnames, key))
+                samples += histogram_samples(self.name, labels, self.buckets, counts, total, count)
+        return samples
+
+
+def histogram_samples(name: str, labels: dict, buckets: Iterable[float], cumulative_counts: Iterable[int], total: float, count: int) -> List[Tuple[str, dict, float]]:
+    """Samples of one histogram series. `cumulative_counts[i]` counts observations <= buckets[i]."""
+    samples = [(f"{name}_bucket", {**labels, "le": _number(float(bound))}, bucket_count) for bound, bucket_count in zip(buckets, cumulative_counts)]
+    samples.append((f"{name}_bucket", {**labels, "le": "+Inf"}, count))
+    samples.append((f"{name}_sum", labels, total))
+    samples.append((f"{name}_count", labels, count))
+    return samples
+
+
+class PhaseTimer:
+    """Times consecutive phases of a job: call lap(phase) as each one ends."""
+    def __init__(self, histogram: Optional[Histogram] = None):
+        self.histogram = histogram
+        self.durations: Dict[str, float] = {}
+        self.rows: Dict[str, int] = {}
+        self.started = self._last = time.perf_counter()
+
+    def lap(self, phase: str, rows: Optional[int] = None) -> float:
+        """Ends `phase`; `rows` is how many rows it read or produced, if known."""
+        now = time.perf_counter()
+        elapsed, self._last = now - self._last, now
+        self.durations[phase] = self.durations.get(phase, 0.0) + elapsed
+        if rows is not None:
+            self.rows[phase] = self.rows.get(phase, 0) + rows
+        if self.histogram is not None:
+            self.histogram.observe(elapsed, phase=phase)
+        return elapsed
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def report(self) -> List[dict]:
+        return [
+            {"phase": phase, "duration_ms": round(seconds * 1000, 2), "rows": self.rows.get(phase)}
+            for phase, seconds in self.durations.items()
+        ]
+
+
+def render() -> str:
+    lines = []
+    for metric in list(registry.values()):
+        lines += metric.render()
+    for collect in collectors:
+        try:
+            families = list(collect())
+        except Exception as e:
+            print(f"--- Metrics collector {getattr(collect, '__name__', collect)} failed: {e} ---")
+            continue
+        for name, metric_type, help, samples in families:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {metric_type}"]
+            for sample in samples:
+                sample_name, labels, value = sample if len(sample) == 3 else (name, *sample)
+                lines.append(f"{sample_name}{_labels(labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ============================ HTTP METRICS ============================
+
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "Time to produce the response headers, by route template.", ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served.")
+UPLOAD_BYTES = Counter("upload_request_bytes_total", "Bytes received in upload requests, by route template.", ("route",))
+UPLOAD_DURATION = Histogram("upload_request_duration_seconds", "Duration of upload requests, by route template.", ("route",), buckets=UPLOAD_BUCKETS)
+
+
+def _route_template(request: Request) -> str:
+    # Templates, not raw paths, keep the number of series bounded.
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def metrics_middleware(request: Request, call_next):
+    REQUESTS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        REQUESTS_IN_FLIGHT.dec()
+        route = _route_template(request)
+        REQUEST_DURATION.observe(elapsed, method=request.method, route=route, status=f"{status_code // 100}xx")
+        if request.method == "POST" and request.url.path.startswith(UPLOAD_PATH_PREFIXES):
+            UPLOAD_DURATION.observe(elapsed, route=route)
+            content_length = request.headers.get("content-length")
+            if content_length and content_length.isdigit():
+                UPLOAD_BYTES.inc(int(content_length), route=route)
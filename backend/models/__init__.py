@@ -3,11 +3,13 @@
 # Description: This version correctly imports and exposes ALL database models.
 # ==============================================================================
 from ..database import Base
-from .user import User
+from .user import User, RefreshToken
 from .campaign import Campaign, ScoringWeight, BonusPoint # <-- BonusPoint is now included
 from .team import BusinessArea, Team
 from .employee import Employee
-from .activity import ActivityType, Activity
+from .activity import ActivityType, Activity, ActivityTombstone
 from .target import BATarget, TeamTarget
-from .score import Score
-from .events import Mela, BrandingActivity, SpecialEvent, PressRelease
\ No newline at end of file
+from .score import Score, ScoringRun
+from .events import Mela, BrandingActivity, SpecialEvent, PressRelease
+from .media import MediaObject, EventMedia, MediaVariant
+from .job import ProvisioningJobRecord
@@ -1,10 +1,14 @@
 # ==============================================================================
 # File: backend/models/activity.py (Updated)
 # ==============================================================================
-from sqlalchemy import Integer, String, Float, ForeignKey, UniqueConstraint, DateTime, Boolean
+from sqlalchemy import Integer, String, Float, ForeignKey, UniqueConstraint, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
+from datetime import datetime, timezone
 from ..database import Base
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class ActivityType(Base):
     __tablename__ = "activity_types"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -27,6 +31,7 @@ class Activity(Base):
     customer_address: Mapped[str | None] = mapped_column(String)
     latitude: Mapped[float | None] = mapped_column(Float)
     longitude: Mapped[float | None] = mapped_column(Float)
+    geohash: Mapped[str | None] = mapped_column(String) # Computed from latitude/longitude on insert
     logged_at: Mapped[DateTime] = mapped_column(DateTime, index=True, nullable=False)
     
     # --- NEW & UPDATED FIELDS ---
@@ -38,9 +43,40 @@ class Activity(Base):
     is_converted: Mapped[bool] = mapped_column(Boolean, default=False)
     # --- END OF NEW & UPDATED FIELDS ---
 
+    # --- OFFLINE SYNC FIELDS ---
+    # client_id is generated on the device so a queued entry can be retried safely.
+    # It is only unique per employee, since devices pick ids independently.
+    # updated_at is bumped on every change and drives the delta sync watermark.
+    client_id: Mapped[str | None] = mapped_column(String)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow, onupdate=_utcnow, index=True, nullable=False)
+
     campaign = relationship("Campaign", back_populates="activities")
     employee = relationship("Employee", back_populates="activities")
     team = relationship("Team", back_populates="activities")
     activity_type = relationship("ActivityType", back_populates="activities")
 
-    __table_args__ = (UniqueConstraint("campaign_id", "activity_type_id", "customer_mobile", name="uq_campaign_activity_customer"),)
\ No newline at end of file
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "activity_type_id", "customer_mobile", name="uq_campaign_activity_customer"),
+        UniqueConstraint("employee_id", "client_id", name="uq_activity_employee_client"),
+        Index("ix_activities_team_updated", "team_id", "updated_at"),
+        Index("ix_activities_employee_updated", "employee_id", "updated_at"),
+        # Heatmap cells are geohash prefixes, so these serve the grouped counts
+        # per campaign and per team straight from the index.
+        Index("ix_activities_campaign_geohash", "campaign_id", "geohash"),
+        Index("ix_activities_campaign_team_geohash", "campaign_id", "team_id", "geohash"),
+    )
+
+class ActivityTombstone(Base):
+    """Records deleted activities so offline clients can drop them on the next sync."""
+    __tablename__ = "activity_tombstones"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    activity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    campaign_id: Mapped[int] = mapped_column(ForeignKey("campaigns.id"), nullable=False)
+    team_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    employee_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow, index=True, nullable=False)
+
+    __table_args__ = (
+        Index("ix_activity_tombstones_team_deleted", "team_id", "deleted_at"),
+        Index("ix_activity_tombstones_employee_deleted", "employee_id", "deleted_at"),
+    )
\ No newline at end of file
@@ -1,7 +1,7 @@
 # ==============================================================================
 # File: backend/models/events.py (NEW FILE)
 # ==============================================================================
-from sqlalchemy import Integer, String, ForeignKey, DateTime
+from sqlalchemy import Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from ..database import Base
 from datetime import datetime
@@ -17,6 +17,12 @@ class Mela(Base):
     territory: Mapped[str] = mapped_column(String, nullable=False)
     participants_count: Mapped[int] = mapped_column(Integer, nullable=False)
     photo_url: Mapped[str | None] = mapped_column(String)
+    # Listings page newest-first by id within a campaign, optionally per team;
+    # the scoring engine counts melas per (campaign, team).
+    __table_args__ = (
+        Index("ix_melas_campaign_id", "campaign_id", "id"),
+        Index("ix_melas_campaign_team_id", "campaign_id", "team_id", "id"),
+    )
 
 class BrandingActivity(Base):
     __tablename__ = "branding_activities"
@@ -28,6 +34,10 @@ class BrandingActivity(Base):
     location_name: Mapped[str | None] = mapped_column(String)
     retailer_code: Mapped[str | None] = mapped_column(String)
     photo_urls: Mapped[str | None] = mapped_column(String)
+    __table_args__ = (
+        Index("ix_branding_activities_campaign_id", "campaign_id", "id"),
+        Index("ix_branding_activities_campaign_ba_id", "campaign_id", "ba_id", "id"),
+    )
 
 class SpecialEvent(Base):
     __tablename__ = "special_events"
@@ -39,6 +49,10 @@ class SpecialEvent(Base):
     location: Mapped[str] = mapped_column(String, nullable=False)
     event_type: Mapped[str] = mapped_column(String, nullable=False)
     media_urls: Mapped[str | None] = mapped_column(String)
+    __table_args__ = (
+        Index("ix_special_events_campaign_id", "campaign_id", "id"),
+        Index("ix_special_events_campaign_ba_id", "campaign_id", "ba_id", "id"),
+    )
 
 class PressRelease(Base):
     __tablename__ = "press_releases"
@@ -48,4 +62,8 @@ class PressRelease(Base):
     employee_id: Mapped[int] = mapped_column(ForeignKey("employees.id"), nullable=False)
     release_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     media_outlet: Mapped[str] = mapped_column(String, nullable=False)
-    clipping_url: Mapped[str | None] = mapped_column(String)
\ No newline at end of file
+    clipping_url: Mapped[str | None] = mapped_column(String)
+    __table_args__ = (
+        Index("ix_press_releases_campaign_id", "campaign_id", "id"),
+        Index("ix_press_releases_campaign_ba_id", "campaign_id", "ba_id", "id"),
+    )
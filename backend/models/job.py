@@ -0,0 +1,25 @@
+# ==============================================================================
+# File: backend/models/job.py
+# ==============================================================================
+from sqlalchemy import Integer, String, Float, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from ..database import Base
+
+class ProvisioningJobRecord(Base):
+    """
+    The persisted state of a background upload job, so any API worker can
+    answer a poll for it. Columns mirror provisioning.ProvisioningJob.
+    """
+    __tablename__ = "provisioning_jobs"
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False) # e.g. 'team_upload'
+    owner: Mapped[str] = mapped_column(String, nullable=False) # username that started it
+    status: Mapped[str] = mapped_column(String, nullable=False) # queued | running | succeeded | failed
+    total: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    processed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    message: Mapped[str | None] = mapped_column(String)
+    error: Mapped[str | None] = mapped_column(String)
+    result: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # Epoch seconds, as returned by the job API.
+    created_at: Mapped[float] = mapped_column(Float, index=True, nullable=False)
+    finished_at: Mapped[float | None] = mapped_column(Float)
@@ -0,0 +1,57 @@
+# ==============================================================================
+# File: backend/models/media.py
+# ==============================================================================
+from sqlalchemy import Integer, String, ForeignKey, DateTime, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, Mapped, mapped_column
+from datetime import datetime, timezone
+from ..database import Base
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class MediaObject(Base):
+    """
+    One stored file per distinct content. The file is named after its SHA-256
+    digest, so identical uploads share it; ref_count is the number of
+    EventMedia rows that point at it.
+    """
+    __tablename__ = "media_objects"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    sha256: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    content_type: Mapped[str | None] = mapped_column(String)
+    path: Mapped[str] = mapped_column(String, nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow, nullable=False)
+    # Filled in by the thumbnail pipeline for images.
+    width: Mapped[int | None] = mapped_column(Integer)
+    height: Mapped[int | None] = mapped_column(Integer)
+    references = relationship("EventMedia", back_populates="media")
+    variants = relationship("MediaVariant", back_populates="media", cascade="all, delete-orphan")
+
+class EventMedia(Base):
+    """Links an event row (mela, branding, special_event, press_release) to its media, in upload order."""
+    __tablename__ = "event_media"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    media_id: Mapped[int] = mapped_column(ForeignKey("media_objects.id"), index=True, nullable=False)
+    owner_type: Mapped[str] = mapped_column(String, nullable=False)
+    owner_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    position: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    original_filename: Mapped[str | None] = mapped_column(String)
+    media = relationship("MediaObject", back_populates="references")
+    __table_args__ = (Index("ix_event_media_owner", "owner_type", "owner_id", "position"),)
+
+class MediaVariant(Base):
+    """A derived rendition of an image: a small 'thumbnail' or a 'web' optimised copy."""
+    __tablename__ = "media_variants"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    media_id: Mapped[int] = mapped_column(ForeignKey("media_objects.id"), nullable=False)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    path: Mapped[str] = mapped_column(String, nullable=False)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    content_type: Mapped[str] = mapped_column(String, nullable=False)
+    width: Mapped[int] = mapped_column(Integer, nullable=False)
+    height: Mapped[int] = mapped_column(Integer, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    media = relationship("MediaObject", back_populates="variants")
+    __table_args__ = (UniqueConstraint("media_id", "kind", name="uq_media_variant_kind"),)
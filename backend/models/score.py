@@ -1,8 +1,9 @@
 # ==============================================================================
 # File: backend/models/score.py (NEW FILE)
 # ==============================================================================
-from sqlalchemy import Integer, String, Float, ForeignKey
+from sqlalchemy import Integer, String, Float, ForeignKey, DateTime, JSON
 from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
 from ..database import Base
 
 class Score(Base):
@@ -14,4 +15,19 @@ class Score(Base):
     entity_type: Mapped[str] = mapped_column(String, nullable=False) # 'team' or 'ba'
     
     parameter: Mapped[str] = mapped_column(String, nullable=False) # e.g., 'MNP', 'SIM Sales'
-    points: Mapped[float] = mapped_column(Float, nullable=False)
\ No newline at end of file
+    points: Mapped[float] = mapped_column(Float, nullable=False)
+
+class ScoringRun(Base):
+    """One full score recalculation: its outcome and how long each phase took."""
+    __tablename__ = "scoring_runs"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    campaign_id: Mapped[int] = mapped_column(ForeignKey("campaigns.id"), index=True, nullable=False)
+    trigger: Mapped[str] = mapped_column(String, nullable=False) # 'scheduler', 'admin', 'activity', 'target_upload'
+    status: Mapped[str] = mapped_column(String, nullable=False) # 'succeeded' or 'failed'
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    duration_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    score_rows: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # [{"phase": "fetch", "duration_ms": 12.5, "rows": 340}, ...] in execution order.
+    phases: Mapped[list] = mapped_column(JSON, nullable=False)
+    error: Mapped[str | None] = mapped_column(String)
+    profile_path: Mapped[str | None] = mapped_column(String) # cProfile dump, for runs started with profile=True
@@ -1,7 +1,7 @@
 # ==============================================================================
 # File: backend/models/target.py
 # ==============================================================================
-from sqlalchemy import Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Integer, String, ForeignKey, UniqueConstraint, Index, func, literal_column
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from ..database import Base
 
@@ -30,3 +30,13 @@ class TeamTarget(Base):
     team = relationship("Team", back_populates="team_targets")
     activity_type = relationship("ActivityType", back_populates="team_targets")
     __table_args__ = (UniqueConstraint("campaign_id", "team_id", "activity_type_id", "target_category", name="uq_team_target"),)
+
+# The unique keys above include the nullable target_category, and NULLs never
+# conflict, so two uncategorised targets for the same key would both insert.
+# These indexes treat a missing category as '' and are the conflict targets
+# for INSERT ... ON CONFLICT upserts (see backend/targets.py). The '' is a
+# literal so the conflict target matches the index expression exactly.
+BA_TARGET_KEY = (BATarget.campaign_id, BATarget.ba_id, BATarget.activity_type_id, func.coalesce(BATarget.target_category, literal_column("''")))
+TEAM_TARGET_KEY = (TeamTarget.campaign_id, TeamTarget.team_id, TeamTarget.activity_type_id, func.coalesce(TeamTarget.target_category, literal_column("''")))
+Index("uq_ba_target_key", *BA_TARGET_KEY, unique=True)
+Index("uq_team_target_key", *TEAM_TARGET_KEY, unique=True)
@@ -1,7 +1,8 @@
 # ==============================================================================
 # File: backend/models/user.py
 # ==============================================================================
-from sqlalchemy import Integer, String, ForeignKey, Boolean
+from sqlalchemy import Integer, String, ForeignKey, Boolean, DateTime
+from datetime import datetime
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from ..database import Base
 
@@ -14,4 +15,18 @@ class User(Base):
     role: Mapped[str] = mapped_column(String, nullable=False, default="employee")
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     force_password_reset: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
-    employee = relationship("Employee", back_populates="user")
\ No newline at end of file
+    employee = relationship("Employee", back_populates="user")
+
+class RefreshToken(Base):
+    """
+    A long-lived, single-use refresh token. Only an HMAC of the token is
+    stored. Every refresh revokes the presented token and issues a new one in
+    the same family; presenting an already revoked token revokes the family.
+    """
+    __tablename__ = "refresh_tokens"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True, nullable=False)
+    token_hash: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    family_id: Mapped[str] = mapped_column(String, index=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    revoked_at: Mapped[datetime | None] = mapped_column(DateTime)
@@ -0,0 +1,97 @@
+# ==============================================================================
+# File: backend/password_verifier.py
+# Description: Runs bcrypt password verification for logins on a dedicated,
+# bounded thread pool instead of the event loop. bcrypt releases the GIL, so
+# a few threads verify in parallel while the loop keeps serving requests.
+# When more logins are waiting than the pool and its queue allow, new ones
+# are rejected immediately with 503 and a Retry-After hint.
+# ==============================================================================
+import os
+import math
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+from .auth import verify_password
+
+LOGIN_VERIFY_WORKERS = int(os.getenv("LOGIN_VERIFY_WORKERS", str(min(4, os.cpu_count() or 1))))
+LOGIN_VERIFY_QUEUE_LIMIT = int(os.getenv("LOGIN_VERIFY_QUEUE_LIMIT", "32"))
+
+# Upper bounds (seconds) of the login latency histogram buckets.
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PasswordVerifier:
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_limit)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="login-bcrypt")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.verified = 0
+        self.rejected = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+
+    def _retry_after(self) -> int:
+        """Rough time for the current backlog to drain, based on the average latency."""
+        average = self.latency_sum / self.verified if self.verified else 0.3
+        return max(1, math.ceil(self.pending / self.workers * average))
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.pending -= 1
+
+    def _record(self, elapsed: float):
+        """Counts a verification that ran to completion."""
+        with self._lock:
+            self.verified += 1
+            self.latency_sum += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    self.latency_buckets[i] += 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        with self._lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many logins in progress. Please try again shortly.",
+                    headers={"Retry-After": str(self._retry_after())}
+                )
+            self.pending += 1
+
+        started = time.perf_counter()
+        # A slot is freed when the bcrypt call itself finishes (or is cancelled
+        # before it starts), not when a disconnected caller stops waiting for it.
+        future = self._executor.submit(verify_password, plain_password, hashed_password)
+        future.add_done_callback(self._release)
+        result = await asyncio.wrap_future(future)
+        self._record(time.perf_counter() - started)
+        return result
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "pending": self.pending,
+                "verified": self.verified,
+                "rejected": self.rejected,
+                "latency_avg_seconds": self.latency_sum / self.verified if self.verified else 0.0,
+                "latency_max_seconds": self.latency_max,
+                "latency_sum_seconds": self.latency_sum,
+                "latency_buckets": {str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets)},
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+password_verifier = PasswordVerifier(LOGIN_VERIFY_WORKERS, LOGIN_VERIFY_QUEUE_LIMIT)
@@ -4,7 +4,7 @@ import pandas as pd
 from datetime import datetime
 from .database import SessionLocal, engine, Base
 from .models import *
-from .auth import get_password_hash
+from .provisioning import NewAccount, create_accounts
 import os
 
 def seed_production_database():
@@ -49,6 +49,9 @@ def seed_production_database():
             demo_team = Team(name="TVM Titans", team_code="TVM_01", campaign_id=campaign.id, ba_id=tvm_ba.id)
             db.add(demo_team)
 
+        # Coordinator accounts are created in bulk once every admin team exists.
+        accounts = []
+
         # Process all BAs from the Excel file
         for index, row in ba_df.iterrows():
             ba = BusinessArea(name=row['ba_code']) if row['ba_code'] != "TVM" else tvm_ba
@@ -60,12 +63,7 @@ def seed_production_database():
             db.add(admin_team)
             db.flush()
 
-            coordinator_employee = Employee(name=row['ba_coordinator_name'], employee_code=str(row['ba_coordinator_hr_no']), role='ba_coordinator', team_id=admin_team.id)
-            db.add(coordinator_employee)
-            db.flush()
-
-            coordinator_user = User(username=str(row['ba_coordinator_hr_no']), password_hash=get_password_hash("BSNL@2025"), role='ba_coordinator', employee_id=coordinator_employee.id, force_password_reset=True)
-            db.add(coordinator_user)
+            accounts.append(NewAccount(name=row['ba_coordinator_name'], employee_code=str(row['ba_coordinator_hr_no']), role='ba_coordinator', team_id=admin_team.id))
 
             targets_to_create = [
                 BATarget(campaign_id=campaign.id, ba_id=ba.id, activity_type_id=activity_types["SIM Sales"].id, target_value=row['new_sim_target']),
@@ -78,14 +76,13 @@ def seed_production_database():
             print(f"  -> Processed BA: {row['ba_code']}")
         
         # Create the global admin user
+        db.flush()
         alp_admin_team = db.query(Team).filter(Team.team_code == "ALP_00").first()
         if alp_admin_team:
-            admin_employee = Employee(name="Admin", employee_code="admin", role="admin", team_id=alp_admin_team.id)
-            db.add(admin_employee)
-            db.flush()
-            admin_user = User(username="admin", password_hash=get_password_hash("pwd"), role="admin", employee_id=admin_employee.id, force_password_reset=False)
-            db.add(admin_user)
-            print("✅ Global Admin user created.")
+            accounts.append(NewAccount(name="Admin", employee_code="admin", role="admin", team_id=alp_admin_team.id, password="pwd", force_password_reset=False))
+
+        create_accounts(db, accounts)
+        print(f"✅ Created {len(accounts)} coordinator/admin users.")
 
         db.commit()
         print("--- PRODUCTION DATABASE SEED COMPLETE ---")
@@ -110,32 +107,34 @@ def seed_demo_users():
         user_df = pd.read_excel("backend/test_users.xlsx")
         print(f"--- Found test_users.xlsx. Seeding {len(user_df)} demo users... ---")
         
+        teams = {t.team_code: t.id for t in db.query(Team.team_code, Team.id).all()}
+        existing = {u for (u,) in db.query(User.username).all()} | {c for (c,) in db.query(Employee.employee_code).all()}
+
+        accounts = []
         for index, row in user_df.iterrows():
-            team = db.query(Team).filter(Team.team_code == row['team_code']).first()
-            if not team:
+            team_id = teams.get(row['team_code'])
+            if not team_id:
                 print(f"⚠️ Warning: Team '{row['team_code']}' not found for user '{row['name']}'. Skipping.")
                 continue
 
             # Check if user already exists
-            existing_user = db.query(User).filter(User.username == str(row['hr_number'])).first()
-            if existing_user:
+            if str(row['hr_number']) in existing:
                 print(f"  -> User '{row['hr_number']}' already exists. Skipping.")
                 continue
+            existing.add(str(row['hr_number']))
 
-            employee = Employee(name=row['name'], employee_code=str(row['hr_number']), role=row['role'], team_id=team.id)
-            db.add(employee)
-            db.flush()
-
-            user = User(
-                username=str(row['hr_number']),
-                password_hash=get_password_hash(row['password']),
+            accounts.append(NewAccount(
+                name=row['name'],
+                employee_code=str(row['hr_number']),
                 role=row['role'],
-                employee_id=employee.id,
+                team_id=team_id,
+                password=str(row['password']),
                 force_password_reset=False  # Disable forced reset for demos
-            )
-            db.add(user)
-            print(f"  -> Created demo user: {user.username} (Role: {user.role})")
+            ))
+            print(f"  -> Creating demo user: {row['hr_number']} (Role: {row['role']})")
 
+        # Distinct passwords are hashed once each, in parallel.
+        create_accounts(db, accounts)
         db.commit()
         print("--- DEMO USER SEEDING COMPLETE ---")
     
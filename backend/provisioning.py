@@ -0,0 +1,241 @@
+# ==============================================================================
+# File: backend/provisioning.py
+# Description: Bulk creation of Employee + User accounts and the background
+# job runner used by roster uploads.
+# - bcrypt runs once per *distinct* password, not once per account. Distinct
+#   passwords are hashed in a process pool; the default onboarding password
+#   is hashed once per process and reused.
+# - Employees and users are inserted with one multi-row INSERT per batch.
+# - Uploads hand their write phase to `start_job` and return a job id at once;
+#   the client polls the job for progress. Job state is saved to the
+#   provisioning_jobs table when it is queued, starts and finishes, so a poll
+#   answered by another API worker still finds it. Live `processed` counts are
+#   only seen by the worker running the job; the others see them at the end.
+# ==============================================================================
+import os
+import uuid
+import time
+import threading
+import traceback
+import multiprocessing
+from dataclasses import dataclass, field, asdict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+
+from .auth import get_password_hash
+from .cache import TTLCache
+from .database import SessionLocal
+from .models import Employee, User, ProvisioningJobRecord
+
+DEFAULT_PASSWORD = "BSNL@2025"
+
+PROVISIONING_HASH_WORKERS = int(os.getenv("PROVISIONING_HASH_WORKERS", str(os.cpu_count() or 1)))
+PROVISIONING_BATCH_SIZE = int(os.getenv("PROVISIONING_BATCH_SIZE", "500"))
+PROVISIONING_JOB_TTL_SECONDS = int(os.getenv("PROVISIONING_JOB_TTL_SECONDS", "3600"))
+
+
+@dataclass
+class NewAccount:
+    name: Optional[str]
+    employee_code: str
+    role: str
+    team_id: int
+    password: str = DEFAULT_PASSWORD
+    force_password_reset: bool = True
+
+
+# --- Password hashing ---
+
+@lru_cache(maxsize=1)
+def default_password_hash() -> str:
+    """The onboarding password hash, computed once per process."""
+    return get_password_hash(DEFAULT_PASSWORD)
+
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        # spawn, not fork: the API process has live threads (scheduler, thread pools).
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=max(1, PROVISIONING_HASH_WORKERS),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _hash_pool
+
+
+def hash_passwords(passwords: Iterable[str]) -> Dict[str, str]:
+    """Hashes each distinct password once and returns a {password: hash} map."""
+    distinct = {str(p) for p in passwords}
+    hashes = {}
+    if DEFAULT_PASSWORD in distinct:
+        distinct.discard(DEFAULT_PASSWORD)
+        hashes[DEFAULT_PASSWORD] = default_password_hash()
+
+    pending = sorted(distinct)
+    if len(pending) > 1 and PROVISIONING_HASH_WORKERS > 1:
+        hashes.update(zip(pending, _get_hash_pool().map(get_password_hash, pending)))
+    else:
+        hashes.update((p, get_password_hash(p)) for p in pending)
+    return hashes
+
+
+# --- Bulk account creation ---
+
+def create_accounts(
+    db: Session,
+    accounts: List[NewAccount],
+    progress: Optional[Callable[[int], None]] = None,
+    batch_size: int = PROVISIONING_BATCH_SIZE
+) -> List[int]:
+    """
+    Inserts an Employee and a User (username = employee code) for every
+    account and returns the new employee ids in input order. The caller is
+    responsible for checking that the codes are free and for committing.
+    `progress` is called with the number of accounts written so far.
+    """
+    if not accounts:
+        return []
+    hashes = hash_passwords(a.password for a in accounts)
+
+    employee_ids: List[int] = []
+    for start in range(0, len(accounts), batch_size):
+        batch = accounts[start:start + batch_size]
+        ids = db.scalars(
+            insert(Employee).returning(Employee.id, sort_by_parameter_order=True),
+            [{"name": a.name, "employee_code": a.employee_code, "role": a.role, "team_id": a.team_id} for a in batch]
+        ).all()
+        db.execute(insert(User), [
+            {
+                "username": a.employee_code,
+                "password_hash": hashes[str(a.password)],
+                "role": a.role,
+                "employee_id": employee_id,
+                "is_active": True,
+                "force_password_reset": a.force_password_reset,
+            }
+            for a, employee_id in zip(batch, ids)
+        ])
+        employee_ids.extend(ids)
+        if progress:
+            progress(len(employee_ids))
+    return employee_ids
+
+
+# --- Background jobs ---
+
+@dataclass
+class ProvisioningJob:
+    id: str
+    kind: str
+    owner: str
+    status: str = "queued" # queued | running | succeeded | failed
+    total: int = 0
+    processed: int = 0
+    message: Optional[str] = None
+    error: Optional[str] = None
+    result: Dict = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# Jobs started by this process, for live progress. Everything else is read from the table.
+jobs = TTLCache("provisioning_jobs", ttl=PROVISIONING_JOB_TTL_SECONDS, max_entries=1000)
+
+# A single runner serialises bulk writes so two uploads never race on the same rows.
+_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="provisioning")
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def _save(job: ProvisioningJob, prune: bool = False):
+    """Writes the job's current state in its own transaction. Failures are logged, not raised."""
+    db = SessionLocal()
+    try:
+        if prune:
+            db.query(ProvisioningJobRecord).filter(
+                ProvisioningJobRecord.created_at < time.time() - PROVISIONING_JOB_TTL_SECONDS
+            ).delete(synchronize_session=False)
+        db.merge(ProvisioningJobRecord(**job.to_dict()))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"--- Could not save provisioning job {job.id}: {e} ---")
+    finally:
+        db.close()
+
+
+def _run(job: ProvisioningJob, work: Callable[[Session, ProvisioningJob], Optional[str]]):
+    global _pending
+    job.status = "running"
+    _save(job)
+    db = SessionLocal()
+    try:
+        job.message = work(db, job)
+        job.status = "succeeded"
+    except Exception as e:
+        db.rollback()
+        job.status = "failed"
+        # Only HTTPException.detail is a message; SQLAlchemy errors have a 'detail' list too.
+        job.error = e.detail if isinstance(e, HTTPException) else str(e)
+        print(f"--- Provisioning job {job.id} ({job.kind}) failed: {job.error} ---")
+        if not isinstance(e, HTTPException):
+            traceback.print_exc()
+    finally:
+        db.close()
+        job.finished_at = time.time()
+        _save(job)
+        with _pending_lock:
+            _pending -= 1
+
+
+def pending() -> int:
+    """Jobs queued or running."""
+    return _pending
+
+
+def start_job(kind: str, owner: str, total: int, work: Callable[[Session, ProvisioningJob], Optional[str]]) -> ProvisioningJob:
+    """
+    Queues `work(db, job)` on the background runner with its own session.
+    `work` commits its own transaction, may update `job.processed` and
+    `job.result`, and returns the completion message.
+    """
+    global _pending
+    job = ProvisioningJob(id=uuid.uuid4().hex, kind=kind, owner=owner, total=total)
+    jobs.set(job.id, job)
+    _save(job, prune=True)
+    with _pending_lock:
+        _pending += 1
+    _runner.submit(_run, job, work)
+    return job
+
+
+def get_job(job_id: str) -> Optional[ProvisioningJob]:
+    """The job as this process sees it, else as last saved by whichever worker runs it."""
+    job = jobs.get(job_id)
+    if job is not None:
+        return job
+    db = SessionLocal()
+    try:
+        record = db.get(ProvisioningJobRecord, job_id)
+        if record is None or record.created_at < time.time() - PROVISIONING_JOB_TTL_SECONDS:
+            return None
+        return ProvisioningJob(**{name: getattr(record, name) for name in ProvisioningJob.__dataclass_fields__})
+    finally:
+        db.close()
+
+
+def shutdown():
+    _runner.shutdown(wait=False)
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False)
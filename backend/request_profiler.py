@@ -0,0 +1,201 @@
+# ==============================================================================
+# File: backend/request_profiler.py
+# Description: On-demand profiling of a single request, for admins. Send
+# "X-Profile: 1" with an admin token and the request is sampled while it
+# runs; the response carries X-Profile-Id and the report is kept for an hour
+# at GET /api/admin/profiles/{id}.
+# - A sampling profiler: a background thread reads the stacks of the event
+#   loop thread and the busy threadpool workers every
+#   PROFILE_SAMPLE_INTERVAL_MS. The sampler takes the GIL on every tick, so a
+#   profiled request runs somewhat slower than usual.
+# - Other requests running at the same time show up in the report too, since
+#   they share those threads. Profile on a quiet worker for a clean picture.
+# - Reports use the folded-stack format ("outer;inner;leaf count" per line)
+#   read by speedscope, flamegraph.pl and inferno.
+# - The middleware is plain ASGI. Without the header a request costs one scan
+#   of its headers and goes straight to the app.
+# ==============================================================================
+import os
+import sys
+import time
+import uuid
+import queue
+import asyncio.events
+import threading
+from collections import Counter
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .auth import principal_from_token
+from .cache import TTLCache
+from .database import SessionLocal
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "120"))
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Threads that run request code: the event loop, and anyio's threadpool for sync handlers and dependencies.
+_WORKER_THREAD_NAME = "AnyIO worker thread"
+_WORKER_RUN_FILE = os.path.join("anyio", "_backends", "_asyncio.py")
+_LOOP_CALLBACK_CODE = asyncio.events.Handle._run.__code__
+_WORKER_IDLE_CODE = queue.Queue.get.__code__
+
+profiles = TTLCache("request_profiles", ttl=60 * 60, max_entries=50)
+
+
+@dataclass
+class RequestProfile:
+    id: str
+    username: str
+    method: str
+    path: str
+    route: Optional[str]
+    status: int
+    started_at: str
+    duration_ms: float
+    interval_ms: float
+    samples: int
+    folded: str
+
+    def summary(self) -> dict:
+        summary = asdict(self)
+        del summary["folded"]
+        return summary
+
+
+class _Sampler:
+    """Samples the event loop thread and the busy threadpool workers while one request runs."""
+    def __init__(self, interval_ms: float, loop_thread: int):
+        self.interval = interval_ms / 1000
+        self.loop_thread = loop_thread
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _run(self):
+        deadline = time.monotonic() + PROFILE_MAX_SECONDS
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            threads = {self.loop_thread} | {t.ident for t in threading.enumerate() if t.name == _WORKER_THREAD_NAME}
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                stack = _fold(frame) if frame is not None else None
+                if stack is not None:
+                    self.stacks[stack] += 1
+                    self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_PROJECT_ROOT):
+        filename = os.path.relpath(filename, _PROJECT_ROOT)
+    elif "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    # ';' separates frames and the last space precedes the count in the folded format.
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _is_task_entry(code) -> bool:
+    """The frame a unit of request work starts under: a loop callback, or a threadpool worker's run loop."""
+    return code is _LOOP_CALLBACK_CODE or (code.co_qualname == "WorkerThread.run" and code.co_filename.endswith(_WORKER_RUN_FILE))
+
+
+def _fold(frame) -> Optional[str]:
+    """
+    The stack above the loop callback or worker run loop, outermost first, or
+    None when the thread is idle (waiting in select, or a worker waiting for work).
+    """
+    labels, outermost = [], None
+    while frame is not None and not _is_task_entry(frame.f_code):
+        labels.append(_label(frame))
+        outermost, frame = frame, frame.f_back
+    if frame is None or outermost is None or outermost.f_code is _WORKER_IDLE_CODE:
+        return None
+    return ";".join(reversed(labels))
+
+
+def _admin_username(token: str) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        principal = principal_from_token(db, token)
+    finally:
+        db.close()
+    if principal is None or principal.role != "admin" or not principal.is_active:
+        return None
+    return principal.username
+
+
+class RequestProfilerMiddleware:
+    """Profiles requests that carry X-Profile from an admin; every other request passes straight through."""
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        scheme, _, token = Headers(scope=scope).get("Authorization", "").partition(" ")
+        username = await run_in_threadpool(_admin_username, token) if scheme.lower() == "bearer" and token else None
+        if username is None:
+            # Only admins may profile; for everyone else the header is ignored.
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = 500
+
+        async def send_with_profile_id(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        sampler = _Sampler(PROFILE_SAMPLE_INTERVAL_MS, threading.get_ident())
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            route = scope.get("route")
+            profile = RequestProfile(
+                id=profile_id,
+                username=username,
+                method=scope["method"],
+                path=scope["path"],
+                route=getattr(route, "path", None),
+                status=status_code,
+                started_at=started_at.isoformat(),
+                duration_ms=round((time.perf_counter() - started) * 1000, 2),
+                interval_ms=PROFILE_SAMPLE_INTERVAL_MS,
+                samples=sampler.samples,
+                folded=sampler.folded(),
+            )
+            profiles.set(profile.id, profile)
+            print(f"--- Profiled {profile.method} {profile.path} for {username}: {profile.samples} samples in {profile.duration_ms} ms (id {profile.id}) ---")
+
+
+def recent_profiles() -> list:
+    """Summaries of the stored profiles, newest first."""
+    return [p.summary() for p in sorted(profiles.values(), key=lambda p: p.started_at, reverse=True)]
@@ -6,16 +6,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from datetime import date, datetime, timezone, timedelta
 from pydantic import BaseModel
 
 from ..database import get_db
-from ..models import User, Activity, ActivityType, Score, Team
+from ..models import Activity, ActivityType, ActivityTombstone, Score
 from ..schemas import Activity as ActivitySchema, ActivityCreate, ActivityTypeInfo
-from ..auth import get_current_active_user, require_role
+from ..auth import get_current_active_principal, require_role, Principal
 from .. import models 
 from ..scoring_engine import update_score_for_employee, recalculate_all_scores
+from ..dedup import mobile_dedup, normalize_mobile, mobile_candidates
+from ..geo import encode_geohash
+from ..hierarchy import apply_scope, ba_team_ids
 
 router = APIRouter()
 
@@ -23,74 +27,225 @@ class ActivitySubmissionResponse(BaseModel):
     activity: ActivitySchema
     new_total_score: int
 
-@router.post("/", response_model=ActivitySubmissionResponse, status_code=status.HTTP_201_CREATED)
-def submit_activity(
-    activity: ActivityCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    if not current_user.employee: 
-        raise HTTPException(status_code=400, detail="Authenticated user is not linked to an employee record.")
+def find_open_lead(db: Session, campaign_id: int, employee_id: int, house_visit_type_id: int, customer_mobile: str) -> Optional[Activity]:
+    """
+    Returns the unconverted House Visit lead for this customer, if any.
+    (campaign_id, activity_type_id, customer_mobile) is the unique key
+    'uq_campaign_activity_customer', so this is a point lookup on its index
+    however many House Visits exist. See backend/benchmarks/open_lead_lookup.py.
+    Leads stored before mobiles were normalised are matched as entered.
+    """
+    return db.query(Activity).filter(
+        Activity.campaign_id == campaign_id,
+        Activity.activity_type_id == house_visit_type_id,
+        Activity.customer_mobile.in_(mobile_candidates(customer_mobile)),
+        Activity.employee_id == employee_id,
+        Activity.is_lead == True,
+        Activity.is_converted == False
+    ).first()
+
+
+def _raise_if_duplicate(db: Session, campaign_id: int, activity_type_id: int, customer_mobile: str):
+    existing_activity = db.query(Activity).options(joinedload(Activity.employee)).filter(
+        Activity.campaign_id == campaign_id,
+        Activity.activity_type_id == activity_type_id,
+        Activity.customer_mobile.in_(mobile_candidates(customer_mobile))
+    ).first()
+    if existing_activity:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"This entry already exists (Logged by {existing_activity.employee.name} on {existing_activity.logged_at.date()})."
+        )
+
 
+def _create_activity(db: Session, activity: ActivityCreate, current_user: Principal) -> Activity:
+    """
+    Validates and stages a new activity for the current user, converting any
+    matching open lead. The caller is responsible for committing.
+    """
     activity_type = db.query(ActivityType).filter(ActivityType.id == activity.activity_type_id).first()
     if not activity_type:
         raise HTTPException(status_code=404, detail="Activity type not found.")
 
-    if activity_type.name != "House Visit":
-        existing_activity = db.query(Activity).filter(
-            Activity.campaign_id == activity.campaign_id,
-            Activity.activity_type_id == activity.activity_type_id,
-            Activity.customer_mobile == activity.customer_mobile
-        ).first()
-        if existing_activity:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"This entry already exists (Logged by {existing_activity.employee.name} on {existing_activity.logged_at.date()})."
-            )
+    customer_mobile = normalize_mobile(activity.customer_mobile)
+
+    # The Bloom filter answers "definitely new" for most numbers, so the
+    # duplicate SELECT only runs when the number may already exist. The lookups
+    # get the mobile as entered, so rows not yet backfilled are matched too.
+    if activity_type.name != "House Visit" and mobile_dedup.might_exist(db, activity.campaign_id, activity.activity_type_id, customer_mobile):
+        _raise_if_duplicate(db, activity.campaign_id, activity.activity_type_id, activity.customer_mobile)
 
     if activity_type.name == "FTTH Connection":
         house_visit_type = db.query(ActivityType).filter(ActivityType.name == "House Visit").first()
         if house_visit_type:
-            matching_lead = db.query(Activity).filter(
-                Activity.campaign_id == activity.campaign_id,
-                Activity.employee_id == current_user.employee_id,
-                Activity.activity_type_id == house_visit_type.id,
-                Activity.customer_mobile == activity.customer_mobile,
-                Activity.is_lead == True,
-                Activity.is_converted == False
-            ).order_by(Activity.logged_at.desc()).first()
-            
+            matching_lead = find_open_lead(db, activity.campaign_id, current_user.employee_id, house_visit_type.id, activity.customer_mobile)
+
             if matching_lead:
                 matching_lead.is_converted = True
                 print(f"Marking lead ID {matching_lead.id} as converted.")
     
     db_activity = Activity(
-        **activity.model_dump(), 
+        **activity.model_dump(exclude={"customer_mobile"}), 
+        customer_mobile=customer_mobile,
+        geohash=encode_geohash(activity.latitude, activity.longitude),
         employee_id=current_user.employee_id, 
-        team_id=current_user.employee.team_id, 
+        team_id=current_user.team_id, 
         logged_at=datetime.now(timezone.utc)
     )
     db.add(db_activity)
+    try:
+        db.flush()
+    except IntegrityError:
+        # The unique constraint is the source of truth; the filter can be stale.
+        db.rollback()
+        _raise_if_duplicate(db, activity.campaign_id, activity.activity_type_id, activity.customer_mobile)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This entry already exists.")
+    mobile_dedup.add(db, activity.campaign_id, activity.activity_type_id, customer_mobile)
+    return db_activity
+
+
+def _get_employee_total_score(db: Session, employee_id: int, campaign_id: int) -> int:
+    total = db.query(func.sum(Score.points)).filter(
+        Score.campaign_id == campaign_id,
+        Score.entity_id == employee_id,
+        Score.entity_type == 'employee'
+    ).scalar()
+    return int(total) if total else 0
+
+
+@router.post("/", response_model=ActivitySubmissionResponse, status_code=status.HTTP_201_CREATED)
+def submit_activity(
+    activity: ActivityCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    if not current_user.employee_id: 
+        raise HTTPException(status_code=400, detail="Authenticated user is not linked to an employee record.")
+
+    db_activity = _create_activity(db, activity, current_user)
     db.commit()
     db.refresh(db_activity)
 
     update_score_for_employee(db, employee_id=current_user.employee_id, campaign_id=activity.campaign_id)
-    background_tasks.add_task(recalculate_all_scores, db, campaign_id=activity.campaign_id)
-    
-    new_score_query = db.query(func.sum(Score.points)).filter(
-        Score.campaign_id == activity.campaign_id,
-        Score.entity_id == current_user.employee_id,
-        Score.entity_type == 'employee'
-    ).scalar()
+    background_tasks.add_task(recalculate_all_scores, db, campaign_id=activity.campaign_id, trigger="activity")
     
-    new_total_score = int(new_score_query) if new_score_query else 0
+    new_total_score = _get_employee_total_score(db, current_user.employee_id, activity.campaign_id)
 
     return ActivitySubmissionResponse(activity=db_activity, new_total_score=new_total_score)
 
 
+# --- OFFLINE DELTA SYNC ---
+# Clients send back the watermark from their previous sync. Rows changed in a
+# short window before it are re-sent so that writes committed while the last
+# sync was running are never missed; clients upsert by id, so repeats are harmless.
+SYNC_WATERMARK_OVERLAP = timedelta(seconds=5)
+
+class SyncActivity(ActivityCreate):
+    client_id: str
+
+class SyncRequest(BaseModel):
+    campaign_id: int
+    watermark: Optional[datetime] = None
+    activities: List[SyncActivity] = []
+
+class SyncItemResult(BaseModel):
+    client_id: str
+    status: str # 'created', 'duplicate' or 'rejected'
+    activity_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class SyncResponse(BaseModel):
+    watermark: datetime
+    results: List[SyncItemResult]
+    changed: List[ActivitySchema]
+    deleted: List[int]
+    new_total_score: int
+
+@router.post("/sync", response_model=SyncResponse, summary="Upload queued activities and fetch changes since a watermark")
+def sync_activities(
+    sync_request: SyncRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    """
+    Single round trip for offline-first devices:
+    1. Applies the locally queued activities. Each entry is committed on its own,
+       so one rejected entry does not block the rest. Entries whose client_id is
+       already known are reported as duplicates, which makes retries safe.
+    2. Returns every activity visible to the user that changed since the
+       watermark, plus the ids of activities deleted since then.
+    3. Returns the user's refreshed score total and the next watermark.
+    """
+    if not current_user.employee_id:
+        raise HTTPException(status_code=400, detail="Authenticated user is not linked to an employee record.")
+
+    sync_started_at = datetime.now(timezone.utc)
+    results = []
+    touched_campaigns = set()
+
+    for queued in sync_request.activities:
+        known = db.query(Activity.id).filter(
+            Activity.employee_id == current_user.employee_id,
+            Activity.client_id == queued.client_id
+        ).first()
+        if known:
+            results.append(SyncItemResult(client_id=queued.client_id, status="duplicate", activity_id=known[0]))
+            continue
+        try:
+            db_activity = _create_activity(db, queued, current_user)
+            db.commit()
+        except HTTPException as exc:
+            db.rollback()
+            results.append(SyncItemResult(client_id=queued.client_id, status="rejected", detail=exc.detail))
+            continue
+        except IntegrityError:
+            db.rollback()
+            results.append(SyncItemResult(client_id=queued.client_id, status="rejected", detail="This entry already exists."))
+            continue
+        results.append(SyncItemResult(client_id=queued.client_id, status="created", activity_id=db_activity.id))
+        touched_campaigns.add(queued.campaign_id)
+
+    for campaign_id in touched_campaigns:
+        update_score_for_employee(db, employee_id=current_user.employee_id, campaign_id=campaign_id)
+        background_tasks.add_task(recalculate_all_scores, db, campaign_id=campaign_id, trigger="activity")
+
+    changed_query = db.query(Activity).options(
+        joinedload(Activity.employee),
+        joinedload(Activity.team),
+        joinedload(Activity.activity_type)
+    ).filter(Activity.campaign_id == sync_request.campaign_id)
+    changed_query = apply_scope(changed_query, current_user, Activity.team_id, Activity.employee_id)
+
+    deleted = []
+    if sync_request.watermark:
+        since = sync_request.watermark
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        else:
+            since = since.astimezone(timezone.utc)
+        since = since - SYNC_WATERMARK_OVERLAP
+        changed_query = changed_query.filter(Activity.updated_at > since)
+
+        tombstone_query = db.query(ActivityTombstone.activity_id).filter(
+            ActivityTombstone.campaign_id == sync_request.campaign_id,
+            ActivityTombstone.deleted_at > since
+        )
+        tombstone_query = apply_scope(tombstone_query, current_user, ActivityTombstone.team_id, ActivityTombstone.employee_id)
+        deleted = [t[0] for t in tombstone_query.all()]
+
+    return SyncResponse(
+        watermark=sync_started_at,
+        results=results,
+        changed=changed_query.order_by(Activity.updated_at).all(),
+        deleted=deleted,
+        new_total_score=_get_employee_total_score(db, current_user.employee_id, sync_request.campaign_id)
+    )
+
+
 @router.get("/my-logs", response_model=List[ActivitySchema], summary="Get activity logs based on user role")
-def get_my_logs(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+def get_my_logs(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_active_principal)):
     """
     Fetches activity logs based on the hierarchy:
     - Admin: All logs.
@@ -104,34 +259,16 @@ def get_my_logs(db: Session = Depends(get_db), current_user: User = Depends(get_
         joinedload(Activity.activity_type)
     )
 
-    if not current_user.employee:
+    if not current_user.employee_id:
         raise HTTPException(status_code=403, detail="User has no employee record.")
 
-    # --- THIS IS THE FIX ---
-    if current_user.role == "admin":
-        # Admin sees everything, no filter needed.
-        pass
-    elif current_user.role == "ba_coordinator":
-        # BA Coordinator sees everything in their BA.
-        ba_id = current_user.employee.team.ba_id
-        teams_in_ba = db.query(Team.id).filter(Team.ba_id == ba_id).all()
-        team_ids_in_ba = [t[0] for t in teams_in_ba]
-        query = query.filter(Activity.team_id.in_(team_ids_in_ba))
-    elif current_user.role in ["team_leader", "team_coordinator"]:
-        # Team Leader/Coordinator sees everything in their own team.
-        if not current_user.employee.team_id:
-             raise HTTPException(status_code=403, detail="User is not assigned to a team.")
-        query = query.filter(Activity.team_id == current_user.employee.team_id)
-    else: # 'employee' role
-        # Regular employee sees only their own logs.
-        query = query.filter(Activity.employee_id == current_user.employee_id)
-    # --- END OF FIX ---
+    query = apply_scope(query, current_user, Activity.team_id, Activity.employee_id)
 
     return query.order_by(Activity.logged_at.desc()).all()
 
 
 @router.get("/types", response_model=List[ActivityTypeInfo], summary="Get filtered activity types for data entry")
-def get_activity_types(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+def get_activity_types(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_active_principal)):
     customer_interaction_types = [
         "MNP",
         "SIM Sales",
@@ -145,7 +282,7 @@ def get_activity_types(db: Session = Depends(get_db), current_user: User = Depen
 @router.get("/monitor", response_model=List[ActivitySchema], summary="Get and filter all activities")
 def get_all_activities(
     db: Session = Depends(get_db), 
-    current_user: User = Depends(require_role("ba_coordinator")), 
+    current_user: Principal = Depends(require_role("ba_coordinator")), 
     start_date: Optional[date] = None, 
     end_date: Optional[date] = None, 
     team_id: Optional[int] = None, 
@@ -158,13 +295,10 @@ def get_all_activities(
     )
     
     if current_user.role == 'ba_coordinator':
-        if not current_user.employee or not current_user.employee.team:
+        if not current_user.ba_id:
             raise HTTPException(status_code=403, detail="User is not associated with a BA.")
         
-        ba_id = current_user.employee.team.ba_id
-        teams_in_ba = db.query(Team.id).filter(Team.ba_id == ba_id).all()
-        team_ids_in_ba = [t[0] for t in teams_in_ba]
-        query = query.filter(Activity.team_id.in_(team_ids_in_ba))
+        query = query.filter(Activity.team_id.in_(ba_team_ids(current_user.ba_id)))
 
     if start_date: query = query.filter(Activity.logged_at >= start_date)
     if end_date: 
@@ -178,7 +312,7 @@ def get_all_activities(
 @router.get("/types/all", response_model=List[ActivityTypeInfo], summary="Get all activity types (for admin/management)")
 def get_all_activity_types(
     db: Session = Depends(get_db), 
-    current_user: User = Depends(require_role("ba_coordinator"))
+    current_user: Principal = Depends(require_role("ba_coordinator"))
 ):
     return db.query(ActivityType).order_by(ActivityType.name).all()
 
@@ -188,33 +322,40 @@ def delete_activity(
     activity_id: int,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     activity_to_delete = db.query(Activity).options(joinedload(Activity.team)).filter(Activity.id == activity_id).first()
 
     if not activity_to_delete:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Activity not found.")
 
-    user_employee = current_user.employee
-    if not user_employee:
+    if not current_user.employee_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User has no employee record.")
 
     is_admin = current_user.role == 'admin'
-    is_owner = activity_to_delete.employee_id == user_employee.id
+    is_owner = activity_to_delete.employee_id == current_user.employee_id
     is_ba_coordinator_of_activity = (
         current_user.role == 'ba_coordinator' and
         activity_to_delete.team and
-        activity_to_delete.team.ba_id == user_employee.team.ba_id
+        activity_to_delete.team.ba_id == current_user.ba_id
     )
 
     if not (is_admin or is_owner or is_ba_coordinator_of_activity):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to delete this entry.")
 
     campaign_id = activity_to_delete.campaign_id
+    dedup_key = (campaign_id, activity_to_delete.activity_type_id, activity_to_delete.customer_mobile)
 
+    db.add(ActivityTombstone(
+        activity_id=activity_to_delete.id,
+        campaign_id=campaign_id,
+        team_id=activity_to_delete.team_id,
+        employee_id=activity_to_delete.employee_id
+    ))
     db.delete(activity_to_delete)
     db.commit()
+    mobile_dedup.discard(*dedup_key)
 
-    background_tasks.add_task(recalculate_all_scores, db, campaign_id=campaign_id)
+    background_tasks.add_task(recalculate_all_scores, db, campaign_id=campaign_id, trigger="activity")
 
     return None
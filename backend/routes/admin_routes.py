@@ -1,28 +1,132 @@
 # ==============================================================================
 # File: backend/routes/admin_routes.py (NEW FILE)
 # ==============================================================================
-from fastapi import APIRouter, Depends, HTTPException, status
+import os
+import io
+import pstats
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, PlainTextResponse
 from sqlalchemy.orm import Session
 from ..database import get_db
-from .. import models, auth
+from .. import models, schemas, auth
 from ..scoring_engine import recalculate_all_scores
+from ..password_verifier import password_verifier
+from ..slow_queries import slow_query_log
+from .. import request_profiler
 
 router = APIRouter()
 
 @router.post("/recalculate-scores/{campaign_id}", status_code=status.HTTP_200_OK)
 def trigger_score_recalculation(
     campaign_id: int,
+    profile: bool = Query(False, description="Run under cProfile and keep the dump for download."),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_role("admin"))
+    current_user: auth.Principal = Depends(auth.require_role("admin"))
 ):
     """
     An admin-only endpoint to manually trigger the full score recalculation
-    for a given campaign.
+    for a given campaign. Returns the run report with per-phase timings.
     """
     try:
-        recalculate_all_scores(db, campaign_id)
-        return {"message": f"Successfully recalculated scores for campaign {campaign_id}."}
+        run = recalculate_all_scores(db, campaign_id, trigger="admin", profile=profile)
+        return {"message": f"Successfully recalculated scores for campaign {campaign_id}.", "run": schemas.ScoringRun.model_validate(run)}
     except Exception as e:
         # In a real app, you would log the full exception
         print(f"Error during recalculation: {e}")
-        raise HTTPException(status_code=500, detail=f"An error occurred during recalculation.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"An error occurred during recalculation.")
+
+@router.get("/login-metrics", summary="Get login verification pool metrics")
+def get_login_metrics(current_user: auth.Principal = Depends(auth.require_role("admin"))):
+    """
+    Reports the bcrypt login pool: size, logins waiting, totals, rejections
+    (503s) and the latency distribution including queueing time.
+    """
+    return password_verifier.snapshot()
+
+
+@router.get("/scoring-runs", response_model=List[schemas.ScoringRun], summary="List recent score recalculations")
+def list_scoring_runs(
+    campaign_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.require_role("admin"))
+):
+    """Newest first, with the duration and row count of every phase."""
+    query = db.query(models.ScoringRun)
+    if campaign_id is not None:
+        query = query.filter(models.ScoringRun.campaign_id == campaign_id)
+    return query.order_by(models.ScoringRun.id.desc()).limit(limit).all()
+
+
+def _get_scoring_run(db: Session, run_id: int) -> models.ScoringRun:
+    run = db.get(models.ScoringRun, run_id)
+    if not run:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scoring run not found")
+    return run
+
+
+@router.get("/scoring-runs/{run_id}", response_model=schemas.ScoringRun, summary="Get one score recalculation")
+def get_scoring_run(run_id: int, db: Session = Depends(get_db), current_user: auth.Principal = Depends(auth.require_role("admin"))):
+    return _get_scoring_run(db, run_id)
+
+
+@router.get("/scoring-runs/{run_id}/profile", summary="Download or summarise the cProfile dump of a profiled run")
+def get_scoring_run_profile(
+    run_id: int,
+    top: Optional[int] = Query(None, ge=1, le=500, description="Return the top N functions by cumulative time as text instead of the raw dump."),
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.require_role("admin"))
+):
+    """
+    Without `top`, returns the raw pstats dump (open with snakeviz or
+    `python -m pstats`). With `top`, returns a plain-text summary.
+    """
+    run = _get_scoring_run(db, run_id)
+    if not run.profile_path or not os.path.exists(run.profile_path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="This run was not profiled, or its profile has been pruned.")
+    if top is None:
+        return FileResponse(run.profile_path, media_type="application/octet-stream", filename=os.path.basename(run.profile_path))
+    output = io.StringIO()
+    pstats.Stats(run.profile_path, stream=output).sort_stats("cumulative").print_stats(top)
+    return PlainTextResponse(output.getvalue())
+
+
+@router.get("/slow-queries", summary="Get the most recent slow SQL statements")
+def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: auth.Principal = Depends(auth.require_role("admin"))
+):
+    """
+    Statements slower than SLOW_QUERY_MS in this worker, newest first, with
+    the route that issued them, their parameter types and the query plan.
+    The log is off unless SLOW_QUERY_MS is set.
+    """
+    return {
+        "enabled": slow_query_log.enabled,
+        "threshold_ms": slow_query_log.threshold_ms,
+        "entries": slow_query_log.entries(limit),
+    }
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT, summary="Clear the slow query log")
+def clear_slow_queries(current_user: auth.Principal = Depends(auth.require_role("admin"))):
+    slow_query_log.clear()
+
+
+@router.get("/profiles", summary="List the stored request profiles")
+def list_request_profiles(current_user: auth.Principal = Depends(auth.require_role("admin"))):
+    """
+    Requests profiled in this worker in the last hour, newest first. Send
+    "X-Profile: 1" with an admin token on any request to profile it.
+    """
+    return request_profiler.recent_profiles()
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse, summary="Download a request profile")
+def get_request_profile(profile_id: str, current_user: auth.Principal = Depends(auth.require_role("admin"))):
+    """The sampled stacks in the folded format, ready for speedscope or flamegraph.pl."""
+    profile = request_profiler.profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found or expired")
+    return PlainTextResponse(profile.folded, headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.folded"'})
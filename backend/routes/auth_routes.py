@@ -3,22 +3,88 @@
 # ==============================================================================
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from ..database import get_db
-from ..models import User
-from ..schemas import Token
-from ..auth import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from ..models import User, RefreshToken
+from ..schemas import Token, RefreshRequest
+from ..auth import create_access_token, issue_refresh_token, revoke_refresh_tokens, hash_refresh_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from ..password_verifier import password_verifier
 
 router = APIRouter()
 
+def _access_token_for(user) -> str:
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    return create_access_token(data={"sub": user.username, "role": user.role}, expires_delta=access_token_expires)
+
+def _issue_and_commit(db: Session, user_id: int) -> str:
+    refresh_token = issue_refresh_token(db, user_id)
+    db.commit()
+    return refresh_token
+
+def _login_row(db: Session, username: str):
+    """The columns a login needs. The transaction is ended so the pooled connection is not held during bcrypt."""
+    try:
+        return db.query(User.id, User.username, User.role, User.password_hash, User.is_active).filter(User.username == username).first()
+    finally:
+        db.rollback()
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    # Both the lookup and the bcrypt check run off the event loop; bcrypt goes
+    # through the bounded login pool, which answers 503 when it is saturated.
+    # No database connection is checked out while a login waits for bcrypt.
+    user = await run_in_threadpool(_login_row, db, form_data.username)
+    if not user or not await password_verifier.verify(form_data.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password", headers={"WWW-Authenticate": "Bearer"})
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(data={"sub": user.username, "role": user.role}, expires_delta=access_token_expires)
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    access_token = _access_token_for(user)
+    refresh_token = await run_in_threadpool(_issue_and_commit, db, user.id)
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/refresh", response_model=Token, summary="Exchange a refresh token for new access and refresh tokens")
+def refresh_access_token(request: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Rotates a refresh token: the presented token is revoked and a new one in the
+    same family is returned with a fresh access token, with no password check.
+    Presenting a token that was already used revokes its whole family, since
+    that means it has been copied. The user's force_password_reset flag is not
+    affected; /api/users/me keeps reporting it until the password is changed.
+    """
+    invalid_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token", headers={"WWW-Authenticate": "Bearer"})
+    stored = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_refresh_token(request.refresh_token)).first()
+    if not stored:
+        raise invalid_exception
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    # The conditional UPDATE makes rotation atomic when two requests race.
+    rotated = db.query(RefreshToken).filter(RefreshToken.id == stored.id, RefreshToken.revoked_at.is_(None)).update({"revoked_at": now}, synchronize_session=False)
+    if not rotated:
+        revoke_refresh_tokens(db, family_id=stored.family_id)
+        db.commit()
+        raise invalid_exception
+    if stored.expires_at <= now:
+        db.commit()
+        raise invalid_exception
+
+    user = db.query(User).filter(User.id == stored.user_id).first()
+    if not user or not user.is_active:
+        db.commit()
+        raise invalid_exception
+
+    access_token = _access_token_for(user)
+    refresh_token = issue_refresh_token(db, user.id, family_id=stored.family_id)
+    db.commit()
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, summary="Revoke a refresh token")
+def logout(request: RefreshRequest, db: Session = Depends(get_db)):
+    stored = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_refresh_token(request.refresh_token)).first()
+    if stored:
+        revoke_refresh_tokens(db, family_id=stored.family_id)
+        db.commit()
+    return None
\ No newline at end of file
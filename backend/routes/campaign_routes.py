@@ -5,12 +5,12 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from typing import List
 from ..database import get_db
-from ..models import User, Campaign
+from ..models import Campaign
 from ..schemas import CampaignInfo
-from ..auth import get_current_active_user
+from ..auth import get_current_active_principal, Principal
 
 router = APIRouter()
 
 @router.get("/", response_model=List[CampaignInfo], summary="Get all campaigns")
-def get_all_campaigns(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+def get_all_campaigns(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_active_principal)):
     return db.query(Campaign).order_by(Campaign.start_date.desc()).all()
@@ -3,7 +3,7 @@
 # Description: Provides data for the admin, BA, and Team dashboards by
 # querying pre-calculated data for maximum performance.
 # ==============================================================================
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from typing import List, Optional
@@ -11,8 +11,11 @@ from pydantic import BaseModel
 
 from ..database import get_db
 from .. import models 
-from ..models import User, Activity, BATarget, ActivityType, Team, Employee, Score, BusinessArea
-from ..auth import require_role, get_current_active_user
+from ..models import Activity, BATarget, ActivityType, Team, Employee, Score, BusinessArea
+from ..auth import require_role, get_current_active_principal, Principal
+from ..geo import GEOHASH_PRECISION, decode_geohash_bounds
+from .. import hierarchy
+from ..hierarchy import ba_team_ids
 
 router = APIRouter()
 
@@ -46,7 +49,7 @@ class PersonalScoreSummary(BaseModel):
 def get_my_score_summary(
     campaign_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     """
     Provides a detailed summary for an employee's dashboard, including:
@@ -54,11 +57,11 @@ def get_my_score_summary(
     - A breakdown of points by activity.
     - Their personal contribution towards their team's targets.
     """
-    if not current_user.employee:
+    if not current_user.employee_id:
         raise HTTPException(status_code=404, detail="Employee record not found for user.")
     
-    employee_id = current_user.employee.id
-    team_id = current_user.employee.team_id
+    employee_id = current_user.employee_id
+    team_id = current_user.team_id
 
     # 1. Get Score Breakdown and Total
     score_data = db.query(
@@ -117,7 +120,7 @@ def get_my_score_summary(
 # --- Endpoints ---
 
 @router.get("/circle_kpis/{campaign_id}", response_model=List[KpiData], summary="Get Circle-level Key Performance Indicators")
-def get_circle_kpis(campaign_id: int, db: Session = Depends(get_db), current_user: User = Depends(require_role("admin"))):
+def get_circle_kpis(campaign_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(require_role("admin"))):
     """
     Fetches high-level KPIs for the entire circle by aggregating BA-level targets
     and comparing them against total logged activities.
@@ -169,7 +172,7 @@ def get_circle_kpis(campaign_id: int, db: Session = Depends(get_db), current_use
     return kpis
 
 @router.get("/ba_performance/{campaign_id}", response_model=List[PerformanceData], summary="Get ranked performance of all BAs")
-def get_ba_performance(campaign_id: int, db: Session = Depends(get_db), current_user: User = Depends(require_role("admin"))):
+def get_ba_performance(campaign_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(require_role("admin"))):
     """
     Fetches ranked BA performance by querying the pre-calculated 'scores' table.
     """
@@ -197,11 +200,11 @@ def get_ba_performance(campaign_id: int, db: Session = Depends(get_db), current_
     return results
 
 @router.get("/team_performance/{campaign_id}/{ba_id}", response_model=List[PerformanceData], summary="Get ranked performance of teams in a BA")
-def get_team_performance_in_ba(campaign_id: int, ba_id: int, db: Session = Depends(get_db), current_user: User = Depends(require_role("ba_coordinator"))):
+def get_team_performance_in_ba(campaign_id: int, ba_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(require_role("ba_coordinator"))):
     """
     Fetches ranked team performance for a specific BA by querying the 'scores' table.
     """
-    if current_user.employee.team.ba_id != ba_id:
+    if current_user.ba_id != ba_id:
         raise HTTPException(status_code=403, detail="Not authorized to view this BA")
     
     team_scores = db.query(
@@ -232,18 +235,16 @@ def get_team_performance_in_ba(campaign_id: int, ba_id: int, db: Session = Depen
     return results
 
 @router.get("/team_members/{campaign_id}/{team_id}", response_model=List[PerformanceData], summary="Get ranked performance of members in a team")
-def get_team_member_performance(campaign_id: int, team_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+def get_team_member_performance(campaign_id: int, team_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_active_principal)):
     """
     Fetches ranked employee performance for a specific team by querying the 'scores' table.
     """
     # Security check: Ensure user is admin, BA coord of that team's BA, or member of that team.
     is_admin = current_user.role == 'admin'
-    is_member = current_user.employee.team_id == team_id
+    is_member = current_user.team_id == team_id
     is_ba_coord = False
-    if current_user.role == 'ba_coordinator':
-        team = db.query(Team).get(team_id)
-        if team and team.ba_id == current_user.employee.team.ba_id:
-            is_ba_coord = True
+    if current_user.role == 'ba_coordinator' and hierarchy.ba_of_team(db, team_id) == current_user.ba_id:
+        is_ba_coord = True
 
     if not (is_admin or is_member or is_ba_coord):
         raise HTTPException(status_code=403, detail="Not authorized to view this team's data")
@@ -263,13 +264,13 @@ def get_ba_kpis(
     campaign_id: int,
     ba_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role("ba_coordinator"))
+    current_user: Principal = Depends(require_role("ba_coordinator"))
 ):
     """
     Fetches high-level KPIs for a specific Business Area by aggregating team-level targets
     and comparing them against logged activities for that BA.
     """
-    if current_user.employee.team.ba_id != ba_id:
+    if current_user.ba_id != ba_id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
     key_metrics = ["MNP", "SIM Sales", "4G SIM Upgradation", "BNU connections", "Urban connections"]
@@ -277,20 +278,17 @@ def get_ba_kpis(
     activity_type_map = {at.name: at.id for at in activity_types}
     kpis = []
 
-    teams_in_ba = db.query(Team.id).filter(Team.ba_id == ba_id).all()
-    team_ids_in_ba = [t[0] for t in teams_in_ba]
-
     for metric_name in key_metrics:
         activity_type_id = activity_type_map.get(metric_name)
         total_target = 0
         total_achieved = 0
 
-        if activity_type_id and team_ids_in_ba:
+        if activity_type_id:
             # Sum the targets for all teams within the BA for this activity type
             total_target_query = db.query(func.sum(models.TeamTarget.target_value)).filter(
                 models.TeamTarget.campaign_id == campaign_id,
                 models.TeamTarget.activity_type_id == activity_type_id,
-                models.TeamTarget.team_id.in_(team_ids_in_ba)
+                models.TeamTarget.team_id.in_(ba_team_ids(ba_id))
             ).scalar()
             total_target = int(total_target_query) if total_target_query else 0
 
@@ -298,7 +296,7 @@ def get_ba_kpis(
             total_achieved = db.query(func.count(Activity.id)).filter(
                 Activity.campaign_id == campaign_id,
                 Activity.activity_type_id == activity_type_id,
-                Activity.team_id.in_(team_ids_in_ba)
+                Activity.team_id.in_(ba_team_ids(ba_id))
             ).scalar() or 0
         
         kpis.append(KpiData(name=metric_name, achieved=total_achieved, target=total_target))
@@ -320,12 +318,12 @@ def get_ba_rank(
     campaign_id: int,
     ba_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role("ba_coordinator"))
+    current_user: Principal = Depends(require_role("ba_coordinator"))
 ):
     """
     Calculates the current rank of a specific BA based on total score.
     """
-    if current_user.employee.team.ba_id != ba_id:
+    if current_user.ba_id != ba_id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
     # This subquery calculates the total score for each BA and ranks them
@@ -350,4 +348,62 @@ def get_ba_rank(
     return RankData(
         rank=ba_rank_result[0] if ba_rank_result else 0,
         total=total_bas
-    )
\ No newline at end of file
+    )
+
+class HeatmapCell(BaseModel):
+    cell: str
+    count: int
+    latitude: float # Centre of the cell
+    longitude: float
+    bounds: List[float] # [min_lat, min_lon, max_lat, max_lon]
+
+
+@router.get("/heatmap/{campaign_id}", response_model=List[HeatmapCell], summary="Get activity counts per geohash cell")
+def get_activity_heatmap(
+    campaign_id: int,
+    zoom: int = Query(5, ge=1, le=GEOHASH_PRECISION, description="Geohash length of a cell: 4 = ~39km, 5 = ~5km, 6 = ~1.2km, 7 = ~150m"),
+    ba_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    """
+    Aggregates located activities into geohash cells for coverage heatmaps.
+    Without a ba_id or team_id the whole campaign is returned (admin only).
+    The counts are grouped on a prefix of the indexed geohash column.
+    """
+    is_admin = current_user.role == 'admin'
+    if team_id is not None:
+        team_ba_id = hierarchy.ba_of_team(db, team_id)
+        if team_ba_id is None:
+            raise HTTPException(status_code=404, detail="Team not found")
+        is_ba_coord = current_user.role == 'ba_coordinator' and team_ba_id == current_user.ba_id
+        if not (is_admin or is_ba_coord or current_user.team_id == team_id):
+            raise HTTPException(status_code=403, detail="Not authorized to view this team's data")
+    elif ba_id is not None:
+        if not (is_admin or (current_user.role == 'ba_coordinator' and current_user.ba_id == ba_id)):
+            raise HTTPException(status_code=403, detail="Not authorized to view this BA")
+    elif not is_admin:
+        raise HTTPException(status_code=403, detail="Only admins can view the circle-wide heatmap")
+
+    cell = func.substr(Activity.geohash, 1, zoom).label("cell")
+    query = db.query(cell, func.count().label("count")).filter(
+        Activity.campaign_id == campaign_id,
+        Activity.geohash.isnot(None)
+    )
+    if team_id is not None:
+        query = query.filter(Activity.team_id == team_id)
+    elif ba_id is not None:
+        query = query.filter(Activity.team_id.in_(ba_team_ids(ba_id)))
+
+    results = []
+    for row in query.group_by(cell).all():
+        min_lat, min_lon, max_lat, max_lon = decode_geohash_bounds(row.cell)
+        results.append(HeatmapCell(
+            cell=row.cell,
+            count=row.count,
+            latitude=(min_lat + max_lat) / 2,
+            longitude=(min_lon + max_lon) / 2,
+            bounds=[min_lat, min_lon, max_lat, max_lon]
+        ))
+    return results
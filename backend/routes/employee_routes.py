@@ -4,7 +4,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
-from .. import auth, schemas, models
+from .. import auth, schemas, models, hierarchy
 from ..database import get_db
 
 router = APIRouter()
@@ -12,20 +12,21 @@ router = APIRouter()
 can_manage_users = Depends(auth.require_role("ba_coordinator"))
 
 @router.post("/", response_model=schemas.EmployeeInfo, status_code=status.HTTP_201_CREATED)
-def create_employee(employee: schemas.EmployeeCreate, db: Session = Depends(get_db), current_user: models.User = can_manage_users):
+def create_employee(employee: schemas.EmployeeCreate, db: Session = Depends(get_db), current_user: auth.Principal = can_manage_users):
     team = db.query(models.Team).filter(models.Team.id == employee.team_id).first()
     if not team: raise HTTPException(status_code=404, detail="Team not found")
-    if current_user.role == 'ba_coordinator' and team.ba_id != current_user.employee.team.ba_id:
+    if current_user.role == 'ba_coordinator' and team.ba_id != current_user.ba_id:
         raise HTTPException(status_code=403, detail="Cannot add employee to a team outside your BA.")
     db_employee = models.Employee(**employee.model_dump())
     db.add(db_employee)
     db.commit()
+    hierarchy.invalidate()
     db.refresh(db_employee)
     return db_employee
 
 @router.get("/by_ba/{ba_id}", response_model=List[schemas.EmployeeInfo])
-def get_employees_by_ba(ba_id: int, db: Session = Depends(get_db), current_user: models.User = can_manage_users):
-    if current_user.role == 'ba_coordinator' and ba_id != current_user.employee.team.ba_id:
+def get_employees_by_ba(ba_id: int, db: Session = Depends(get_db), current_user: auth.Principal = can_manage_users):
+    if current_user.role == 'ba_coordinator' and ba_id != current_user.ba_id:
         raise HTTPException(status_code=403, detail="Cannot view employees outside your BA.")
     employees = db.query(models.Employee).join(models.Team).filter(models.Team.ba_id == ba_id).all()
     return employees
@@ -37,13 +38,13 @@ def get_unassigned_employees(
     ba_id: int, 
     search: Optional[str] = None, # <-- Add search parameter
     db: Session = Depends(get_db), 
-    current_user: models.User = can_manage_users
+    current_user: auth.Principal = can_manage_users
 ):
     """
     Fetches employees from a BA who are eligible for assignment.
     If a search term is provided, it filters by name or employee code.
     """
-    if current_user.employee.team.ba_id != ba_id:
+    if current_user.ba_id != ba_id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
     # Base query for eligible employees in the BA
@@ -67,39 +68,43 @@ def get_unassigned_employees(
     return employees
 
 @router.put("/{employee_id}/assign_team/{team_id}", response_model=schemas.EmployeeInfo, summary="Assign an employee to a team")
-def assign_employee_to_team(employee_id: int, team_id: int, db: Session = Depends(get_db), current_user: models.User = can_manage_users):
+def assign_employee_to_team(employee_id: int, team_id: int, db: Session = Depends(get_db), current_user: auth.Principal = can_manage_users):
     employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
     if not employee: raise HTTPException(status_code=404, detail="Employee not found")
     
     team = db.query(models.Team).filter(models.Team.id == team_id).first()
     if not team: raise HTTPException(status_code=404, detail="Team not found")
 
-    if team.ba_id != current_user.employee.team.ba_id:
+    if team.ba_id != current_user.ba_id:
         raise HTTPException(status_code=403, detail="Cannot assign to a team outside your BA.")
 
     employee.team_id = team_id
     db.commit()
+    hierarchy.invalidate()
+    auth.invalidate_principal(employee_id=employee.id)
     db.refresh(employee)
     return employee
 
 @router.put("/{employee_id}/unassign", response_model=schemas.EmployeeInfo, summary="Unassign an employee from their team")
-def unassign_employee(employee_id: int, db: Session = Depends(get_db), current_user: models.User = can_manage_users):
+def unassign_employee(employee_id: int, db: Session = Depends(get_db), current_user: auth.Principal = can_manage_users):
     employee = db.query(models.Employee).options(joinedload(models.Employee.team)).filter(models.Employee.id == employee_id).first()
     if not employee: raise HTTPException(status_code=404, detail="Employee not found")
     if not employee.team: raise HTTPException(status_code=400, detail="Employee is not in a team")
     
-    if employee.team.ba_id != current_user.employee.team.ba_id:
+    if employee.team.ba_id != current_user.ba_id:
         raise HTTPException(status_code=403, detail="Cannot unassign members from teams outside your BA.")
     
     # Assign the user to the BA coordinator's own (default) team
-    employee.team_id = current_user.employee.team_id 
+    employee.team_id = current_user.team_id 
     employee.is_team_lead = False
     db.commit()
+    hierarchy.invalidate()
+    auth.invalidate_principal(employee_id=employee.id)
     db.refresh(employee)
     return employee
 
 @router.put("/{employee_id}/toggle_lead/{team_id}", response_model=schemas.EmployeeInfo, summary="Set or unset an employee as a team lead")
-def toggle_team_lead(employee_id: int, team_id: int, db: Session = Depends(get_db), current_user: models.User = can_manage_users):
+def toggle_team_lead(employee_id: int, team_id: int, db: Session = Depends(get_db), current_user: auth.Principal = can_manage_users):
     employee_to_promote = db.query(models.Employee).filter(models.Employee.id == employee_id, models.Employee.team_id == team_id).first()
     if not employee_to_promote: raise HTTPException(status_code=404, detail="Employee not found in this team.")
 
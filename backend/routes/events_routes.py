@@ -1,38 +1,43 @@
 # ==============================================================================
 # File: backend/routes/events_routes.py (Production Ready & Complete)
 # ==============================================================================
-import os
-import uuid
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
 from .. import models, schemas, auth
+from .. import media as media_store, thumbnails, events, hierarchy
 from ..database import get_db
 
 router = APIRouter()
 
-UPLOAD_DIRECTORY = "backend/uploads"
-os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
-
-def save_upload_file(upload_file: UploadFile) -> str:
-    """Saves a file to the UPLOAD_DIRECTORY with a unique filename."""
-    if not upload_file.filename:
-        raise HTTPException(status_code=400, detail="File has no name.")
-    file_extension = os.path.splitext(upload_file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIRECTORY, unique_filename)
-    
-    with open(file_path, "wb") as buffer:
-        buffer.write(upload_file.file.read())
-        
-    return file_path
+async def _commit_with_media(db: Session, row, owner_type: str, uploads: List[media_store.StoredUpload]):
+    """
+    Commits an event row together with its media references, off the event
+    loop. If that fails, files written for this request are left to the
+    media sweep, since a concurrent request may be committing the same digest.
+    """
+    def commit():
+        db.add(row)
+        db.flush()
+        media_ids = media_store.attach_media(db, owner_type, row.id, uploads)
+        db.commit()
+        return media_ids
+    try:
+        media_ids = await run_in_threadpool(commit)
+    except BaseException:
+        await run_in_threadpool(db.rollback)
+        raise
+    # Thumbnails are rendered in the background; only content new to the store needs them.
+    thumbnails.enqueue(media_id for media_id, upload in zip(media_ids, uploads) if upload.created_file)
+
 
 @router.post("/mela", status_code=status.HTTP_201_CREATED)
-def log_mela(
+async def log_mela(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user),
+    current_user: auth.Principal = Depends(auth.get_current_active_principal),
     mela_date: datetime = Form(...),
     location: str = Form(...),
     territory: str = Form(...),
@@ -40,101 +45,202 @@ def log_mela(
     campaign_id: int = Form(...),
     photo: UploadFile = File(...)
 ):
-    if not current_user.employee or not current_user.employee.team_id:
+    if not current_user.team_id:
         raise HTTPException(status_code=403, detail="User is not part of a team.")
 
-    photo_path = save_upload_file(photo)
+    photos = await media_store.store_uploads(db, [photo])
     new_mela = models.Mela(
         campaign_id=campaign_id,
-        team_id=current_user.employee.team_id,
+        team_id=current_user.team_id,
         employee_id=current_user.employee_id,
         mela_date=mela_date,
         location=location,
         territory=territory,
         participants_count=participants_count,
-        photo_url=photo_path
+        photo_url=photos[0].path
     )
-    db.add(new_mela)
-    db.commit()
+    await _commit_with_media(db, new_mela, "mela", photos)
     return {"message": "Mela event logged successfully."}
 
 @router.post("/branding", status_code=status.HTTP_201_CREATED)
-def log_branding(
+async def log_branding(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_role("ba_coordinator")),
+    current_user: auth.Principal = Depends(auth.require_role("ba_coordinator")),
     location_type: str = Form(...),
     campaign_id: int = Form(...),
     location_name: Optional[str] = Form(None),
     retailer_code: Optional[str] = Form(None),
     photos: List[UploadFile] = File(...)
 ):
-    if not current_user.employee or not current_user.employee.team or not current_user.employee.team.ba_id:
+    if not current_user.ba_id:
         raise HTTPException(status_code=403, detail="User is not part of a BA.")
 
-    photo_paths = [save_upload_file(photo) for photo in photos]
+    stored = await media_store.store_uploads(db, photos)
     new_branding = models.BrandingActivity(
         campaign_id=campaign_id,
-        ba_id=current_user.employee.team.ba_id,
+        ba_id=current_user.ba_id,
         employee_id=current_user.employee_id,
         location_type=location_type,
         location_name=location_name,
         retailer_code=retailer_code,
-        photo_urls=",".join(photo_paths)
+        photo_urls=",".join(s.path for s in stored)
     )
-    db.add(new_branding)
-    db.commit()
+    await _commit_with_media(db, new_branding, "branding", stored)
     return {"message": "Branding activity logged successfully."}
 
 # --- NEW ENDPOINT FOR SPECIAL EVENTS ---
 @router.post("/special-event", status_code=status.HTTP_201_CREATED)
-def log_special_event(
+async def log_special_event(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_role("ba_coordinator")),
+    current_user: auth.Principal = Depends(auth.require_role("ba_coordinator")),
     event_date: datetime = Form(...),
     location: str = Form(...),
     event_type: str = Form(...),
     campaign_id: int = Form(...),
     media: List[UploadFile] = File(...)
 ):
-    if not current_user.employee or not current_user.employee.team or not current_user.employee.team.ba_id:
+    if not current_user.ba_id:
         raise HTTPException(status_code=403, detail="User is not part of a BA.")
 
-    media_paths = [save_upload_file(m) for m in media]
+    stored = await media_store.store_uploads(db, media)
     new_event = models.SpecialEvent(
         campaign_id=campaign_id,
-        ba_id=current_user.employee.team.ba_id,
+        ba_id=current_user.ba_id,
         employee_id=current_user.employee_id,
         event_date=event_date,
         location=location,
         event_type=event_type,
-        media_urls=",".join(media_paths)
+        media_urls=",".join(s.path for s in stored)
     )
-    db.add(new_event)
-    db.commit()
+    await _commit_with_media(db, new_event, "special_event", stored)
     return {"message": "Special event logged successfully."}
 
 # --- NEW ENDPOINT FOR PRESS RELEASES ---
 @router.post("/press-release", status_code=status.HTTP_201_CREATED)
-def log_press_release(
+async def log_press_release(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_role("ba_coordinator")),
+    current_user: auth.Principal = Depends(auth.require_role("ba_coordinator")),
     release_date: datetime = Form(...),
     media_outlet: str = Form(...),
     campaign_id: int = Form(...),
     clipping: UploadFile = File(...)
 ):
-    if not current_user.employee or not current_user.employee.team or not current_user.employee.team.ba_id:
+    if not current_user.ba_id:
         raise HTTPException(status_code=403, detail="User is not part of a BA.")
 
-    clipping_path = save_upload_file(clipping)
+    clippings = await media_store.store_uploads(db, [clipping])
     new_release = models.PressRelease(
         campaign_id=campaign_id,
-        ba_id=current_user.employee.team.ba_id,
+        ba_id=current_user.ba_id,
         employee_id=current_user.employee_id,
         release_date=release_date,
         media_outlet=media_outlet,
-        clipping_url=clipping_path
+        clipping_url=clippings[0].path
     )
-    db.add(new_release)
-    db.commit()
-    return {"message": "Press release logged successfully."}
\ No newline at end of file
+    await _commit_with_media(db, new_release, "press_release", clippings)
+    return {"message": "Press release logged successfully."}
+
+
+# ============================ EVENT LISTINGS ============================
+
+EVENT_PAGE_SIZE = 50
+MAX_EVENT_PAGE_SIZE = 200
+
+
+def _scope_criteria(db: Session, kind: events.EventKind, current_user: auth.Principal, ba_id: Optional[int], team_id: Optional[int]) -> list:
+    """
+    Filters that restrict a listing to the requested BA/team. Admins may list
+    any BA; everyone else sees the events of their own BA.
+    """
+    if current_user.role != "admin":
+        if not current_user.ba_id:
+            raise HTTPException(status_code=403, detail="User is not part of a BA.")
+        if ba_id is not None and ba_id != current_user.ba_id:
+            raise HTTPException(status_code=403, detail="Not authorized to view events for this BA.")
+        ba_id = current_user.ba_id
+
+    model = kind.model
+    if kind.scope_column == "ba_id":
+        return [model.ba_id == ba_id] if ba_id is not None else []
+
+    if team_id is not None:
+        if ba_id is not None and hierarchy.ba_of_team(db, team_id) != ba_id:
+            raise HTTPException(status_code=403, detail="Not authorized to view events for this team.")
+        return [model.team_id == team_id]
+    return [model.team_id.in_(hierarchy.ba_team_ids(ba_id))] if ba_id is not None else []
+
+
+def _list_events(db: Session, kind: events.EventKind, schema, current_user: auth.Principal, campaign_id: int,
+                 ba_id: Optional[int], team_id: Optional[int], cursor: Optional[int], limit: int) -> dict:
+    criteria = _scope_criteria(db, kind, current_user, ba_id, team_id)
+    rows, next_cursor = events.page(db, kind, campaign_id, criteria, cursor, limit)
+    counts = events.grouped_counts(db, kind, campaign_id, *criteria)
+    refs = events.media_refs(db, kind.owner_type, (row.id for row in rows))
+
+    items = []
+    for row in rows:
+        item = schema.model_validate(row)
+        item.media = [schemas.EventMediaRef(**ref) for ref in refs.get(row.id, [])]
+        items.append(item)
+    return {
+        "items": items,
+        "next_cursor": next_cursor,
+        "counts": [{"scope_id": scope_id, "count": count} for scope_id, count in sorted(counts.items())],
+        "total": sum(counts.values()),
+    }
+
+
+@router.get("/mela", response_model=schemas.EventPage[schemas.Mela], summary="List melas, newest first")
+def list_melas(
+    campaign_id: int,
+    ba_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(EVENT_PAGE_SIZE, ge=1, le=MAX_EVENT_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_active_principal)
+):
+    """
+    Pages through the melas of a campaign, optionally for one BA or team.
+    `counts` holds the number of melas per team for the same filter.
+    """
+    return _list_events(db, events.MELA, schemas.Mela, current_user, campaign_id, ba_id, team_id, cursor, limit)
+
+
+@router.get("/branding", response_model=schemas.EventPage[schemas.BrandingActivity], summary="List branding activities, newest first")
+def list_branding(
+    campaign_id: int,
+    ba_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(EVENT_PAGE_SIZE, ge=1, le=MAX_EVENT_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_active_principal)
+):
+    """Pages through the branding activities of a campaign; `counts` is per BA."""
+    return _list_events(db, events.BRANDING, schemas.BrandingActivity, current_user, campaign_id, ba_id, None, cursor, limit)
+
+
+@router.get("/special-event", response_model=schemas.EventPage[schemas.SpecialEvent], summary="List special events, newest first")
+def list_special_events(
+    campaign_id: int,
+    ba_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(EVENT_PAGE_SIZE, ge=1, le=MAX_EVENT_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_active_principal)
+):
+    """Pages through the special events of a campaign; `counts` is per BA."""
+    return _list_events(db, events.SPECIAL_EVENT, schemas.SpecialEvent, current_user, campaign_id, ba_id, None, cursor, limit)
+
+
+@router.get("/press-release", response_model=schemas.EventPage[schemas.PressRelease], summary="List press releases, newest first")
+def list_press_releases(
+    campaign_id: int,
+    ba_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(EVENT_PAGE_SIZE, ge=1, le=MAX_EVENT_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_active_principal)
+):
+    """Pages through the press releases of a campaign; `counts` is per BA."""
+    return _list_events(db, events.PRESS_RELEASE, schemas.PressRelease, current_user, campaign_id, ba_id, None, cursor, limit)
@@ -18,7 +18,7 @@ def get_employee_leaderboard(
     campaign_id: int,
     ba_id: Optional[int] = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    current_user: auth.Principal = Depends(auth.get_current_active_principal)
 ):
     query = db.query(
         models.Employee.id.label("employee_id"),
@@ -66,7 +66,7 @@ def get_team_leaderboard(
     campaign_id: int,
     ba_id: Optional[int] = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    current_user: auth.Principal = Depends(auth.get_current_active_principal)
 ):
     query = db.query(
         models.Team.id.label("team_id"),
@@ -109,7 +109,7 @@ def get_team_leaderboard(
 def get_ba_leaderboard(
     campaign_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    current_user: auth.Principal = Depends(auth.get_current_active_principal)
 ):
     query = db.query(
         models.BusinessArea.id.label("ba_id"),
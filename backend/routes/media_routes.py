@@ -0,0 +1,120 @@
+# ==============================================================================
+# File: backend/routes/media_routes.py
+# Description: Serves stored event media and their thumbnails to signed-in
+# users. Files are addressed by content digest, so responses carry a strong
+# ETag and may be cached forever; conditional requests get a 304. Bodies are
+# streamed from disk in chunks (or handed to the web server with
+# X-Accel-Redirect for a zero-copy sendfile) and Range requests are honoured
+# so videos can seek. The stored content type comes from the uploader, so only
+# known image and video types are served inline; anything else is downloaded
+# as application/octet-stream, and nosniff is always sent.
+# ==============================================================================
+import os
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from .. import hierarchy
+from ..auth import get_current_active_principal, Principal
+from ..media import UPLOAD_DIRECTORY, EVENT_MEDIA_COLUMNS
+from ..models import MediaObject, MediaVariant, EventMedia, Mela
+from ..thumbnails import VARIANTS
+
+router = APIRouter()
+
+# Set to an nginx `internal` location that aliases backend/uploads (e.g. "/protected-uploads/")
+# to let nginx send the file with sendfile instead of streaming it through Python.
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX")
+MEDIA_CACHE_CONTROL = "private, max-age=31536000, immutable"
+# SVG is left out on purpose: it can carry script.
+INLINE_CONTENT_TYPES = {
+    "image/jpeg", "image/png", "image/gif", "image/webp", "image/heic", "image/heif",
+    "video/mp4", "video/webm", "video/quicktime",
+}
+
+_SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_EVENT_MODELS = {owner_type: model for owner_type, model, _ in EVENT_MEDIA_COLUMNS}
+
+
+def _can_view(db: Session, current_user: Principal, media_id: int) -> bool:
+    """Admins see everything; everyone else sees media attached to an event in their BA."""
+    if current_user.role == "admin":
+        return True
+    for owner_type, owner_id in db.query(EventMedia.owner_type, EventMedia.owner_id).filter(EventMedia.media_id == media_id).all():
+        model = _EVENT_MODELS.get(owner_type)
+        if model is Mela:
+            team_id = db.query(Mela.team_id).filter(Mela.id == owner_id).scalar()
+            ba_id = hierarchy.ba_of_team(db, team_id) if team_id else None
+        elif model is not None:
+            ba_id = db.query(model.ba_id).filter(model.id == owner_id).scalar()
+        else:
+            continue
+        if ba_id is not None and ba_id == current_user.ba_id:
+            return True
+    return False
+
+
+def _delivery(content_type: Optional[str]) -> tuple[str, str]:
+    """The media type and Content-Disposition to serve a stored content type with."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in INLINE_CONTENT_TYPES:
+        return content_type, "inline"
+    return "application/octet-stream", "attachment"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison, so a W/ prefix is ignored.
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/{sha256}", summary="Download a stored media file")
+@router.get("/{sha256}/{kind}", summary="Download a thumbnail or web-optimised copy of an image")
+def get_media(
+    sha256: str,
+    request: Request,
+    kind: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    not_found = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+    if not _SHA256_PATTERN.match(sha256) or (kind is not None and kind not in VARIANTS):
+        raise not_found
+
+    media = db.query(MediaObject).filter(MediaObject.sha256 == sha256).first()
+    if not media or not _can_view(db, current_user, media.id):
+        raise not_found
+
+    path, content_type, digest = media.path, media.content_type, media.sha256
+    if kind is not None:
+        variant = db.query(MediaVariant).filter(MediaVariant.media_id == media.id, MediaVariant.kind == kind).first()
+        if not variant:
+            raise not_found
+        path, content_type, digest = variant.path, variant.content_type, variant.sha256
+    if not os.path.isfile(path):
+        raise not_found
+
+    # The digest is the content, so the ETag is strong and the response never goes stale.
+    media_type, disposition = _delivery(content_type)
+    headers = {
+        "ETag": f'"{digest}"',
+        "Cache-Control": MEDIA_CACHE_CONTROL,
+        "Content-Disposition": disposition,
+        "X-Content-Type-Options": "nosniff",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if MEDIA_ACCEL_REDIRECT_PREFIX:
+        relative_path = os.path.relpath(path, UPLOAD_DIRECTORY).replace(os.sep, "/")
+        headers["X-Accel-Redirect"] = MEDIA_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative_path
+        return Response(media_type=media_type, headers=headers)
+
+    # FileResponse streams in chunks, answers Range/If-Range requests and uses
+    # the server's pathsend extension when it offers one.
+    return FileResponse(path, media_type=media_type, headers=headers)
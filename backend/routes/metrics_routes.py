@@ -0,0 +1,81 @@
+# ==============================================================================
+# File: backend/routes/metrics_routes.py
+# Description: GET /metrics in the Prometheus text format. Besides the
+# counters and histograms recorded as the app runs, values owned by other
+# modules (DB pool, background queues, caches, login pool) are read here at
+# scrape time. Set METRICS_TOKEN to require "Authorization: Bearer <token>";
+# in production the route is only registered when METRICS_TOKEN is set.
+# ==============================================================================
+import os
+import hmac
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from .. import metrics, provisioning, thumbnails
+from ..cache import caches
+from ..database import engine, ENVIRONMENT
+from ..idempotency import store as idempotency_store
+from ..password_verifier import password_verifier, LATENCY_BUCKETS
+
+router = APIRouter()
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _db_pool():
+    pool = engine.pool
+    samples = []
+    for state, method in (("size", "size"), ("checked_out", "checkedout"), ("checked_in", "checkedin"), ("overflow", "overflow")):
+        if hasattr(pool, method):
+            # QueuePool reports overflow as negative while below pool_size.
+            samples.append(({"state": state}, max(0, getattr(pool, method)())))
+    return [("db_pool_connections", "gauge", "Connections in the SQLAlchemy pool, by state.", samples)]
+
+
+def _background_queues():
+    return [("background_queue_depth", "gauge", "Work queued or running in background executors.", [
+        ({"queue": "thumbnails"}, thumbnails.pending()),
+        ({"queue": "provisioning"}, provisioning.pending()),
+        ({"queue": "login_verify"}, password_verifier.pending),
+    ])]
+
+
+def _caches():
+    named = sorted(caches.items())
+    return [
+        ("cache_hits_total", "counter", "Cache lookups that found a fresh entry.", [({"cache": name}, cache.hits) for name, cache in named]),
+        ("cache_misses_total", "counter", "Cache lookups that missed or found an expired entry.", [({"cache": name}, cache.misses) for name, cache in named]),
+        ("cache_hit_ratio", "gauge", "Hits divided by lookups since start.", [({"cache": name}, cache.hit_ratio()) for name, cache in named]),
+        ("cache_entries", "gauge", "Entries currently held, including expired ones not yet evicted.", [({"cache": name}, cache.size()) for name, cache in named]),
+        ("idempotency_entries", "gauge", "Responses remembered for Idempotency-Key replays.", [({}, idempotency_store.size())]),
+    ]
+
+
+def _login_pool():
+    snapshot = password_verifier.snapshot()
+    return [
+        ("login_verify_seconds", "histogram", "Login password verification time, including queueing.", metrics.histogram_samples(
+            "login_verify_seconds", {}, LATENCY_BUCKETS, snapshot["latency_buckets"].values(), snapshot["latency_sum_seconds"], snapshot["verified"]
+        )),
+        ("login_verify_rejected_total", "counter", "Logins rejected with 503 because the pool was full.", [({}, snapshot["rejected"])]),
+    ]
+
+
+metrics.collectors.extend([_db_pool, _background_queues, _caches, _login_pool])
+
+
+def get_metrics(request: Request):
+    if METRICS_TOKEN:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token, METRICS_TOKEN):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# Fail closed: an open /metrics would expose internals on the public origin.
+if METRICS_TOKEN or ENVIRONMENT != "production":
+    router.add_api_route("/metrics", get_metrics, methods=["GET"], include_in_schema=False)
+else:
+    print("--- METRICS_TOKEN is not set; /metrics is disabled in production ---")
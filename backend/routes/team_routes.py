@@ -7,9 +7,10 @@ from typing import List
 from pydantic import BaseModel # <-- Add this import
 
 from ..database import get_db
+from .. import hierarchy, provisioning
 from ..models import User, Team, Employee, BusinessArea
 from ..schemas import Team as TeamSchema, TeamCreate, BusinessAreaInfo, EmployeeInfo # <-- Import EmployeeInfo
-from ..auth import require_role, get_current_active_user, get_password_hash # <-- Import get_password_hash
+from ..auth import require_role, get_current_active_principal, Principal
 
 router = APIRouter()
 
@@ -20,22 +21,23 @@ class AddMemberRequest(BaseModel):
     role: str = "employee" # Default role
 
 @router.post("/", response_model=TeamSchema, status_code=status.HTTP_201_CREATED)
-def create_team(team: TeamCreate, db: Session = Depends(get_db), current_user: User = Depends(require_role("ba_coordinator"))):
+def create_team(team: TeamCreate, db: Session = Depends(get_db), current_user: Principal = Depends(require_role("ba_coordinator"))):
     existing_team = db.query(Team).filter(Team.team_code == team.team_code).first()
     if existing_team: raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Team with code '{team.team_code}' already exists.")
     db_team = Team(**team.model_dump())
     db.add(db_team)
     db.commit()
+    hierarchy.invalidate()
     db.refresh(db_team)
     return db_team
 
 @router.get("/by_ba/{ba_id}", response_model=List[TeamSchema])
-def get_teams_by_ba(ba_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+def get_teams_by_ba(ba_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_active_principal)):
     return db.query(Team).filter(Team.ba_id == ba_id).all()
 
 
 @router.get("/{team_id}", response_model=TeamSchema)
-def get_team_details(team_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+def get_team_details(team_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_active_principal)):
     team = db.query(Team).options(
         joinedload(Team.employees)
     ).filter(Team.id == team_id).first()
@@ -44,16 +46,15 @@ def get_team_details(team_id: int, db: Session = Depends(get_db), current_user:
         raise HTTPException(status_code=404, detail="Team not found")
 
     # --- PERMISSION FIX STARTS HERE ---
-    user_employee = current_user.employee
-    if not user_employee:
+    if not current_user.employee_id:
         raise HTTPException(status_code=403, detail="User has no employee record.")
 
     is_admin = current_user.role == 'admin'
     is_ba_coord_of_team = (
         current_user.role == 'ba_coordinator' and 
-        team.ba_id == user_employee.team.ba_id
+        team.ba_id == current_user.ba_id
     )
-    is_member_of_team = user_employee.team_id == team_id
+    is_member_of_team = current_user.team_id == team_id
 
     if not (is_admin or is_ba_coord_of_team or is_member_of_team):
         raise HTTPException(status_code=403, detail="Not authorized to view this team's details")
@@ -63,7 +64,7 @@ def get_team_details(team_id: int, db: Session = Depends(get_db), current_user:
 
 
 @router.get("/business-areas/", response_model=List[BusinessAreaInfo], summary="Get all business areas")
-def get_all_business_areas(db: Session = Depends(get_db), current_user: User = Depends(require_role("admin"))):
+def get_all_business_areas(db: Session = Depends(get_db), current_user: Principal = Depends(require_role("admin"))):
     """
     Fetches a list of all business areas. Admin only.
     """
@@ -76,18 +77,17 @@ def add_member_to_team(
     team_id: int,
     request: AddMemberRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     """
     Allows a Team Leader or Coordinator to add a new member to their team.
     Creates a new Employee and User if they don't exist.
     """
     # 1. Authorization Check
-    user_employee = current_user.employee
-    if not user_employee:
+    if not current_user.employee_id:
         raise HTTPException(status_code=403, detail="Current user is not an employee.")
 
-    if user_employee.team_id != team_id or current_user.role not in ["team_leader", "team_coordinator"]:
+    if current_user.team_id != team_id or current_user.role not in ["team_leader", "team_coordinator"]:
         raise HTTPException(status_code=403, detail="Not authorized to add members to this team.")
 
     # 2. Check if employee or user already exists
@@ -112,13 +112,14 @@ def add_member_to_team(
 
         new_user = User(
             username=request.hr_number,
-            password_hash=get_password_hash("BSNL@2025"), # Default password
+            password_hash=provisioning.default_password_hash(), # Default password, hashed once per process
             role=request.role,
             employee_id=new_employee.id,
             force_password_reset=True # Ensure they must reset password
         )
         db.add(new_user)
         db.commit()
+        hierarchy.invalidate()
         db.refresh(new_employee)
         
         return new_employee
@@ -1,19 +1,26 @@
 # ===== File: backend/routes/upload_routes.py (FINAL CORRECTED VERSION) =====
 
+import io
 import re
+import json
+import openpyxl
 import pandas as pd
 from pathlib import Path # <-- Add this import
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import FileResponse
+from typing import List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, BackgroundTasks
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import select, insert, update, delete
 from sqlalchemy.orm import Session
-from ..database import get_db
-from ..models import User, Team, Employee
-from ..auth import require_role, get_password_hash
+from ..database import get_db, SessionLocal
+from .. import hierarchy, provisioning, targets
+from ..models import Team, Employee, TeamTarget, Activity, ActivityType, BusinessArea, Campaign
+from ..scoring_engine import recalculate_all_scores
+from ..auth import require_role, get_current_active_principal, invalidate_principal, Principal
 
 router = APIRouter()
 
 @router.get("/teams/template", summary="Download the pre-made Excel template")
-def get_team_upload_template(current_user: User = Depends(require_role("ba_coordinator"))):
+def get_team_upload_template(current_user: Principal = Depends(require_role("ba_coordinator"))):
     """
     Serves the pre-made Excel file from the same directory as this script.
     """
@@ -32,85 +39,417 @@ def get_team_upload_template(current_user: User = Depends(require_role("ba_coord
         media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
 
-@router.post("/teams/{ba_id}", summary="Validate and then replace all teams for a BA from an Excel file")
+TEAM_SHEET_COLUMNS = ['team_code', 'team_name', 'leader_name', 'coordinator_name', 'leader_hr_no', 'coordinator_hr_no']
+TEAM_CODE_PATTERN = re.compile(r"^[A-Z]{3}_\d{2}$")
+MAX_REPORTED_ERRORS = 20
+
+
+def _validate_team_sheet(df: pd.DataFrame) -> List[str]:
+    """
+    Column-wise checks of a normalised team sheet. Returns every problem with
+    its Excel row number (header is row 1).
+    """
+    excel_row = df.index.to_series() + 2
+    errors = []
+
+    bad_codes = ~df['team_code'].str.fullmatch(TEAM_CODE_PATTERN.pattern)
+    errors += [f"Invalid Team Code on row {r}: '{c}'. Required format is 'XXX_01'." for r, c in zip(excel_row[bad_codes], df.loc[bad_codes, 'team_code'])]
+
+    # XXX_00 is the BA's admin team, which an upload never replaces.
+    reserved_codes = df['team_code'].str.endswith("_00")
+    errors += [f"Team Code '{c}' on row {r} is reserved for the BA admin team." for r, c in zip(excel_row[reserved_codes], df.loc[reserved_codes, 'team_code'])]
+
+    duplicate_codes = df['team_code'].duplicated(keep=False) & (df['team_code'] != "")
+    errors += [f"Duplicate Team Code on row {r}: '{c}'." for r, c in zip(excel_row[duplicate_codes], df.loc[duplicate_codes, 'team_code'])]
+
+    for column, label in (('leader_hr_no', 'Team Leader HR No'), ('coordinator_hr_no', 'Team Coordinator HR No')):
+        missing = df[column] == ""
+        errors += [f"Missing {label} on row {r}." for r in excel_row[missing]]
+
+    # An employee can only belong to one team, so an HR number may appear once in the sheet.
+    hr_numbers = pd.concat([
+        pd.DataFrame({'hr_no': df['leader_hr_no'], 'row': excel_row}),
+        pd.DataFrame({'hr_no': df['coordinator_hr_no'], 'row': excel_row}),
+    ])
+    hr_numbers = hr_numbers[hr_numbers['hr_no'] != ""]
+    repeated = hr_numbers[hr_numbers['hr_no'].duplicated(keep=False)].groupby('hr_no')['row'].apply(lambda rows: sorted(set(rows)))
+    errors += [f"HR No '{hr_no}' is used more than once (rows {', '.join(map(str, rows))})." for hr_no, rows in repeated.items()]
+    return errors
+
+
+def _raise_validation_errors(errors: List[str]):
+    detail = "; ".join(errors[:MAX_REPORTED_ERRORS])
+    if len(errors) > MAX_REPORTED_ERRORS:
+        detail += f"; ... and {len(errors) - MAX_REPORTED_ERRORS} more."
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+DRY_RUN_BATCH_SIZE = 500
+
+
+def _iter_team_sheet(workbook_bytes: bytes):
+    """Yields (excel_row, row) from the first sheet without loading the whole workbook."""
+    workbook = openpyxl.load_workbook(io.BytesIO(workbook_bytes), read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        for excel_row, values in enumerate(sheet.iter_rows(min_row=2, max_col=len(TEAM_SHEET_COLUMNS), values_only=True), start=2):
+            if all(v is None or str(v).strip() == "" for v in values):
+                continue
+            row = {col: ("" if v is None else str(v).strip()) for col, v in zip(TEAM_SHEET_COLUMNS, values)}
+            row['team_code'] = row['team_code'].upper()
+            yield excel_row, row
+    finally:
+        workbook.close()
+
+
+def _team_sheet_report(workbook_bytes: bytes, ba_id: int):
+    """
+    Streams the dry-run report as NDJSON: one line per problem, then a summary
+    line. Row rules are checked as rows arrive; database rules are checked
+    once per batch of rows. Nothing is written.
+    """
+    db = SessionLocal()
+    counts = {"rows": 0, "error": 0, "warning": 0}
+    first_seen_code, first_seen_hr = {}, {}
+
+    def issue(excel_row, level, message):
+        counts[level] += 1
+        return json.dumps({"row": excel_row, "level": level, "message": message}) + "\n"
+
+    def check_batch(batch):
+        codes = {row['team_code']: excel_row for excel_row, row in batch if TEAM_CODE_PATTERN.match(row['team_code']) and not row['team_code'].endswith("_00")}
+        taken = db.execute(select(Team.team_code, Team.ba_id).where(
+            Team.team_code.in_(list(codes)),
+            Team.id.notin_(select(Team.id).where(Team.ba_id == ba_id, Team.team_code.notlike('%_00')))
+        )).all()
+        for code, _ in taken:
+            yield issue(codes[code], "error", f"Team Code '{code}' already belongs to another team.")
+
+        hr_rows = {}
+        for excel_row, row in batch:
+            for column in ('leader_hr_no', 'coordinator_hr_no'):
+                if row[column]:
+                    hr_rows[row[column]] = excel_row
+        existing = db.execute(
+            select(Employee.employee_code, Employee.role, Team.ba_id)
+            .join(Team, Employee.team_id == Team.id)
+            .where(Employee.employee_code.in_(list(hr_rows)))
+        ).all()
+        for code, role, employee_ba_id in existing:
+            if role in ("admin", "ba_coordinator"):
+                yield issue(hr_rows[code], "error", f"HR No '{code}' belongs to a {role} and cannot lead or coordinate a team.")
+            elif employee_ba_id != ba_id:
+                yield issue(hr_rows[code], "warning", f"HR No '{code}' is an existing employee of another BA and will be moved to this team.")
+
+    try:
+        batch = []
+        for excel_row, row in _iter_team_sheet(workbook_bytes):
+            counts["rows"] += 1
+            code = row['team_code']
+            if not TEAM_CODE_PATTERN.match(code):
+                yield issue(excel_row, "error", f"Invalid Team Code: '{code}'. Required format is 'XXX_01'.")
+            elif code.endswith("_00"):
+                yield issue(excel_row, "error", f"Team Code '{code}' is reserved for the BA admin team.")
+            elif code in first_seen_code:
+                yield issue(excel_row, "error", f"Duplicate Team Code '{code}' (first used on row {first_seen_code[code]}).")
+            else:
+                first_seen_code[code] = excel_row
+
+            for column, label in (('leader_hr_no', 'Team Leader HR No'), ('coordinator_hr_no', 'Team Coordinator HR No')):
+                hr_no = row[column]
+                if not hr_no:
+                    yield issue(excel_row, "error", f"Missing {label}.")
+                elif hr_no in first_seen_hr:
+                    yield issue(excel_row, "error", f"HR No '{hr_no}' is already used on row {first_seen_hr[hr_no]}.")
+                else:
+                    first_seen_hr[hr_no] = excel_row
+
+            batch.append((excel_row, row))
+            if len(batch) >= DRY_RUN_BATCH_SIZE:
+                yield from check_batch(batch)
+                batch = []
+        if batch:
+            yield from check_batch(batch)
+    except Exception as e:
+        yield issue(None, "error", f"Could not read the Excel file: {str(e)}")
+    finally:
+        db.close()
+
+    yield json.dumps({"summary": {
+        "rows": counts["rows"],
+        "errors": counts["error"],
+        "warnings": counts["warning"],
+        "valid": counts["error"] == 0,
+    }}) + "\n"
+
+
+@router.post("/teams/{ba_id}", status_code=status.HTTP_202_ACCEPTED, summary="Validate and then replace all teams for a BA from an Excel file")
 def upload_teams_from_excel(
     ba_id: int,
     file: UploadFile = File(...),
+    dry_run: bool = Query(False, description="Only validate the sheet and stream back every problem; nothing is written."),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role("ba_coordinator"))
+    current_user: Principal = Depends(require_role("ba_coordinator"))
 ):
     """
-    Performs a 'clean install' of teams for the BA in a safe, atomic transaction.
+    Validates the sheet and queues a 'clean install' of teams for the BA as a
+    background job. Returns the job id at once; poll GET /jobs/{job_id}.
+    With dry_run=true, returns an NDJSON validation report instead.
     """
     campaign_id = 1 # Hardcoded campaign ID
     
-    if current_user.employee.team.ba_id != ba_id:
+    if current_user.ba_id != ba_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to manage this BA")
 
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file type.")
+    # Legacy .xls would need xlrd, which is not a dependency.
+    if not file.filename.endswith('.xlsx'):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file type. Upload an .xlsx file.")
+
+    if dry_run:
+        return StreamingResponse(_team_sheet_report(file.file.read(), ba_id), media_type="application/x-ndjson")
 
     try:
         df = pd.read_excel(file.file, header=0, usecols="A:F", dtype=str)
-        df.columns = ['team_code', 'team_name', 'leader_name', 'coordinator_name', 'leader_hr_no', 'coordinator_hr_no']
+        df.columns = TEAM_SHEET_COLUMNS
         df.dropna(how='all', inplace=True)
-        
-        validation_pattern = re.compile(r"^[A-Z]{3}_\d{2}$")
-        for index, row in df.iterrows():
-            team_code = str(row['team_code']).strip().upper()
-            if not validation_pattern.match(team_code):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid Team Code on row {index + 2}: '{row['team_code']}'. Required format is 'XXX_01'."
-                )
-
-        teams_to_delete = db.query(Team).filter(Team.ba_id == ba_id, Team.team_code.notlike('%_00')).all()
-        for team in teams_to_delete:
-            db.query(Employee).filter(Employee.team_id == team.id).update({"team_id": current_user.employee.team_id})
-            db.delete(team)
-
-        db.flush()
-
-        created_teams = 0
-        created_users = 0
-        for index, row in df.iterrows():
-            team_code = str(row['team_code']).strip().upper()
-            team = Team(team_code=team_code, name=str(row['team_name']).strip(), campaign_id=campaign_id, ba_id=ba_id)
-            db.add(team)
-            db.flush()
-
-            leader_hr_no = str(row['leader_hr_no']).strip()
-            leader = db.query(Employee).filter(Employee.employee_code == leader_hr_no).first()
-            if not leader:
-                leader = Employee(name=str(row['leader_name']).strip(), employee_code=leader_hr_no, role='team_leader', team_id=team.id)
-                db.add(leader)
-                db.flush()
-                db.add(User(username=leader_hr_no, password_hash=get_password_hash("BSNL@2025"), role='team_leader', employee_id=leader.id, force_password_reset=True))
-                created_users += 1
-            else:
-                leader.team_id = team.id
-                leader.role = 'team_leader'
-
-            coordinator_hr_no = str(row['coordinator_hr_no']).strip()
-            coordinator = db.query(Employee).filter(Employee.employee_code == coordinator_hr_no).first()
-            if not coordinator:
-                coordinator = Employee(name=str(row['coordinator_name']).strip(), employee_code=coordinator_hr_no, role='team_coordinator', team_id=team.id)
-                db.add(coordinator)
-                db.flush()
-                db.add(User(username=coordinator_hr_no, password_hash=get_password_hash("BSNL@2025"), role='team_coordinator', employee_id=coordinator.id, force_password_reset=True))
-                created_users += 1
-            else:
-                coordinator.team_id = team.id
-                coordinator.role = 'team_coordinator'
-            
-            created_teams += 1
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Could not read the Excel file: {str(e)}")
+
+    df = df.fillna("").apply(lambda column: column.str.strip())
+    df['team_code'] = df['team_code'].str.upper()
+    errors = _validate_team_sheet(df)
+    if errors:
+        _raise_validation_errors(errors)
+
+    rows = df.to_dict(orient="records")
+    admin_team_id = current_user.team_id
+
+    def replace_teams(db: Session, job: provisioning.ProvisioningJob) -> str:
+        old_team_ids = select(Team.id).where(Team.ba_id == ba_id, Team.team_code.notlike('%_00'))
+
+        # Codes held by teams that survive the replacement (admin teams, other BAs).
+        taken = db.scalars(select(Team.team_code).where(
+            Team.team_code.in_([row['team_code'] for row in rows]),
+            Team.id.notin_(old_team_ids)
+        )).all()
+        if taken:
+            _raise_validation_errors([f"Team Code '{code}' already belongs to another team." for code in sorted(taken)])
+        if db.query(Activity.id).filter(Activity.team_id.in_(old_team_ids)).first():
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Existing teams already have logged activities and cannot be replaced.")
+
+        # Move everyone out of the old teams, then drop them and their targets.
+        db.execute(update(Employee).where(Employee.team_id.in_(old_team_ids)).values(team_id=admin_team_id), execution_options={"synchronize_session": False})
+        db.execute(delete(TeamTarget).where(TeamTarget.team_id.in_(old_team_ids)), execution_options={"synchronize_session": False})
+        db.execute(delete(Team).where(Team.ba_id == ba_id, Team.team_code.notlike('%_00')), execution_options={"synchronize_session": False})
+
+        # An empty sheet just clears the BA's teams: with no parameter sets the
+        # INSERT would run once with no values instead of not at all.
+        team_ids = db.scalars(
+            insert(Team).returning(Team.id, sort_by_parameter_order=True),
+            [{"team_code": row['team_code'], "name": row['team_name'], "campaign_id": campaign_id, "ba_id": ba_id} for row in rows]
+        ).all() if rows else []
+        job.processed = len(team_ids)
+
+        assignments = {}
+        for row, team_id in zip(rows, team_ids):
+            assignments[row['leader_hr_no']] = (row['leader_name'], 'team_leader', team_id)
+            assignments[row['coordinator_hr_no']] = (row['coordinator_name'], 'team_coordinator', team_id)
+
+        found = db.execute(select(Employee.employee_code, Employee.id, Employee.role).where(Employee.employee_code.in_(list(assignments)))).all()
+        protected = sorted(code for code, _, role in found if role in ("admin", "ba_coordinator"))
+        if protected:
+            _raise_validation_errors([f"HR No '{code}' belongs to an admin or BA coordinator and cannot lead or coordinate a team." for code in protected])
+        existing = {code: employee_id for code, employee_id, _ in found}
+        if existing:
+            db.execute(update(Employee), [
+                {"id": employee_id, "team_id": assignments[code][2], "role": assignments[code][1]}
+                for code, employee_id in existing.items()
+            ])
+
+        new_accounts = [
+            provisioning.NewAccount(name=name, employee_code=code, role=role, team_id=team_id)
+            for code, (name, role, team_id) in assignments.items() if code not in existing
+        ]
+        job.total = len(rows) + len(new_accounts)
+        provisioning.create_accounts(db, new_accounts, progress=lambda n: setattr(job, "processed", len(rows) + n))
 
         db.commit()
-        return {"message": f"Validation successful. Replaced teams for your BA. Created: {created_teams} teams, {created_users} users."}
+        # Leaders, coordinators and re-homed members have new team scopes.
+        invalidate_principal()
+        hierarchy.invalidate()
+        job.result = {"created_teams": len(team_ids), "created_users": len(new_accounts)}
+        return f"Validation successful. Replaced teams for your BA. Created: {len(team_ids)} teams, {len(new_accounts)} users."
+
+    job = provisioning.start_job("team_upload", current_user.username, len(rows), replace_teams)
+    return {"job_id": job.id, "status": job.status, "message": "Upload accepted. Processing in the background."}
+
 
-    except HTTPException as http_exc:
-        db.rollback()
-        raise http_exc
+# ============================ TARGET UPLOADS ============================
+
+def _read_target_table(file: UploadFile, owner_column: str) -> pd.DataFrame:
+    """Reads an XLSX or CSV target sheet into normalised string columns."""
+    try:
+        if file.filename.endswith('.csv'):
+            df = pd.read_csv(file.file, dtype=str)
+        # Legacy .xls would need xlrd, which is not a dependency.
+        elif file.filename.endswith('.xlsx'):
+            df = pd.read_excel(file.file, dtype=str)
+        else:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file type. Upload .xlsx or .csv.")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Could not read the file: {str(e)}")
+
+    df.columns = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
+    missing = [c for c in (owner_column, 'activity', 'target_value') if c not in df.columns]
+    if missing:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Missing column(s): {', '.join(missing)}. Expected {owner_column}, activity, target_value and optionally target_category.")
+    if 'target_category' not in df.columns:
+        df['target_category'] = ""
+    df = df[[owner_column, 'activity', 'target_value', 'target_category']].dropna(how='all')
+    return df.fillna("").apply(lambda column: column.str.strip())
+
+
+def _check_target_rows(df: pd.DataFrame, owner_column: str, owner_label: str, owner_ids: dict, activity_ids: dict, campaign_id: int, owner_field: str) -> Tuple[List[Tuple[int, str]], List[dict]]:
+    """
+    Validates a target sheet column by column. Returns every problem as
+    (excel_row, message), sorted by row, and the upsert rows.
+    """
+    excel_row = df.index.to_series() + 2
+    errors = []
+
+    owner_id = df[owner_column].str.upper().map(owner_ids)
+    unknown_owner = owner_id.isna()
+    errors += [(r, f"Unknown {owner_label} on row {r}: '{c}'.") for r, c in zip(excel_row[unknown_owner], df.loc[unknown_owner, owner_column])]
+
+    activity_id = df['activity'].str.lower().map(activity_ids)
+    unknown_activity = activity_id.isna()
+    errors += [(r, f"Unknown activity on row {r}: '{a}'.") for r, a in zip(excel_row[unknown_activity], df.loc[unknown_activity, 'activity'])]
+
+    value = pd.to_numeric(df['target_value'], errors='coerce')
+    bad_value = value.isna() | (value < 0) | (value % 1 != 0)
+    errors += [(r, f"Invalid target value on row {r}: '{v}'. Use a whole number of 0 or more.") for r, v in zip(excel_row[bad_value], df.loc[bad_value, 'target_value'])]
+
+    key = pd.DataFrame({'owner': owner_id, 'activity': activity_id, 'category': df['target_category']})
+    duplicated = key.duplicated(keep=False) & ~unknown_owner & ~unknown_activity
+    errors += [(r, f"Duplicate target on row {r} for {owner_label} '{c}' / '{a}'.") for r, c, a in zip(excel_row[duplicated], df.loc[duplicated, owner_column], df.loc[duplicated, 'activity'])]
+
+    if errors:
+        return sorted(errors, key=lambda error: error[0]), []
+
+    return [], [
+        {
+            "campaign_id": campaign_id,
+            owner_field: int(o),
+            "activity_type_id": int(a),
+            "target_value": int(v),
+            "target_category": c or None,
+        }
+        for o, a, v, c in zip(owner_id, activity_id, value, df['target_category'])
+    ]
+
+
+def _target_rows(df: pd.DataFrame, owner_column: str, owner_label: str, owner_ids: dict, activity_ids: dict, campaign_id: int, owner_field: str) -> List[dict]:
+    """Validates a target sheet and returns upsert rows, or raises one 400 listing every problem."""
+    errors, rows = _check_target_rows(df, owner_column, owner_label, owner_ids, activity_ids, campaign_id, owner_field)
+    if errors:
+        _raise_validation_errors([message for _, message in errors])
+    return rows
+
+
+def _target_sheet_report(errors: List[Tuple[int, str]], row_count: int):
+    """Streams a target dry run in the same NDJSON shape as the team sheet report."""
+    for excel_row, message in errors:
+        yield json.dumps({"row": int(excel_row), "level": "error", "message": message}) + "\n"
+    yield json.dumps({"summary": {"rows": row_count, "errors": len(errors), "warnings": 0, "valid": not errors}}) + "\n"
+
+
+def _require_campaign(db: Session, campaign_id: int):
+    if not db.get(Campaign, campaign_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Campaign not found")
+
+
+def _activity_ids(db: Session) -> dict:
+    return {name.lower(): activity_type_id for activity_type_id, name in db.query(ActivityType.id, ActivityType.name).all()}
+
+
+def _recalculate_scores(campaign_id: int):
+    """Runs one score recalculation after a target upload, with its own session."""
+    db = SessionLocal()
+    try:
+        recalculate_all_scores(db, campaign_id=campaign_id, trigger="target_upload")
     except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"A critical error occurred: {str(e)}")
\ No newline at end of file
+        print(f"--- ERROR recalculating scores after target upload: {e} ---")
+    finally:
+        db.close()
+
+
+@router.post("/targets/team/{ba_id}", summary="Upsert team targets for a BA from an Excel or CSV file")
+def upload_team_targets(
+    ba_id: int,
+    background_tasks: BackgroundTasks,
+    campaign_id: int = Query(1),
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False, description="Only validate the sheet and stream back every problem; nothing is written."),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_role("ba_coordinator"))
+):
+    """
+    Columns: team_code, activity, target_value, target_category (optional).
+    Every row is validated before anything is written; all targets are then
+    upserted in one transaction and the scores are recalculated once.
+    With dry_run=true, returns an NDJSON validation report instead.
+    """
+    if current_user.ba_id != ba_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to manage this BA")
+
+    _require_campaign(db, campaign_id)
+    df = _read_target_table(file, 'team_code')
+    team_ids = {code.upper(): team_id for team_id, code in db.query(Team.id, Team.team_code).filter(Team.ba_id == ba_id).all()}
+    checked = (df, 'team_code', 'team code', team_ids, _activity_ids(db), campaign_id, 'team_id')
+    if dry_run:
+        errors, _ = _check_target_rows(*checked)
+        return StreamingResponse(_target_sheet_report(errors, len(df)), media_type="application/x-ndjson")
+    rows = _target_rows(*checked)
+
+    saved = targets.upsert_targets(db, targets.TEAM, rows)
+    db.commit()
+    background_tasks.add_task(_recalculate_scores, campaign_id)
+    return {"message": f"Saved {len(saved)} team targets.", "saved": len(saved)}
+
+
+@router.post("/targets/ba", summary="Upsert BA targets from an Excel or CSV file")
+def upload_ba_targets(
+    background_tasks: BackgroundTasks,
+    campaign_id: int = Query(1),
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False, description="Only validate the sheet and stream back every problem; nothing is written."),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_role("admin"))
+):
+    """
+    Columns: ba_code, activity, target_value, target_category (optional).
+    Admin only. Same validation, dry run and single transaction as team targets.
+    """
+    _require_campaign(db, campaign_id)
+    df = _read_target_table(file, 'ba_code')
+    ba_ids = {name.upper(): ba_id for ba_id, name in db.query(BusinessArea.id, BusinessArea.name).all() if name}
+    checked = (df, 'ba_code', 'BA code', ba_ids, _activity_ids(db), campaign_id, 'ba_id')
+    if dry_run:
+        errors, _ = _check_target_rows(*checked)
+        return StreamingResponse(_target_sheet_report(errors, len(df)), media_type="application/x-ndjson")
+    rows = _target_rows(*checked)
+
+    saved = targets.upsert_targets(db, targets.BA, rows)
+    db.commit()
+    background_tasks.add_task(_recalculate_scores, campaign_id)
+    return {"message": f"Saved {len(saved)} BA targets.", "saved": len(saved)}
+
+
+@router.get("/jobs/{job_id}", summary="Poll the progress of a background upload job")
+def get_upload_job(job_id: str, current_user: Principal = Depends(get_current_active_principal)):
+    job = provisioning.get_job(job_id)
+    if not job or (job.owner != current_user.username and current_user.role != "admin"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found or expired.")
+    return job.to_dict()
@@ -5,13 +5,13 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import User
 from ..schemas import UserDetails, PasswordChange # <-- Import PasswordChange
-from ..auth import get_current_active_user, get_password_hash # <-- Import get_password_hash
+from ..auth import get_current_active_user, get_current_active_principal, get_password_hash, invalidate_principal, issue_refresh_token, revoke_refresh_tokens, Principal # <-- Import get_password_hash
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserDetails, summary="Get current user details")
-def get_current_user_details(current_user: User = Depends(get_current_active_user)):
-    if not current_user.employee:
+def get_current_user_details(current_user: Principal = Depends(get_current_active_principal)):
+    if not current_user.employee_id:
         raise HTTPException(status_code=404, detail="Employee details not found for this user.")
     
     # --- START MODIFICATION ---
@@ -19,10 +19,10 @@ def get_current_user_details(current_user: User = Depends(get_current_active_use
     return {
         "username": current_user.username, 
         "role": current_user.role, 
-        "employee_id": current_user.employee.id, 
-        "employee_name": current_user.employee.name, 
-        "ba_id": current_user.employee.team.ba_id if current_user.employee.team else None,
-        "team_id": current_user.employee.team_id,
+        "employee_id": current_user.employee_id, 
+        "employee_name": current_user.employee_name, 
+        "ba_id": current_user.ba_id,
+        "team_id": current_user.team_id,
         "force_password_reset": current_user.force_password_reset
     }
     # --- END MODIFICATION ---
@@ -49,8 +49,13 @@ def change_password(
     
     # Flip the flag to indicate the password has been changed
     current_user.force_password_reset = False
+
+    # Sessions started with the old password are ended; this one gets a new refresh token.
+    revoke_refresh_tokens(db, user_id=current_user.id)
+    refresh_token = issue_refresh_token(db, current_user.id)
     
     db.commit()
+    invalidate_principal(username=current_user.username)
     
-    return {"message": "Password changed successfully."}
+    return {"message": "Password changed successfully.", "refresh_token": refresh_token}
 # --- END OF ADDITION ---
\ No newline at end of file
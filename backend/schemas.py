@@ -3,7 +3,7 @@
 # ==============================================================================
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Optional, List, Generic, TypeVar
 
 
 # ==============================================================================
@@ -12,6 +12,10 @@ from typing import Optional, List
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     username: Optional[str] = None
@@ -128,6 +132,9 @@ class ActivityBase(BaseModel):
     is_lead: Optional[bool] = False
     requested_service: Optional[str] = None
     ftth_area_type: Optional[str] = None
+    client_id: Optional[str] = None # Generated on the device for offline sync
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class ActivityCreate(ActivityBase):
     pass
@@ -137,6 +144,7 @@ class Activity(ActivityBase):
     employee_id: int
     team_id: int
     logged_at: datetime
+    updated_at: Optional[datetime] = None
     
     # Add these nested objects to match the `joinedload` in the backend query
     employee: EmployeeInfo
@@ -233,4 +241,79 @@ class PressReleaseBase(BaseModel):
     media_outlet: str
 
 class PressReleaseCreate(PressReleaseBase):
-    pass
\ No newline at end of file
+    pass
+
+# --- Event listings ---
+
+class EventMediaRef(BaseModel):
+    sha256: str
+    content_type: Optional[str] = None
+    url: str
+    thumbnail_url: Optional[str] = None
+
+class Mela(MelaBase):
+    id: int
+    campaign_id: int
+    team_id: int
+    employee_id: int
+    media: List[EventMediaRef] = []
+    model_config = ConfigDict(from_attributes=True)
+
+class BrandingActivity(BrandingActivityBase):
+    id: int
+    campaign_id: int
+    ba_id: int
+    employee_id: int
+    media: List[EventMediaRef] = []
+    model_config = ConfigDict(from_attributes=True)
+
+class SpecialEvent(SpecialEventBase):
+    id: int
+    campaign_id: int
+    ba_id: int
+    employee_id: int
+    media: List[EventMediaRef] = []
+    model_config = ConfigDict(from_attributes=True)
+
+class PressRelease(PressReleaseBase):
+    id: int
+    campaign_id: int
+    ba_id: int
+    employee_id: int
+    media: List[EventMediaRef] = []
+    model_config = ConfigDict(from_attributes=True)
+
+class EventScopeCount(BaseModel):
+    scope_id: int # team id for melas, BA id for the other events
+    count: int
+
+EventT = TypeVar("EventT")
+
+class EventPage(BaseModel, Generic[EventT]):
+    items: List[EventT]
+    # Pass back as `cursor` to fetch the next page; None on the last page.
+    next_cursor: Optional[int] = None
+    # Events per scope in the campaign and filter, regardless of the page.
+    counts: List[EventScopeCount]
+    total: int
+
+
+# --- Scoring runs ---
+
+class ScoringPhase(BaseModel):
+    phase: str
+    duration_ms: float
+    rows: Optional[int] = None
+
+class ScoringRun(BaseModel):
+    id: int
+    campaign_id: int
+    trigger: str
+    status: str
+    started_at: datetime
+    duration_ms: float
+    score_rows: int
+    phases: List[ScoringPhase]
+    error: Optional[str] = None
+    profile_path: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
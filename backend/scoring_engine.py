@@ -2,9 +2,25 @@
 # File: backend/scoring_engine.py (Corrected and Final Version)
 # Description: This version calculates scores for BAs, Teams, and Individuals.
 # ==============================================================================
+import os
+import time
+import uuid
+import cProfile
+from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
-from . import models
+from . import models, events, metrics
+
+# Finished runs kept in scoring_runs; older ones (and their profile dumps) are pruned.
+SCORING_RUN_HISTORY = int(os.getenv("SCORING_RUN_HISTORY", "2000"))
+SCORING_PROFILE_DIRECTORY = os.getenv(
+    "SCORING_PROFILE_DIRECTORY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+)
+
+SCORING_RUN_SECONDS = metrics.Histogram("scoring_run_duration_seconds", "Duration of full score recalculations.", buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+SCORING_PHASE_SECONDS = metrics.Histogram("scoring_phase_duration_seconds", "Duration of each phase of a score recalculation.", ("phase",), buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+SCORE_ROWS_WRITTEN = metrics.Counter("scoring_score_rows_written_total", "Score rows written by recalculations.")
+SCORING_LAST_SUCCESS = metrics.Gauge("scoring_last_success_timestamp_seconds", "Unix time the last recalculation finished.", ("campaign_id",))
 
 def _get_targets(db: Session, campaign_id: int) -> dict:
     """Fetches all team and BA targets for a campaign."""
@@ -48,15 +64,15 @@ def _calculate_proportional_score(achieved: int, target: int, max_points: float)
     # Ensure score does not exceed the maximum allowed points.
     return min(score, max_points)
 
-def recalculate_all_scores(db: Session, campaign_id: int):
+def _recalculate(db: Session, campaign_id: int, phases: metrics.PhaseTimer) -> int:
     """
-    The main function to orchestrate the entire scoring process for a campaign.
+    The entire scoring process for a campaign, one lap of `phases` per
+    numbered step. Returns the number of score rows written.
     """
-    print(f"Starting score recalculation for campaign {campaign_id}...")
-
     # Clear out all previous scores for this campaign to start fresh
-    db.query(models.Score).filter(models.Score.campaign_id == campaign_id).delete()
+    deleted = db.query(models.Score).filter(models.Score.campaign_id == campaign_id).delete()
     db.commit()
+    phases.lap("clear", deleted)
 
     # --- 1. Fetch all necessary data upfront for efficiency ---
     teams = db.query(models.Team).filter(models.Team.campaign_id == campaign_id).all()
@@ -64,6 +80,8 @@ def recalculate_all_scores(db: Session, campaign_id: int):
     activity_types = {at.name: at.id for at in db.query(models.ActivityType).all()}
     targets = _get_targets(db, campaign_id)
     activity_counts = _get_activity_counts(db, campaign_id)
+    mela_counts = events.grouped_counts(db, events.MELA, campaign_id)
+    phases.lap("fetch", len(teams) + len(employees) + len(targets) + len(activity_counts) + len(mela_counts))
 
     all_scores_to_save = []
     
@@ -97,12 +115,13 @@ def recalculate_all_scores(db: Session, campaign_id: int):
             involvement_points = _calculate_proportional_score(participating_employees, total_employees_in_team, 10.0)
             team_scores_list.append(models.Score(campaign_id=campaign_id, entity_id=team.id, entity_type='team', parameter="Employee involvement", points=involvement_points))
         
-        mela_count = db.query(func.count(models.Mela.id)).filter(models.Mela.team_id == team.id, models.Mela.campaign_id == campaign_id).scalar() or 0
+        mela_count = mela_counts.get(team.id, 0)
         mela_target = 10 # Assuming a static target for demonstration
         mela_points = _calculate_proportional_score(mela_count, mela_target, 4.0)
         team_scores_list.append(models.Score(campaign_id=campaign_id, entity_id=team.id, entity_type='team', parameter="No of Melas", points=mela_points))
     
     all_scores_to_save.extend(team_scores_list)
+    phases.lap("team_scoring", len(team_scores_list))
 
     # --- 3. Aggregate Team Scores to BAs & Apply BA Rules ---
     ba_scores_map = {}
@@ -129,19 +148,25 @@ def recalculate_all_scores(db: Session, campaign_id: int):
              final_ba_scores.append(models.Score(campaign_id=campaign_id, entity_id=ba_id, entity_type='ba', parameter=param, points=points))
     
     all_scores_to_save.extend(final_ba_scores)
+    phases.lap("ba_aggregation", len(final_ba_scores))
 
     # --- 4. BA-Level Event & Bonus Scoring ---
+    produced = len(all_scores_to_save)
     business_areas = db.query(models.BusinessArea).all()
+    special_event_counts = events.grouped_counts(db, events.SPECIAL_EVENT, campaign_id)
+    press_release_counts = events.grouped_counts(db, events.PRESS_RELEASE, campaign_id)
     for ba in business_areas:
-        event_count = db.query(func.count(models.SpecialEvent.id)).filter(models.SpecialEvent.ba_id == ba.id, models.SpecialEvent.campaign_id == campaign_id).scalar()
+        event_count = special_event_counts.get(ba.id, 0)
         if event_count > 0:
             all_scores_to_save.append(models.Score(campaign_id=campaign_id, entity_id=ba.id, entity_type='ba', parameter="Special Events", points=5.0))
 
-        release_count = db.query(func.count(models.PressRelease.id)).filter(models.PressRelease.ba_id == ba.id, models.PressRelease.campaign_id == campaign_id).scalar()
+        release_count = press_release_counts.get(ba.id, 0)
         if release_count >= 3:
             all_scores_to_save.append(models.Score(campaign_id=campaign_id, entity_id=ba.id, entity_type='ba', parameter="Bonus Points", points=15.0))
-            
+    phases.lap("events_bonus", len(all_scores_to_save) - produced)
+
     # --- 5. Delayed Scoring: House Visits & Leads (Aggregates to Team) ---
+    produced = len(all_scores_to_save)
     employees_with_leads = db.query(models.Employee).join(models.Activity).filter(
         models.Activity.campaign_id == campaign_id,
         models.Activity.is_lead == True
@@ -157,7 +182,10 @@ def recalculate_all_scores(db: Session, campaign_id: int):
                 all_scores_to_save.append(models.Score(campaign_id=campaign_id, entity_id=emp.team_id, entity_type='team', parameter="BNU leads", points=1.0))
                 all_scores_to_save.append(models.Score(campaign_id=campaign_id, entity_id=emp.team_id, entity_type='team', parameter="Urban leads", points=1.0))
     
+    phases.lap("leads", len(all_scores_to_save) - produced)
+
     # --- 6. Calculate Individual Employee Scores (Direct Points) ---
+    produced = len(all_scores_to_save)
     point_values = {
         "MNP": 30.0, "SIM Sales": 20.0, "4G SIM Upgradation": 5.0, 
         "BNU connections": 10.0, "Urban connections": 5.0, "House Visit": 4.0
@@ -185,12 +213,95 @@ def recalculate_all_scores(db: Session, campaign_id: int):
                 points=points
             ))
 
+    phases.lap("employee_scoring", len(all_scores_to_save) - produced)
+
     # --- 7. Bulk Save to Database ---
     if all_scores_to_save:
         db.bulk_save_objects(all_scores_to_save)
         
     db.commit()
-    print(f"Score recalculation complete. {len(all_scores_to_save)} score entries created.")
+    phases.lap("bulk_save", len(all_scores_to_save))
+    return len(all_scores_to_save)
+
+
+def _save_profile(profiler: cProfile.Profile, campaign_id: int) -> str:
+    os.makedirs(SCORING_PROFILE_DIRECTORY, exist_ok=True)
+    path = os.path.join(SCORING_PROFILE_DIRECTORY, f"scoring_{campaign_id}_{datetime.now(timezone.utc):%Y%m%dT%H%M%S}_{uuid.uuid4().hex[:8]}.prof")
+    profiler.dump_stats(path)
+    return path
+
+
+def _record_run(db: Session, campaign_id: int, trigger: str, status: str, started_at: datetime, phases: metrics.PhaseTimer,
+                score_rows: int, error: str = None, profiler: cProfile.Profile = None) -> models.ScoringRun:
+    """Stores the run in scoring_runs and prunes the history beyond SCORING_RUN_HISTORY."""
+    run = models.ScoringRun(
+        campaign_id=campaign_id,
+        trigger=trigger,
+        status=status,
+        started_at=started_at,
+        duration_ms=round(phases.total * 1000, 2),
+        score_rows=score_rows,
+        phases=phases.report(),
+        error=error,
+        profile_path=_save_profile(profiler, campaign_id) if profiler else None,
+    )
+    db.add(run)
+    db.flush()
+    expired = db.query(models.ScoringRun.id, models.ScoringRun.profile_path).filter(models.ScoringRun.id <= run.id - SCORING_RUN_HISTORY).all()
+    if expired:
+        db.query(models.ScoringRun).filter(models.ScoringRun.id.in_([run_id for run_id, _ in expired])).delete(synchronize_session=False)
+    db.commit()
+    for _, profile_path in expired:
+        if profile_path and os.path.exists(profile_path):
+            os.remove(profile_path)
+    return run
+
+
+def run_report(run: models.ScoringRun) -> dict:
+    return {
+        "id": run.id,
+        "campaign_id": run.campaign_id,
+        "trigger": run.trigger,
+        "status": run.status,
+        "started_at": run.started_at,
+        "duration_ms": run.duration_ms,
+        "score_rows": run.score_rows,
+        "phases": run.phases,
+        "error": run.error,
+        "profile_path": run.profile_path,
+    }
+
+
+def recalculate_all_scores(db: Session, campaign_id: int, trigger: str = "manual", profile: bool = False) -> dict:
+    """
+    The main function to orchestrate the entire scoring process for a campaign.
+    Every run is timed phase by phase and recorded in scoring_runs; the run
+    report is returned. With profile=True the run executes under cProfile and
+    the dump is saved for download (pstats format; open with snakeviz).
+    """
+    print(f"Starting score recalculation for campaign {campaign_id}...")
+    started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    phases = metrics.PhaseTimer(SCORING_PHASE_SECONDS)
+    profiler = cProfile.Profile() if profile else None
+    try:
+        score_rows = profiler.runcall(_recalculate, db, campaign_id, phases) if profiler else _recalculate(db, campaign_id, phases)
+    except Exception as e:
+        db.rollback()
+        phases.lap("failed")
+        try:
+            _record_run(db, campaign_id, trigger, "failed", started_at, phases, 0, str(e), profiler)
+        except Exception as record_error:
+            db.rollback()
+            print(f"--- Could not record the failed scoring run: {record_error} ---")
+        raise
+
+    run = _record_run(db, campaign_id, trigger, "succeeded", started_at, phases, score_rows, profiler=profiler)
+    SCORING_RUN_SECONDS.observe(phases.total)
+    SCORE_ROWS_WRITTEN.inc(score_rows)
+    SCORING_LAST_SUCCESS.set(time.time(), campaign_id=campaign_id)
+    slowest = max(phases.durations, key=phases.durations.get)
+    print(f"Score recalculation complete. {score_rows} score entries created in {phases.total:.2f}s (slowest phase: {slowest}).")
+    return run_report(run)
 
 
 
@@ -0,0 +1,113 @@
+# ==============================================================================
+# File: backend/slow_queries.py
+# Description: Opt-in slow query log. Statements slower than SLOW_QUERY_MS are
+# kept in a bounded in-memory ring buffer with the route that issued them, the
+# shape of their parameters and the database's query plan, so degrading
+# queries can be found from GET /api/admin/slow-queries without a profiler.
+# - Timing comes from the hooks in sql_stats.py (SQL_INSTRUMENTATION=1).
+# - EXPLAIN (EXPLAIN QUERY PLAN on SQLite) runs on a separate pooled
+#   connection in a background thread, never inside the request's
+#   transaction. Plans are cached per statement shape.
+# - Parameter values are not stored, only their types: they can hold
+#   customer mobiles and other personal data.
+# ==============================================================================
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from .cache import TTLCache
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0")) # 0 disables the log
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+
+_EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+_EXPLAINABLE = ("select", "with", "update", "delete")
+
+
+def parameters_shape(parameters):
+    """The types of the bound parameters, without their values."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, size: int, explain: bool):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self._entries: deque = deque(maxlen=max(1, size))
+        self._lock = threading.Lock()
+        self._plans = TTLCache("slow_query_plans", ttl=600, max_entries=500)
+        self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def record(self, engine, statement: str, parameters, executemany: bool, elapsed_ms: float, shape: str, route: Optional[str]):
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed_ms, 2),
+            "route": route,
+            "statement": statement,
+            "shape": shape,
+            "parameters": "executemany" if executemany else parameters_shape(parameters),
+            "plan": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+        if not self.explain or executemany or not statement.lstrip().lower().startswith(_EXPLAINABLE):
+            return
+        prefix = _EXPLAIN_PREFIXES.get(engine.dialect.name)
+        if prefix is None:
+            return
+        cached = self._plans.get(shape)
+        if cached is not None:
+            entry["plan"] = cached
+            return
+        self._explainer.submit(self._explain, engine, prefix, statement, parameters, shape, entry)
+
+    def _explain(self, engine, prefix: str, statement: str, parameters, shape: str, entry: dict):
+        try:
+            # A raw pooled connection: outside any request transaction and invisible to the SQL hooks.
+            connection = engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute(prefix + statement, parameters or ())
+                rows = cursor.fetchall()
+                connection.rollback()
+            finally:
+                connection.close()
+            if engine.dialect.name == "sqlite":
+                # (id, parent, notused, detail)
+                plan = "\n".join(str(row[-1]) for row in rows)
+            else:
+                plan = "\n".join(str(row[0]) for row in rows)
+        except Exception as e:
+            plan = f"EXPLAIN failed: {e}"
+        self._plans.set(shape, plan)
+        entry["plan"] = plan
+
+    def entries(self, limit: Optional[int] = None) -> List[dict]:
+        """Newest first."""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self._plans.invalidate()
+
+    def shutdown(self):
+        self._explainer.shutdown(wait=False)
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_EXPLAIN)
@@ -0,0 +1,152 @@
+# ==============================================================================
+# File: backend/sql_stats.py
+# Description: Per-request SQL instrumentation, to catch N+1 query patterns.
+# - SQLAlchemy engine events time every statement and add it to the stats of
+#   the request being served (found through a context variable, which
+#   Starlette copies into the threadpool that runs sync routes).
+# - Statements are grouped by shape: bound values and expanded IN lists are
+#   collapsed, so one query per team shows up as one shape repeated N times.
+# - Each response gets a Server-Timing header (visible in the browser's
+#   network panel). A JSON log line is printed when a shape repeats more than
+#   SQL_REPEAT_WARN_THRESHOLD times, or for every request with SQL_STATS_LOG=all.
+#
+# Queries made while a streamed response body is produced, or from background
+# threads, are not counted against the request. The same hooks feed the
+# opt-in slow query log (slow_queries.py).
+# ==============================================================================
+import os
+import re
+import json
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .slow_queries import slow_query_log
+
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "1") == "1"
+SQL_REPEAT_WARN_THRESHOLD = int(os.getenv("SQL_REPEAT_WARN_THRESHOLD", "10"))
+SQL_STATS_LOG = os.getenv("SQL_STATS_LOG", "warnings") # "all", "warnings" or "off"
+
+_PARAMETER_PATTERN = re.compile(r"%\(\w+\)s|'(?:[^']|'')*'")
+_NUMBER_PATTERN = re.compile(r"\b\d+(\.\d+)?\b")
+_PLACEHOLDER_LIST_PATTERN = re.compile(r"\(\s*\?(\s*,\s*\?)*\s*\)")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with bound values, literals and IN-list lengths collapsed to '?'."""
+    shape = _PARAMETER_PATTERN.sub("?", statement)
+    shape = _NUMBER_PATTERN.sub("?", shape)
+    shape = _PLACEHOLDER_LIST_PATTERN.sub("(?)", shape)
+    return _WHITESPACE_PATTERN.sub(" ", shape).strip()
+
+
+class RequestQueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Counter = Counter()
+        self.scope: Optional[dict] = None
+
+    def record(self, statement: str, elapsed_ms: float) -> str:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms, self.slowest_statement = elapsed_ms, statement
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        return shape
+
+    @property
+    def route(self) -> Optional[str]:
+        """The matched route template, e.g. "/api/teams/{team_id}", once routing has happened."""
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")
+        return f"{self.scope.get('method')} {getattr(route, 'path', None) or self.scope.get('path')}"
+
+    def repeated_shapes(self, threshold: int) -> list:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("sql_request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("sql_stats_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["sql_stats_started"].pop()) * 1000
+    stats = _current.get()
+    shape = stats.record(statement, elapsed_ms) if stats is not None else None
+    if slow_query_log.enabled and elapsed_ms >= slow_query_log.threshold_ms:
+        slow_query_log.record(conn.engine, statement, parameters, executemany, elapsed_ms,
+                              shape or statement_shape(statement), stats.route if stats is not None else None)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time.
+    started = exception_context.connection.info.get("sql_stats_started") if exception_context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def install(engine: Engine):
+    """Attaches the timing hooks to `engine`. Safe to call more than once."""
+    if not SQL_INSTRUMENTATION or event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def server_timing(stats: RequestQueryStats, app_ms: float) -> str:
+    return ", ".join([
+        f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"',
+        f'db-slowest;dur={stats.slowest_ms:.1f}',
+        f'app;dur={app_ms:.1f}',
+    ])
+
+
+def _log(request: Request, status_code: int, stats: RequestQueryStats, app_ms: float, repeated: list):
+    print(json.dumps({
+        "event": "sql_n_plus_one" if repeated else "sql_stats",
+        "method": request.method,
+        "path": request.url.path,
+        "status": status_code,
+        "duration_ms": round(app_ms, 1),
+        "queries": stats.count,
+        "db_ms": round(stats.total_ms, 1),
+        "slowest_ms": round(stats.slowest_ms, 1),
+        "slowest_statement": statement_shape(stats.slowest_statement)[:300] if stats.slowest_statement else None,
+        "repeated": [{"count": count, "statement": shape[:300]} for shape, count in repeated],
+    }))
+
+
+async def sql_stats_middleware(request: Request, call_next):
+    if not SQL_INSTRUMENTATION:
+        return await call_next(request)
+
+    stats = RequestQueryStats()
+    stats.scope = request.scope
+    token = _current.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+    app_ms = (time.perf_counter() - started) * 1000
+
+    response.headers["Server-Timing"] = server_timing(stats, app_ms)
+    repeated = stats.repeated_shapes(SQL_REPEAT_WARN_THRESHOLD)
+    if SQL_STATS_LOG == "all" or (repeated and SQL_STATS_LOG == "warnings"):
+        _log(request, response.status_code, stats, app_ms, repeated)
+    return response
@@ -0,0 +1,49 @@
+# ==============================================================================
+# File: backend/targets.py
+# Description: Set-based upserts for team and BA targets, shared by the
+# target grid endpoints and the bulk target uploads. A whole batch is written
+# with one INSERT ... ON CONFLICT DO UPDATE on the target key, so the size of
+# the batch does not change the number of round trips. The caller commits.
+# ==============================================================================
+from typing import List, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .models import TeamTarget, BATarget
+from .models.target import TEAM_TARGET_KEY, BA_TARGET_KEY
+
+# (model, column that identifies the owner of the target, conflict key)
+TEAM = (TeamTarget, "team_id", TEAM_TARGET_KEY)
+BA = (BATarget, "ba_id", BA_TARGET_KEY)
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert_targets(db: Session, scope: Tuple, rows: List[dict]) -> list:
+    """
+    Inserts or updates `rows` (dicts with campaign_id, owner id,
+    activity_type_id, target_value and optional target_category) for the
+    scope TEAM or BA and returns the resulting ORM rows. Later rows win when
+    a key repeats.
+    """
+    model, owner, key = scope
+    latest = {}
+    for row in rows:
+        category = row.get("target_category")
+        latest[(row["campaign_id"], row[owner], row["activity_type_id"], category or "")] = {
+            "campaign_id": row["campaign_id"],
+            owner: row[owner],
+            "activity_type_id": row["activity_type_id"],
+            "target_value": row["target_value"],
+            "target_category": category,
+        }
+    if not latest:
+        return []
+
+    insert = _DIALECT_INSERTS[db.get_bind().dialect.name](model)
+    statement = insert.on_conflict_do_update(
+        index_elements=list(key),
+        set_={"target_value": insert.excluded.target_value}
+    ).returning(model)
+    return db.scalars(statement, list(latest.values()), execution_options={"populate_existing": True}).all()
@@ -0,0 +1,69 @@
+# ==============================================================================
+# File: backend/tests/conftest.py
+# Description: Shared fixtures. Every test runs against a freshly seeded
+# SQLite database in a temporary directory (via SQLITE_PATH, set before the
+# backend is imported) with the in-process caches emptied, and stores media
+# under its own tmp_path. Run with `python -m pytest -q` from the repo root.
+# ==============================================================================
+import os
+import tempfile
+
+os.environ["ENV"] = "development"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sales-portal-tests-"), "sales_portal.db")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import media, provisioning, thumbnails
+from backend.cache import caches
+from backend.database import SessionLocal
+from backend.dedup import mobile_dedup
+from backend.idempotency import store as idempotency_store
+from backend.main import app
+from backend.models import ActivityType
+from backend.seed_db import seed_database
+
+PASSWORD = "pwd" # seed_db gives every user this password
+
+
+@pytest.fixture(autouse=True)
+def seeded_database(tmp_path, monkeypatch):
+    seed_database()
+    for cache in caches.values():
+        cache.invalidate()
+    mobile_dedup.reset()
+    idempotency_store.clear()
+    monkeypatch.setattr(media, "MEDIA_DIRECTORY", str(tmp_path / "media"))
+    yield
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Not used as a context manager, so the scheduler and other startup work stay off.
+    yield TestClient(app)
+    thumbnails.shutdown()
+    provisioning.shutdown()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def login(client):
+    """Returns the Authorization header for a seeded user."""
+    def _login(username: str) -> dict:
+        response = client.post("/api/auth/token", data={"username": username, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return _login
+
+
+@pytest.fixture
+def activity_types(db):
+    return {name: activity_type_id for activity_type_id, name in db.query(ActivityType.id, ActivityType.name).all()}
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from backend.dedup import CountingBloomFilter, backfill_normalized_mobiles, mobile_candidates, normalize_mobile
+from backend.models import Activity, Employee
+
+
+@pytest.mark.parametrize("raw", ["+91 98470 12345", "098470-12345", "919847012345", "9847012345", " 98470 12345 "])
+def test_normalize_mobile(raw):
+    assert normalize_mobile(raw) == "9847012345"
+
+
+def test_mobile_candidates_cover_legacy_forms():
+    assert mobile_candidates("+91 98470 12345") == ["9847012345", "+91 98470 12345", "+919847012345", "919847012345", "09847012345"]
+
+
+def test_counting_bloom_filter_removes_without_false_negatives():
+    bloom = CountingBloomFilter(expected_entries=100, false_positive_rate=0.01)
+    bloom.add("1:9847012345")
+    bloom.add("1:9847012346")
+    bloom.remove("1:9847012345")
+
+    assert "1:9847012345" not in bloom
+    assert "1:9847012346" in bloom
+    # Removing something never added leaves the other entries alone.
+    bloom.remove("1:0000000000")
+    assert "1:9847012346" in bloom
+
+
+def _legacy_activity(db, activity_type_id, mobile):
+    employee = db.query(Employee).filter(Employee.employee_code == "TM_TVM01").one()
+    activity = Activity(campaign_id=1, employee_id=employee.id, team_id=employee.team_id, activity_type_id=activity_type_id,
+                        customer_mobile=mobile, logged_at=datetime(2025, 8, 2))
+    db.add(activity)
+    db.commit()
+    return activity.id
+
+
+def test_submission_matches_a_mobile_stored_before_normalisation(client, db, login, activity_types):
+    _legacy_activity(db, activity_types["MNP"], "+919847012345")
+    response = client.post("/api/activities/", headers=login("member_titans"),
+                           json={"activity_type_id": activity_types["MNP"], "customer_mobile": "98470 12345", "campaign_id": 1})
+
+    assert response.status_code == 409
+
+
+def test_backfill_normalises_and_reports_collisions(db, activity_types):
+    legacy = _legacy_activity(db, activity_types["MNP"], "+91 98470 12345")
+    colliding = _legacy_activity(db, activity_types["MNP"], "098470-12345")
+    other_type = _legacy_activity(db, activity_types["SIM Sales"], "0 98470 12345")
+
+    report = backfill_normalized_mobiles(db, batch_size=2)
+
+    assert report == {"updated": [legacy, other_type], "collisions": [colliding]}
+    stored = dict(db.query(Activity.id, Activity.customer_mobile).all())
+    assert stored == {legacy: "9847012345", colliding: "098470-12345", other_type: "9847012345"}
+
+
+def test_resubmitted_mobile_in_another_format_is_a_duplicate(client, login, activity_types):
+    headers = login("member_titans")
+    body = {"activity_type_id": activity_types["MNP"], "campaign_id": 1}
+    first = client.post("/api/activities/", headers=headers, json={**body, "customer_mobile": "9847012345"})
+    again = client.post("/api/activities/", headers=headers, json={**body, "customer_mobile": "+91 98470-12345"})
+
+    assert first.status_code == 201
+    assert again.status_code == 409
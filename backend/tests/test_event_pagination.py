@@ -0,0 +1,66 @@
+from backend.models import SpecialEvent, Team
+
+EVENT_FORM = {"event_date": "2025-08-05T10:00:00", "event_type": "Expo", "campaign_id": "1"}
+MELA_FORM = {"mela_date": "2025-08-02T00:00:00", "territory": "East", "participants_count": "3", "campaign_id": "1"}
+
+
+def _special_events(client, db, headers, count, prefix):
+    for i in range(count):
+        files = [("media", (f"{prefix}{i}.pdf", f"{prefix}{i}".encode(), "application/pdf"))]
+        response = client.post("/api/events/special-event", headers=headers, data={**EVENT_FORM, "location": f"{prefix}{i}"}, files=files)
+        assert response.status_code == 201, response.text
+    return [event_id for (event_id,) in db.query(SpecialEvent.id).filter(SpecialEvent.location.startswith(prefix)).order_by(SpecialEvent.id)]
+
+
+def _pages(client, headers, url, limit):
+    pages, cursor = [], None
+    while True:
+        params = {"campaign_id": 1, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get(url, headers=headers, params=params).json()
+        pages.append([item["id"] for item in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages, page
+
+
+def test_keyset_pages_walk_newest_first_without_gaps(client, db, login):
+    headers = login("ba_tvm")
+    ids = _special_events(client, db, headers, 5, "tvm")
+    _special_events(client, db, login("ba_ekm"), 2, "ekm")
+
+    pages, last = _pages(client, headers, "/api/events/special-event", limit=2)
+
+    assert pages == [ids[::-1][0:2], ids[::-1][2:4], ids[::-1][4:]]
+    assert last["total"] == 5
+    assert last["items"][0]["media"][0]["content_type"] == "application/pdf"
+
+
+def test_exact_multiple_of_the_page_size_ends_without_an_empty_page(client, db, login):
+    headers = login("ba_tvm")
+    ids = _special_events(client, db, headers, 4, "tvm")
+
+    pages, _ = _pages(client, headers, "/api/events/special-event", limit=2)
+    assert pages == [ids[::-1][0:2], ids[::-1][2:4]]
+
+
+def test_admin_sees_every_ba_with_grouped_counts(client, db, login):
+    _special_events(client, db, login("ba_tvm"), 3, "tvm")
+    _special_events(client, db, login("ba_ekm"), 2, "ekm")
+
+    page = client.get("/api/events/special-event?campaign_id=1", headers=login("admin")).json()
+    assert page["counts"] == [{"scope_id": 1, "count": 3}, {"scope_id": 2, "count": 2}]
+    assert page["total"] == 5
+    assert client.get("/api/events/special-event?campaign_id=1", headers=login("ba_ekm")).json()["total"] == 2
+
+
+def test_melas_are_scoped_to_the_callers_ba(client, db, login):
+    leader = login("leader_titans")
+    for i in range(3):
+        files = {"photo": (f"m{i}.pdf", f"mela{i}".encode(), "application/pdf")}
+        assert client.post("/api/events/mela", headers=leader, data={**MELA_FORM, "location": f"M{i}"}, files=files).status_code == 201
+    strikers = db.query(Team.id).filter(Team.team_code == "EKM_01").scalar()
+
+    page = client.get("/api/events/mela?campaign_id=1&limit=2", headers=leader).json()
+    assert len(page["items"]) == 2 and page["next_cursor"] is not None
+    assert client.get("/api/events/mela?campaign_id=1", headers=login("ba_ekm")).json()["total"] == 0
+    assert client.get(f"/api/events/mela?campaign_id=1&team_id={strikers}", headers=leader).status_code == 403
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from backend import idempotency
+from backend.idempotency import IdempotencyMiddleware, _BodyHasher
+
+MELA_FORM = {"mela_date": "2025-08-02T00:00:00", "location": "Market", "territory": "East", "participants_count": "3", "campaign_id": "1"}
+CLIPPING = {"photo": ("clipping.pdf", b"%PDF-1.4 test", "application/pdf")}
+
+
+def _activity(activity_types, mobile="9000000001"):
+    return {"activity_type_id": activity_types["MNP"], "customer_mobile": mobile, "campaign_id": 1}
+
+
+def test_retry_replays_the_stored_response(client, login, activity_types):
+    headers = {**login("member_titans"), "Idempotency-Key": "k1"}
+    first = client.post("/api/activities/", headers=headers, json=_activity(activity_types))
+    retry = client.post("/api/activities/", headers=headers, json=_activity(activity_types))
+
+    assert first.status_code == 201
+    assert retry.status_code == 201
+    assert retry.headers["idempotency-replayed"] == "true"
+    assert retry.content == first.content
+
+
+def test_key_reused_with_a_different_body_is_rejected(client, login, activity_types):
+    headers = {**login("member_titans"), "Idempotency-Key": "k1"}
+    client.post("/api/activities/", headers=headers, json=_activity(activity_types))
+    reused = client.post("/api/activities/", headers=headers, json=_activity(activity_types, mobile="9000000002"))
+
+    assert reused.status_code == 422
+
+
+def test_multipart_retry_with_a_new_boundary_is_replayed(client, login):
+    headers = {**login("leader_titans"), "Idempotency-Key": "m1"}
+    first = client.post("/api/events/mela", headers=headers, data=MELA_FORM, files=CLIPPING)
+    retry = client.post("/api/events/mela", headers=headers, data=MELA_FORM, files=CLIPPING)
+    changed = client.post("/api/events/mela", headers=headers, data={**MELA_FORM, "location": "Elsewhere"}, files=CLIPPING)
+
+    assert first.status_code == 201
+    assert retry.headers.get("idempotency-replayed") == "true"
+    assert changed.status_code == 422
+
+
+def test_boundary_split_across_chunks_is_still_ignored():
+    body = b"--BOUNDARY42\r\nvalue\r\n--BOUNDARY42--"
+
+    def digest(chunks, content_type="multipart/form-data; boundary=BOUNDARY42"):
+        hasher = _BodyHasher(content_type)
+        for i, chunk in enumerate(chunks):
+            hasher.update({"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1})
+        return hasher.hexdigest()
+
+    other_boundary = body.replace(b"BOUNDARY42", b"XXXXXXXXXX")
+    assert digest([body]) == digest([bytes([b]) for b in body])
+    assert digest([body]) == digest([other_boundary], "multipart/form-data; boundary=XXXXXXXXXX")
+
+
+def _scope(authorization: str, key: bytes) -> dict:
+    return {
+        "type": "http", "method": "POST", "path": "/api/activities/", "query_string": b"",
+        "headers": [(b"authorization", authorization.encode()), (b"idempotency-key", key)],
+    }
+
+
+async def _call(app, scope) -> list:
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await IdempotencyMiddleware(app)(scope, receive, send)
+    return sent
+
+
+def test_replay_keeps_repeated_headers(login):
+    async def app(scope, receive, send):
+        await receive()
+        await send({"type": "http.response.start", "status": 201, "headers": [(b"set-cookie", b"a=1"), (b"set-cookie", b"b=2")]})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    scope = _scope(login("member_titans")["Authorization"], b"cookies")
+    asyncio.run(_call(app, scope))
+    replayed = asyncio.run(_call(app, scope))
+
+    assert replayed[0]["headers"] == [(b"set-cookie", b"a=1"), (b"set-cookie", b"b=2"), (b"idempotency-replayed", b"true")]
+    assert replayed[1]["body"] == b"ok"
+
+
+def test_cancelled_request_releases_its_key(login):
+    async def cancelled(scope, receive, send):
+        raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(_call(cancelled, _scope(login("member_titans")["Authorization"], b"cancelled")))
+    assert idempotency.store.size() == 0
@@ -0,0 +1,49 @@
+import hashlib
+
+EVENT_FORM = {"event_date": "2025-08-05T10:00:00", "location": "Town hall", "event_type": "Expo", "campaign_id": "1"}
+
+
+def _upload(client, headers, filename, content, content_type) -> str:
+    response = client.post("/api/events/special-event", headers=headers, data=EVENT_FORM, files=[("media", (filename, content, content_type))])
+    assert response.status_code == 201, response.text
+    return f"/api/media/{hashlib.sha256(content).hexdigest()}"
+
+
+def test_uploaded_html_is_downloaded_not_rendered(client, login):
+    headers = login("ba_tvm")
+    url = _upload(client, headers, "page.html", b"<script>alert(1)</script>", "text/html")
+    response = client.get(url, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert response.headers["content-disposition"] == "attachment"
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_svg_is_not_served_inline(client, login):
+    headers = login("ba_tvm")
+    url = _upload(client, headers, "logo.svg", b"<svg xmlns='http://www.w3.org/2000/svg'/>", "image/svg+xml")
+
+    assert client.get(url, headers=headers).headers["content-disposition"] == "attachment"
+
+
+def test_allowed_type_is_served_inline_with_caching_headers(client, login):
+    headers = login("ba_tvm")
+    content = b"\x00\x00\x00\x18ftypmp42 not really a video"
+    url = _upload(client, headers, "clip.mp4", content, "video/mp4")
+    response = client.get(url, headers=headers)
+
+    assert response.headers["content-type"] == "video/mp4"
+    assert response.headers["content-disposition"] == "inline"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["etag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+
+    partial = client.get(url, headers={**headers, "Range": "bytes=0-3"})
+    assert partial.status_code == 206 and partial.content == content[:4]
+    assert client.get(url, headers={**headers, "If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_media_of_another_ba_is_not_found(client, login):
+    url = _upload(client, login("ba_tvm"), "clip.pdf", b"%PDF-1.4", "application/pdf")
+    assert client.get(url, headers=login("ba_ekm")).status_code == 404
+    assert client.get(url, headers=login("admin")).status_code == 200
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import time
+
+from backend import media
+from backend.models import EventMedia, MediaObject
+
+EVENT_FORM = {"event_date": "2025-08-05T10:00:00", "location": "Town hall", "event_type": "Expo", "campaign_id": "1"}
+CLIPPING = b"%PDF-1.4 the same clipping"
+
+
+def _post(client, headers, content=CLIPPING):
+    return client.post("/api/events/special-event", headers=headers, data=EVENT_FORM, files=[("media", ("clip.pdf", content, "application/pdf"))])
+
+
+def _age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def _orphan(content: bytes) -> str:
+    path = media.media_path(hashlib.sha256(content).hexdigest(), ".pdf")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_identical_uploads_share_one_file(client, db, login):
+    headers = login("ba_tvm")
+    assert _post(client, headers).status_code == 201
+    assert _post(client, headers).status_code == 201
+
+    stored = db.query(MediaObject).one()
+    assert stored.sha256 == hashlib.sha256(CLIPPING).hexdigest()
+    assert stored.ref_count == 2
+    assert db.query(EventMedia).count() == 2
+    assert os.listdir(os.path.dirname(stored.path)) == [os.path.basename(stored.path)]
+
+
+def test_sweep_removes_only_old_unowned_files(client, db, login):
+    assert _post(client, login("ba_tvm")).status_code == 201
+    owned = db.query(MediaObject.path).scalar()
+    old_orphan, fresh_orphan = _orphan(b"old orphan"), _orphan(b"fresh orphan")
+    partial = old_orphan + ".abc.part"
+    open(partial, "wb").close()
+    for path in (owned, old_orphan, partial):
+        _age(path, 7200)
+
+    removed = media.sweep_orphaned_files(db, grace_seconds=3600)
+
+    assert sorted(removed) == sorted([old_orphan, partial])
+    assert os.path.exists(owned) and os.path.exists(fresh_orphan)
+
+
+def test_upload_adopts_an_unowned_file_and_keeps_the_sweep_off_it(client, db, login):
+    # Left behind by a request that failed after writing it.
+    leftover = _orphan(CLIPPING)
+    _age(leftover, 7200)
+
+    assert _post(client, login("ba_tvm")).status_code == 201
+    assert db.query(MediaObject.path).scalar() == leftover
+    # Touched before the commit, so a concurrent sweep sees it as fresh.
+    assert os.path.getmtime(leftover) > time.time() - 60
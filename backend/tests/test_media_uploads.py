@@ -0,0 +1,51 @@
+import os
+
+from backend import media
+from backend.models import MediaObject, SpecialEvent
+
+EVENT_FORM = {"event_date": "2025-08-05T10:00:00", "location": "Town hall", "event_type": "Expo", "campaign_id": "1"}
+
+
+def _files(*sizes):
+    return [("media", (f"clip{i}.pdf", bytes([i]) * size, "application/pdf")) for i, size in enumerate(sizes)]
+
+
+def _stored_files():
+    return [name for _, _, names in os.walk(media.MEDIA_DIRECTORY) for name in names]
+
+
+def test_oversized_request_is_refused_from_content_length(client, db, login, monkeypatch):
+    monkeypatch.setattr(media, "MAX_UPLOAD_REQUEST_BYTES", 1000)
+    monkeypatch.setattr(media, "MULTIPART_OVERHEAD_BYTES", 0)
+    response = client.post("/api/events/special-event", headers=login("ba_tvm"), data=EVENT_FORM, files=_files(2000))
+
+    assert response.status_code == 413
+    assert response.headers["connection"] == "close"
+    assert db.query(SpecialEvent).count() == 0
+
+
+def test_file_over_the_per_file_limit_is_refused(client, db, login, monkeypatch):
+    monkeypatch.setattr(media, "MAX_UPLOAD_FILE_BYTES", 100)
+    response = client.post("/api/events/special-event", headers=login("ba_tvm"), data=EVENT_FORM, files=_files(50, 101))
+
+    assert response.status_code == 413
+    assert "'clip1.pdf' is larger than" in response.json()["detail"]
+    assert _stored_files() == []
+    assert db.query(SpecialEvent).count() == 0
+
+
+def test_files_share_the_per_request_budget(client, db, login, monkeypatch):
+    monkeypatch.setattr(media, "MAX_UPLOAD_REQUEST_BYTES", 150)
+    response = client.post("/api/events/special-event", headers=login("ba_tvm"), data=EVENT_FORM, files=_files(100, 100))
+
+    assert response.status_code == 413
+    assert _stored_files() == []
+    assert db.query(MediaObject).count() == 0
+
+
+def test_upload_within_the_limits_is_stored(client, db, login):
+    response = client.post("/api/events/special-event", headers=login("ba_tvm"), data=EVENT_FORM, files=_files(100, 200))
+
+    assert response.status_code == 201
+    assert sorted(size for (size,) in db.query(MediaObject.size).all()) == [100, 200]
+    assert len(_stored_files()) == 2
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+from backend.routes import metrics_routes
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_metrics_render_in_development(client):
+    client.get("/api/activities/types/all")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "db_pool_connections" in response.text
+
+
+def test_metrics_token_is_required_when_set(client, monkeypatch):
+    monkeypatch.setattr(metrics_routes, "METRICS_TOKEN", "s3cret")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def _production_metric_routes(token=None) -> str:
+    # database.py picks the engine at import time, so production is checked in a fresh interpreter.
+    env = {name: value for name, value in os.environ.items() if name != "METRICS_TOKEN"}
+    env.update(ENV="production", POSTGRES_USER="u", POSTGRES_PASSWORD="p", POSTGRES_SERVER="localhost", POSTGRES_DB="d")
+    if token:
+        env["METRICS_TOKEN"] = token
+    result = subprocess.run(
+        [sys.executable, "-c", "from backend.routes import metrics_routes; print([r.path for r in metrics_routes.router.routes])"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_production_without_a_token_does_not_register_metrics():
+    assert _production_metric_routes() == "[]"
+    assert _production_metric_routes(token="s3cret") == "['/metrics']"
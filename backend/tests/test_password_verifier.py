@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from backend import password_verifier as verifier_module
+from backend.database import engine
+from backend.password_verifier import PasswordVerifier
+from backend.routes import auth_routes
+
+
+@pytest.fixture
+def blocking_bcrypt(monkeypatch):
+    """Makes verify_password wait until the returned event is set."""
+    release = threading.Event()
+
+    def verify_password(plain_password, hashed_password):
+        release.wait(5)
+        return plain_password == hashed_password
+
+    monkeypatch.setattr(verifier_module, "verify_password", verify_password)
+    yield release
+    release.set()
+
+
+def test_a_full_pool_rejects_with_retry_after(blocking_bcrypt):
+    verifier = PasswordVerifier(workers=1, queue_limit=0)
+
+    async def scenario():
+        first = asyncio.create_task(verifier.verify("pwd", "pwd"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as rejected:
+            await verifier.verify("pwd", "pwd")
+        blocking_bcrypt.set()
+        return rejected.value, await first
+
+    rejected, first = asyncio.run(scenario())
+    verifier.shutdown()
+
+    assert rejected.status_code == 503
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert first is True
+    assert verifier.snapshot()["rejected"] == 1
+
+
+def test_a_cancelled_login_keeps_its_slot_until_bcrypt_finishes(blocking_bcrypt):
+    verifier = PasswordVerifier(workers=1, queue_limit=0)
+
+    async def scenario():
+        task = asyncio.create_task(verifier.verify("pwd", "pwd"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    # The caller has gone, but the thread is still hashing.
+    assert verifier.snapshot()["pending"] == 1
+
+    blocking_bcrypt.set()
+    verifier._executor.shutdown(wait=True)
+    snapshot = verifier.snapshot()
+    assert snapshot["pending"] == 0
+    assert snapshot["verified"] == 0
+
+
+def test_login_holds_no_connection_while_waiting_for_bcrypt(client, monkeypatch):
+    checked_out = []
+
+    async def verify(plain_password, hashed_password):
+        checked_out.append(engine.pool.checkedout())
+        return True
+
+    monkeypatch.setattr(auth_routes.password_verifier, "verify", verify)
+    response = client.post("/api/auth/token", data={"username": "member_titans", "password": "pwd"})
+
+    assert response.status_code == 200
+    assert checked_out == [0]
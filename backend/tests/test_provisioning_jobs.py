@@ -0,0 +1,60 @@
+import time
+
+from fastapi import HTTPException
+
+from backend import provisioning
+
+
+def _finished(job_id: str):
+    # pending() drops only after the final state is saved, unlike the in-memory status.
+    for _ in range(100):
+        if provisioning.pending() == 0:
+            return
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def _forget(job_id: str):
+    """Drops the in-process copy, as if the poll landed on another worker."""
+    provisioning.jobs.invalidate(job_id)
+
+
+def test_finished_job_is_read_back_from_the_table(client, login):
+    def work(db, job):
+        job.processed = 3
+        job.result = {"created_users": 3}
+        return "Created 3 users."
+
+    job = provisioning.start_job("test", "ba_tvm", 3, work)
+    _finished(job.id)
+    _forget(job.id)
+
+    response = client.get(f"/api/upload/jobs/{job.id}", headers=login("ba_tvm"))
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["status"], body["processed"], body["message"]) == ("succeeded", 3, "Created 3 users.")
+    assert body["result"] == {"created_users": 3}
+    assert body["finished_at"] is not None
+
+
+def test_failed_job_keeps_its_error(client, login):
+    def work(db, job):
+        raise HTTPException(status_code=400, detail="HR No 'HR9001' is used more than once")
+
+    job = provisioning.start_job("test", "ba_tvm", 1, work)
+    _finished(job.id)
+    _forget(job.id)
+
+    body = client.get(f"/api/upload/jobs/{job.id}", headers=login("ba_tvm")).json()
+    assert body["status"] == "failed"
+    assert body["error"] == "HR No 'HR9001' is used more than once"
+
+
+def test_jobs_are_only_visible_to_their_owner_and_admins(client, login):
+    job = provisioning.start_job("test", "ba_tvm", 0, lambda db, job: "done")
+    _finished(job.id)
+    _forget(job.id)
+
+    assert client.get(f"/api/upload/jobs/{job.id}", headers=login("ba_ekm")).status_code == 404
+    assert client.get(f"/api/upload/jobs/{job.id}", headers=login("admin")).status_code == 200
+    assert client.get("/api/upload/jobs/unknown", headers=login("admin")).status_code == 404
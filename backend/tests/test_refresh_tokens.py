@@ -0,0 +1,42 @@
+PASSWORD = "pwd" # seed_db gives every user this password
+
+
+def _login(client, username="member_titans") -> dict:
+    response = client.post("/api/auth/token", data={"username": username, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _refresh(client, refresh_token):
+    return client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def test_refresh_rotates_the_token(client):
+    tokens = _login(client)
+    rotated = _refresh(client, tokens["refresh_token"])
+
+    assert rotated.status_code == 200
+    assert rotated.json()["refresh_token"] != tokens["refresh_token"]
+    me = client.get("/api/users/me", headers={"Authorization": f"Bearer {rotated.json()['access_token']}"})
+    assert me.status_code == 200
+
+
+def test_reused_token_revokes_the_whole_family(client):
+    tokens = _login(client)
+    rotated = _refresh(client, tokens["refresh_token"]).json()
+
+    assert _refresh(client, tokens["refresh_token"]).status_code == 401
+    # The copy was detected, so the legitimate successor is revoked too.
+    assert _refresh(client, rotated["refresh_token"]).status_code == 401
+
+
+def test_logout_revokes_the_family_but_not_other_logins(client):
+    phone, laptop = _login(client), _login(client)
+    assert client.post("/api/auth/logout", json={"refresh_token": phone["refresh_token"]}).status_code == 204
+
+    assert _refresh(client, phone["refresh_token"]).status_code == 401
+    assert _refresh(client, laptop["refresh_token"]).status_code == 200
+
+
+def test_unknown_token_is_rejected(client):
+    assert _refresh(client, "not-a-token").status_code == 401
@@ -0,0 +1,27 @@
+PROFILE = {"X-Profile": "1"}
+
+
+def test_admin_requests_are_profiled_on_request(client, login):
+    headers = login("admin")
+    response = client.get("/api/users/me", headers={**headers, **PROFILE})
+
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    listed = client.get("/api/admin/profiles", headers=headers).json()
+    assert [p["id"] for p in listed if p["id"] == profile_id] == [profile_id]
+    report = client.get(f"/api/admin/profiles/{profile_id}", headers=headers)
+    assert report.status_code == 200
+    assert report.headers["content-disposition"] == f'attachment; filename="profile-{profile_id}.folded"'
+
+
+def test_header_is_ignored_for_other_users_and_unprofiled_requests(client, login):
+    member = client.get("/api/users/me", headers={**login("member_titans"), **PROFILE})
+    plain = client.get("/api/users/me", headers=login("admin"))
+
+    assert member.status_code == plain.status_code == 200
+    assert "X-Profile-Id" not in member.headers
+    assert "X-Profile-Id" not in plain.headers
+
+
+def test_unknown_profile_is_not_found(client, login):
+    assert client.get("/api/admin/profiles/missing", headers=login("admin")).status_code == 404
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+
+def _entry(activity_types, client_id, mobile):
+    return {"client_id": client_id, "activity_type_id": activity_types["MNP"], "customer_mobile": mobile, "campaign_id": 1}
+
+
+def _sync(client, headers, **body):
+    response = client.post("/api/activities/sync", headers=headers, json={"campaign_id": 1, **body})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_retried_entry_is_reported_as_duplicate(client, login, activity_types):
+    headers = login("member_titans")
+    first = _sync(client, headers, activities=[_entry(activity_types, "c1", "9000000001")])
+    retry = _sync(client, headers, activities=[_entry(activity_types, "c1", "9000000001")])
+
+    assert first["results"][0]["status"] == "created"
+    assert retry["results"][0] == {**first["results"][0], "status": "duplicate"}
+
+
+def test_client_id_is_scoped_to_the_caller(client, login, activity_types):
+    _sync(client, login("member_titans"), activities=[_entry(activity_types, "same-id", "9000000001")])
+    other = _sync(client, login("member1_avengers"), activities=[_entry(activity_types, "same-id", "9000000002")])
+
+    assert other["results"][0]["status"] == "created"
+
+
+def test_watermark_with_an_offset_is_compared_in_utc(client, login, activity_types):
+    headers = login("member_titans")
+    _sync(client, headers, activities=[_entry(activity_types, "c1", "9000000001")])
+
+    # A minute ahead in UTC, but earlier than now by wall-clock time in IST.
+    ist = timezone(timedelta(hours=5, minutes=30))
+    future = (datetime.now(timezone.utc) + timedelta(minutes=1)).astimezone(ist)
+    assert _sync(client, headers, watermark=future.isoformat())["changed"] == []
+
+    past = (datetime.now(timezone.utc) - timedelta(minutes=1)).astimezone(ist)
+    assert len(_sync(client, headers, watermark=past.isoformat())["changed"]) == 1
+
+
+def test_deleted_activity_is_returned_as_tombstone(client, login, activity_types):
+    headers = login("member_titans")
+    created = _sync(client, headers, activities=[_entry(activity_types, "c1", "9000000001")])
+    activity_id = created["results"][0]["activity_id"]
+
+    assert client.delete(f"/api/activities/{activity_id}", headers=headers).status_code in (200, 204)
+    assert _sync(client, headers, watermark=created["watermark"])["deleted"] == [activity_id]
@@ -0,0 +1,96 @@
+import io
+import json
+
+import pandas as pd
+
+from backend.models import BATarget, Team, TeamTarget
+
+
+def _file(rows, name="targets.csv"):
+    buffer = io.BytesIO()
+    if name.endswith(".csv"):
+        buffer.write(pd.DataFrame(rows).to_csv(index=False).encode())
+    else:
+        pd.DataFrame(rows).to_excel(buffer, index=False)
+    return {"file": (name, buffer.getvalue())}
+
+
+def _team_targets(db):
+    return sorted(
+        (code, target.activity_type.name, target.target_value, target.target_category)
+        for target, code in db.query(TeamTarget, Team.team_code).join(Team, TeamTarget.team_id == Team.id).all()
+    )
+
+
+def test_team_targets_are_upserted(client, db, login):
+    headers = login("ba_tvm")
+    rows = [{"Team Code": "tvm_01", "Activity": "mnp", "Target Value": "10"},
+            {"Team Code": "TVM_02", "Activity": "SIM Sales", "Target Value": "5", "Target Category": "urban"}]
+    assert client.post("/api/upload/targets/team/1", headers=headers, files=_file(rows)).json()["saved"] == 2
+
+    rows[0]["Target Value"] = "20"
+    response = client.post("/api/upload/targets/team/1", headers=headers, files=_file(rows, "targets.xlsx"))
+
+    assert response.status_code == 200
+    assert _team_targets(db) == [("TVM_01", "MNP", 20, None), ("TVM_02", "SIM Sales", 5, "urban")]
+
+
+def test_invalid_team_targets_are_all_reported_and_nothing_is_saved(client, db, login):
+    rows = [{"team_code": "EKM_01", "activity": "MNP", "target_value": "5"},
+            {"team_code": "TVM_01", "activity": "Nope", "target_value": "-1"},
+            {"team_code": "TVM_01", "activity": "MNP", "target_value": "3"},
+            {"team_code": "TVM_01", "activity": "MNP", "target_value": "4"}]
+    response = client.post("/api/upload/targets/team/1", headers=login("ba_tvm"), files=_file(rows))
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == (
+        "Unknown team code on row 2: 'EKM_01'.; "
+        "Unknown activity on row 3: 'Nope'.; "
+        "Invalid target value on row 3: '-1'. Use a whole number of 0 or more.; "
+        "Duplicate target on row 4 for team code 'TVM_01' / 'MNP'.; "
+        "Duplicate target on row 5 for team code 'TVM_01' / 'MNP'."
+    )
+    assert _team_targets(db) == []
+
+
+def test_ba_targets_are_upserted_by_admins_only(client, db, login):
+    rows = [{"ba_code": "tvm", "activity": "MNP", "target_value": 100, "target_category": "urban"},
+            {"ba_code": "EKM", "activity": "MNP", "target_value": 50}]
+    assert client.post("/api/upload/targets/ba", headers=login("ba_tvm"), files=_file(rows)).status_code == 403
+
+    admin = login("admin")
+    client.post("/api/upload/targets/ba", headers=admin, files=_file(rows))
+    rows[1]["target_value"] = 60
+    assert client.post("/api/upload/targets/ba", headers=admin, files=_file(rows)).status_code == 200
+
+    stored = sorted((t.business_area.name, t.target_value, t.target_category) for t in db.query(BATarget).all())
+    assert stored == [("EKM", 60, None), ("TVM", 100, "urban")]
+
+
+def test_xls_and_missing_columns_are_refused(client, login):
+    admin = login("admin")
+    legacy = client.post("/api/upload/targets/ba", headers=admin, files={"file": ("targets.xls", b"legacy")})
+    missing = client.post("/api/upload/targets/ba", headers=admin, files=_file([{"ba": "TVM"}]))
+
+    assert legacy.status_code == 400
+    assert missing.status_code == 400
+    assert missing.json()["detail"].startswith("Missing column(s): ba_code, activity, target_value.")
+
+
+def test_target_dry_runs_report_problems_and_write_nothing(client, db, login):
+    bad = [{"team_code": "EKM_01", "activity": "MNP", "target_value": "5"},
+           {"team_code": "TVM_01", "activity": "MNP", "target_value": "x"}]
+    report = client.post("/api/upload/targets/team/1", headers=login("ba_tvm"), params={"dry_run": "true"}, files=_file(bad))
+
+    assert report.status_code == 200
+    assert report.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in report.text.splitlines()]
+    assert [(line["row"], line["level"]) for line in lines[:-1]] == [(2, "error"), (3, "error")]
+    assert lines[-1] == {"summary": {"rows": 2, "errors": 2, "warnings": 0, "valid": False}}
+
+    good = [{"ba_code": "TVM", "activity": "MNP", "target_value": 1}]
+    report = client.post("/api/upload/targets/ba", headers=login("admin"), params={"dry_run": "true"}, files=_file(good))
+    assert json.loads(report.text) == {"summary": {"rows": 1, "errors": 0, "warnings": 0, "valid": True}}
+
+    assert _team_targets(db) == []
+    assert db.query(BATarget).count() == 0
@@ -0,0 +1,50 @@
+from backend import targets
+from backend.models import BATarget, Team, TeamTarget
+
+
+def _team_id(db, code):
+    return db.query(Team.id).filter(Team.team_code == code).scalar()
+
+
+def test_upsert_inserts_then_updates_on_the_target_key(db, activity_types):
+    titans = _team_id(db, "TVM_01")
+    row = {"campaign_id": 1, "team_id": titans, "activity_type_id": activity_types["MNP"], "target_value": 10, "target_category": "urban"}
+    first = targets.upsert_targets(db, targets.TEAM, [row])
+    db.commit()
+    second = targets.upsert_targets(db, targets.TEAM, [{**row, "target_value": 15}])
+    db.commit()
+
+    assert first[0].id == second[0].id
+    assert [(t.target_value, t.target_category) for t in db.query(TeamTarget).all()] == [(15, "urban")]
+
+
+def test_missing_category_conflicts_like_any_other_value(db, activity_types):
+    # NULL never conflicts on a plain unique key; the coalesced index makes it.
+    row = {"campaign_id": 1, "ba_id": 1, "activity_type_id": activity_types["MNP"], "target_value": 10}
+    targets.upsert_targets(db, targets.BA, [row])
+    targets.upsert_targets(db, targets.BA, [{**row, "target_value": 12, "target_category": None}])
+    targets.upsert_targets(db, targets.BA, [{**row, "target_value": 3, "target_category": "rural"}])
+    db.commit()
+
+    assert sorted((t.target_value, t.target_category or "") for t in db.query(BATarget).all()) == [(3, "rural"), (12, "")]
+
+
+def test_later_rows_win_within_a_batch(db, activity_types):
+    titans = _team_id(db, "TVM_01")
+    row = {"campaign_id": 1, "team_id": titans, "activity_type_id": activity_types["MNP"], "target_value": 1}
+    saved = targets.upsert_targets(db, targets.TEAM, [row, {**row, "target_value": 2}, {**row, "target_value": 3}])
+    db.commit()
+
+    assert [t.target_value for t in saved] == [3]
+    assert targets.upsert_targets(db, targets.TEAM, []) == []
+
+
+def test_batch_endpoint_is_limited_to_the_coordinators_ba(client, db, login, activity_types):
+    titans, strikers = _team_id(db, "TVM_01"), _team_id(db, "EKM_01")
+    body = [{"campaign_id": 1, "team_id": titans, "activity_type_id": activity_types["MNP"], "target_value": 7}]
+    headers = login("ba_tvm")
+
+    assert client.post("/api/targets/batch", headers=headers, json=body).status_code == 201
+    refused = client.post("/api/targets/batch", headers=headers, json=body + [{**body[0], "team_id": strikers}])
+    assert refused.status_code == 403
+    assert [t.target_value for t in db.query(TeamTarget).all()] == [7]
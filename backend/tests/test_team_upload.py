@@ -0,0 +1,90 @@
+import io
+import json
+import time
+
+import openpyxl
+
+from backend.models import Employee, Team
+
+HEADER = ["Team Code", "Team Name", "Leader Name", "Coordinator Name", "Leader HR No", "Coordinator HR No"]
+
+
+def _sheet(*rows) -> bytes:
+    workbook = openpyxl.Workbook()
+    workbook.active.append(HEADER)
+    for row in rows:
+        workbook.active.append(list(row))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _upload(client, headers, sheet: bytes, **params):
+    return client.post("/api/upload/teams/1", headers=headers, params=params, files={"file": ("teams.xlsx", sheet)})
+
+
+def _wait_for_job(client, headers, job_id: str) -> dict:
+    for _ in range(100):
+        job = client.get(f"/api/upload/jobs/{job_id}", headers=headers).json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish: {job}")
+
+
+def test_sheet_replaces_the_bas_teams(client, db, login):
+    headers = login("ba_tvm")
+    response = _upload(client, headers, _sheet(
+        ("TVM_05", "Falcons", "New Leader", "Leader Titans", "HR9001", "TL_TVM01"),
+        ("TVM_06", "Hawks", "Another Leader", "Another Coordinator", "HR9002", "HR9003"),
+    ))
+    assert response.status_code == 202
+
+    job = _wait_for_job(client, headers, response.json()["job_id"])
+    assert job["status"] == "succeeded", job
+    assert job["result"] == {"created_teams": 2, "created_users": 3}
+    assert sorted(code for (code,) in db.query(Team.team_code).filter(Team.ba_id == 1).all()) == ["TVM_00", "TVM_05", "TVM_06"]
+    moved = db.query(Employee).filter(Employee.employee_code == "TL_TVM01").one()
+    assert (moved.role, moved.team.team_code) == ("team_coordinator", "TVM_05")
+
+
+def test_empty_sheet_clears_the_bas_teams(client, db, login):
+    headers = login("ba_tvm")
+    job = _wait_for_job(client, headers, _upload(client, headers, _sheet()).json()["job_id"])
+
+    assert job["status"] == "succeeded", job
+    assert job["result"] == {"created_teams": 0, "created_users": 0}
+    assert [code for (code,) in db.query(Team.team_code).filter(Team.ba_id == 1).all()] == ["TVM_00"]
+
+
+def test_invalid_sheet_is_rejected_with_every_problem(client, db, login):
+    response = _upload(client, login("ba_tvm"), _sheet(
+        ("TVM_05", "Falcons", "A", "B", "HR9001", "HR9002"),
+        ("TVM_05", "Hawks", "C", "D", "HR9001", ""),
+        ("bad", "Owls", "E", "F", "HR9004", "HR9005"),
+    ))
+
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert "Duplicate Team Code on row 2: 'TVM_05'" in detail
+    assert "Missing Team Coordinator HR No on row 3" in detail
+    assert "Invalid Team Code on row 4: 'BAD'" in detail
+    assert "HR No 'HR9001' is used more than once (rows 2, 3)" in detail
+    assert db.query(Team).filter(Team.team_code == "TVM_05").count() == 0
+
+def test_dry_run_streams_a_report_and_writes_nothing(client, db, login):
+    response = _upload(client, login("ba_tvm"), _sheet(
+        ("TVM_05", "Falcons", "A", "B", "HR9001", "BA_EKM_01"),
+        ("EKM_01", "Taken", "C", "D", "TM1_EKM01", "HR9003"),
+    ), dry_run="true")
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert {(line["row"], line["level"]) for line in lines[:-1]} == {(2, "error"), (3, "error"), (3, "warning")}
+    assert lines[-1] == {"summary": {"rows": 2, "errors": 2, "warnings": 1, "valid": False}}
+    assert db.query(Team).filter(Team.team_code == "TVM_05").count() == 0
+
+
+def test_xls_is_refused(client, login):
+    response = client.post("/api/upload/teams/1", headers=login("ba_tvm"), files={"file": ("teams.xls", b"legacy")})
+    assert response.status_code == 400
@@ -0,0 +1,191 @@
+# ==============================================================================
+# File: backend/thumbnails.py
+# Description: Background pipeline that renders a small thumbnail and a
+# web-optimised copy of every uploaded image, so list and gallery views can
+# load kilobytes instead of the multi-megabyte camera originals.
+# - Decoding and resizing run in a process pool (Pillow holds the GIL for
+#   much of that work). Worker processes only touch files; the dimensions
+#   and paths are recorded by the API process.
+# - Variants are named after the source digest, so re-running is idempotent.
+# - Pillow is optional: without it uploads still work and no variants are made.
+#
+# Backfill existing uploads with: python -m backend.thumbnails backfill
+# ==============================================================================
+import os
+import sys
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .media import MEDIA_DIRECTORY
+from .models import MediaObject, MediaVariant
+
+try:
+    from PIL import Image, ImageOps
+except ImportError: # pragma: no cover - depends on the deployment
+    Image = None
+
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+VARIANT_DIRECTORY = os.path.join(MEDIA_DIRECTORY, "variants")
+
+# kind -> (longest edge in pixels, JPEG quality)
+VARIANTS = {
+    "thumbnail": (320, 70),
+    "web": (1600, 82),
+}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff", ".heic"}
+
+
+def is_image(media: MediaObject) -> bool:
+    if media.content_type:
+        return media.content_type.startswith("image/")
+    return os.path.splitext(media.path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def variant_path(sha256: str, kind: str) -> str:
+    return os.path.join(VARIANT_DIRECTORY, sha256[:2], f"{sha256}_{kind}.jpg")
+
+
+def render_variants(source_path: str, sha256: str) -> Dict:
+    """
+    Runs in a worker process. Decodes the source once and writes every
+    variant as a progressive JPEG. Returns the source dimensions and, per
+    kind, the variant's path, digest, dimensions and size.
+    """
+    with Image.open(source_path) as image:
+        width, height = image.size
+        # EXIF orientations 5-8 are rotated by 90 degrees; report the upright size.
+        if image.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+            width, height = height, width
+        # JPEG can decode at 1/2, 1/4 or 1/8 scale, which is far cheaper than a full decode.
+        largest = max(edge for edge, _ in VARIANTS.values())
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            # Flatten transparency onto white rather than JPEG's default black.
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGB")
+
+        rendered = {}
+        for kind, (edge, quality) in sorted(VARIANTS.items(), key=lambda item: -item[1][0]):
+            variant = image.copy()
+            variant.thumbnail((edge, edge), Image.LANCZOS)
+            path = variant_path(sha256, kind)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.part"
+            variant.save(temp_path, "JPEG", quality=quality, optimize=True, progressive=True)
+            os.replace(temp_path, path)
+            with open(path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            rendered[kind] = {"path": path, "sha256": digest, "width": variant.width, "height": variant.height, "size": os.path.getsize(path)}
+    return {"width": width, "height": height, "variants": rendered}
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+# One dispatcher thread per worker process keeps the pool busy while each thread waits on its job.
+_dispatcher = ThreadPoolExecutor(max_workers=max(1, THUMBNAIL_WORKERS), thread_name_prefix="thumbnails")
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max(1, THUMBNAIL_WORKERS), mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def process_media(db: Session, media_id: int) -> bool:
+    """Renders and records the variants of one media object. Returns True if it did any work."""
+    media = db.get(MediaObject, media_id)
+    if media is None or not is_image(media) or not os.path.exists(media.path):
+        return False
+    if {v.kind for v in media.variants} >= set(VARIANTS):
+        return False
+
+    result = _get_pool().submit(render_variants, media.path, media.sha256).result()
+    media.width, media.height = result["width"], result["height"]
+    existing = {v.kind: v for v in media.variants}
+    for kind, info in result["variants"].items():
+        variant = existing.get(kind) or MediaVariant(media_id=media.id, kind=kind)
+        variant.path, variant.sha256, variant.content_type = info["path"], info["sha256"], "image/jpeg"
+        variant.width, variant.height, variant.size = info["width"], info["height"], info["size"]
+        db.add(variant)
+    db.commit()
+    return True
+
+
+def _process_in_background(media_id: int):
+    global _pending
+    db = SessionLocal()
+    try:
+        process_media(db, media_id)
+    except Exception as e:
+        db.rollback()
+        print(f"--- Could not create thumbnails for media {media_id}: {e} ---")
+    finally:
+        db.close()
+        with _pending_lock:
+            _pending -= 1
+
+
+def pending() -> int:
+    """Media queued or being rendered."""
+    return _pending
+
+
+def enqueue(media_ids: Iterable[int]):
+    """Queues thumbnail rendering for newly stored media. A no-op without Pillow."""
+    if Image is None:
+        return
+    global _pending
+    for media_id in dict.fromkeys(media_ids):
+        with _pending_lock:
+            _pending += 1
+        _dispatcher.submit(_process_in_background, media_id)
+
+
+def backfill(db: Session) -> int:
+    """Renders variants for every stored image that does not have all of them yet."""
+    variant_counts = select(MediaVariant.media_id, func.count().label("kinds")).group_by(MediaVariant.media_id).subquery()
+    pending = select(MediaObject.id).outerjoin(variant_counts, variant_counts.c.media_id == MediaObject.id).where(
+        func.coalesce(variant_counts.c.kinds, 0) < len(VARIANTS)
+    ).order_by(MediaObject.id)
+    processed = 0
+    for media_id in db.scalars(pending).all():
+        if process_media(db, media_id):
+            processed += 1
+    return processed
+
+
+def shutdown():
+    _dispatcher.shutdown(wait=False)
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    from .media import adopt_legacy_uploads
+    if sys.argv[1:] != ["backfill"]:
+        print("Usage: python -m backend.thumbnails backfill")
+        sys.exit(2)
+    if Image is None:
+        print("--- Pillow is not installed; install it to create thumbnails ---")
+        sys.exit(1)
+    db = SessionLocal()
+    try:
+        print(f"--- Moved {adopt_legacy_uploads(db)} legacy event uploads into the media store ---")
+        print(f"--- Created thumbnails for {backfill(db)} images ---")
+    finally:
+        db.close()
+        shutdown()
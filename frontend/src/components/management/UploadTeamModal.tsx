@@ -20,6 +20,7 @@ export const UploadTeamModal = ({ isOpen, onClose, onUploadSuccess }: UploadTeam
     const [isUploading, setIsUploading] = useState(false);
     const [error, setError] = useState('');
     const [message, setMessage] = useState('');
+    const [issues, setIssues] = useState<{ row: number | null; level: string; message: string }[]>([]);
 
     const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
         if (e.target.files) {
@@ -27,11 +28,43 @@ export const UploadTeamModal = ({ isOpen, onClose, onUploadSuccess }: UploadTeam
         }
     };
 
+    // Streams every problem in the sheet back without writing anything.
+    const handleValidate = async () => {
+        if (!file || !user?.ba_id) return;
+        setIsUploading(true);
+        setError('');
+        setMessage('');
+        setIssues([]);
+
+        const formData = new FormData();
+        formData.append('file', file);
+
+        try {
+            const response = await apiClient.post(`/api/upload/teams/${user.ba_id}?dry_run=true`, formData, {
+                headers: { 'Content-Type': 'multipart/form-data' },
+                responseType: 'text',
+            });
+            const lines = (response.data as string).split('\n').filter(Boolean).map((line) => JSON.parse(line));
+            const summary = lines.find((line) => line.summary)?.summary;
+            setIssues(lines.filter((line) => !line.summary));
+            if (summary?.valid) {
+                setMessage(`All ${summary.rows} rows are valid.`);
+            } else if (summary) {
+                setError(`${summary.errors} error(s) found in ${summary.rows} rows.`);
+            }
+        } catch (err: any) {
+            setError(err.response?.data?.detail || "An error occurred during validation.");
+        } finally {
+            setIsUploading(false);
+        }
+    };
+
     const handleUpload = async () => {
         if (!file || !user?.ba_id || !selectedCampaign?.id) return;
         setIsUploading(true);
         setError('');
         setMessage('');
+        setIssues([]);
 
         const formData = new FormData();
         formData.append('file', file);
@@ -40,7 +73,23 @@ export const UploadTeamModal = ({ isOpen, onClose, onUploadSuccess }: UploadTeam
             const response = await apiClient.post(`/api/upload/teams/${user.ba_id}?campaign_id=${selectedCampaign.id}`, formData, {
                 headers: { 'Content-Type': 'multipart/form-data' },
             });
+            // The server validates the sheet and replaces the teams in a background job.
+            const jobId = response.data.job_id;
             setMessage(response.data.message);
+            while (true) {
+                await new Promise((resolve) => setTimeout(resolve, 1000));
+                const { data: job } = await apiClient.get(`/api/upload/jobs/${jobId}`);
+                if (job.status === 'failed') {
+                    setMessage('');
+                    setError(job.error || "The upload could not be processed.");
+                    return;
+                }
+                if (job.status === 'succeeded') {
+                    setMessage(job.message);
+                    break;
+                }
+                setMessage(`Processing... ${job.processed} of ${job.total} done.`);
+            }
             onUploadSuccess();
         } catch (err: any) {
             setError(err.response?.data?.detail || "An error occurred during upload.");
@@ -58,12 +107,24 @@ export const UploadTeamModal = ({ isOpen, onClose, onUploadSuccess }: UploadTeam
                 </p>
                 <div>
                     <label className="block text-sm font-medium">Excel File</label>
-                    <input type="file" accept=".xlsx, .xls" onChange={handleFileChange} className="mt-1 block w-full text-sm file:mr-4 file:py-2 file:px-4 file:rounded-full file:border-0 file:bg-blue-50 file:text-blue-700"/>
+                    <input type="file" accept=".xlsx" onChange={handleFileChange} className="mt-1 block w-full text-sm file:mr-4 file:py-2 file:px-4 file:rounded-full file:border-0 file:bg-blue-50 file:text-blue-700"/>
                 </div>
                 {error && <p className="text-red-500 text-sm">{error}</p>}
                 {message && <p className="text-green-500 text-sm">{message}</p>}
+                {issues.length > 0 && (
+                    <ul className="max-h-48 overflow-y-auto text-sm space-y-1">
+                        {issues.map((issue, index) => (
+                            <li key={index} className={issue.level === 'error' ? 'text-red-500' : 'text-yellow-600'}>
+                                {issue.row ? `Row ${issue.row}: ` : ''}{issue.message}
+                            </li>
+                        ))}
+                    </ul>
+                )}
                 <div className="flex justify-end space-x-3 pt-4">
                     <button type="button" onClick={onClose} className="px-4 py-2 bg-gray-200 rounded-md">Cancel</button>
+                    <button onClick={handleValidate} disabled={!file || isUploading} className="px-4 py-2 bg-blue-600 text-white rounded-md disabled:bg-blue-300">
+                        Validate Only
+                    </button>
                     <button onClick={handleUpload} disabled={!file || isUploading} className="px-4 py-2 bg-green-600 text-white rounded-md disabled:bg-green-300">
                         {isUploading ? 'Uploading...' : 'Upload & Process'}
                     </button>
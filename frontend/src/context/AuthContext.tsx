@@ -19,7 +19,7 @@ interface User {
 interface AuthContextType { 
   user: User | null; 
   token: string | null; 
-  login: (token: string) => void;
+  login: (token: string, refreshToken?: string) => void;
   logout: () => void; 
   isLoading: boolean; 
 }
@@ -43,6 +43,7 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
         } catch (error) {
           console.error("Failed to fetch user details, logging out.", error);
           localStorage.removeItem('authToken');
+          localStorage.removeItem('refreshToken');
           setUser(null); 
           setToken(null);
         } finally {
@@ -55,12 +56,18 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
     fetchUserDetails();
   }, [token]);
 
-  const login = (newToken: string) => { 
+  const login = (newToken: string, refreshToken?: string) => { 
     localStorage.setItem('authToken', newToken); 
+    if (refreshToken) localStorage.setItem('refreshToken', refreshToken);
     setToken(newToken); 
   };
   const logout = () => { 
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (refreshToken) {
+      apiClient.post('/api/auth/logout', { refresh_token: refreshToken }).catch(() => {});
+    }
     localStorage.removeItem('authToken'); 
+    localStorage.removeItem('refreshToken'); 
     setUser(null); 
     setToken(null); 
     useScoreStore.getState().resetScore();
@@ -38,12 +38,12 @@ export const ChangePasswordPage = () => {
 
     setIsSubmitting(true);
     try {
-      await apiClient.post('/api/users/change-password', { new_password: newPassword });
+      const { data } = await apiClient.post('/api/users/change-password', { new_password: newPassword });
       setMessage('Password changed successfully! Refresh the page to log in with the new password.');
 
       const token = localStorage.getItem('authToken');
       if (token) {
-        login(token); // This will update user state in context
+        login(token, data.refresh_token); // This will update user state in context
       }
     } catch (err: any) {
       setError(err.response?.data?.detail || 'An error occurred. Please try again.');
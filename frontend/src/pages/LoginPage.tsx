@@ -31,7 +31,7 @@ export const LoginPage = () => {
       });
       
       if (response.data.access_token) {
-        login(response.data.access_token);
+        login(response.data.access_token, response.data.refresh_token);
         navigate('/select-campaign', { replace: true });
       }
     } catch (err: any) {
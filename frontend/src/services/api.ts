@@ -21,4 +21,39 @@ apiClient.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// When the access token has expired, exchange the stored refresh token for a
+// new pair and retry the request once, instead of sending the user back to
+// the login page. Concurrent 401s share a single refresh call.
+let refreshInFlight: Promise<string | null> | null = null;
+
+const refreshAccessToken = async (): Promise<string | null> => {
+  const refreshToken = localStorage.getItem('refreshToken');
+  if (!refreshToken) return null;
+  try {
+    const { data } = await axios.post(`${import.meta.env.VITE_API_BASE_URL}/api/auth/refresh`, { refresh_token: refreshToken });
+    localStorage.setItem('authToken', data.access_token);
+    localStorage.setItem('refreshToken', data.refresh_token);
+    return data.access_token;
+  } catch {
+    localStorage.removeItem('refreshToken');
+    return null;
+  }
+};
+
+apiClient.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    if (error.response?.status !== 401 || !original || original._retried || original.url?.startsWith('/api/auth/')) {
+      return Promise.reject(error);
+    }
+    refreshInFlight = refreshInFlight ?? refreshAccessToken().finally(() => { refreshInFlight = null; });
+    const newToken = await refreshInFlight;
+    if (!newToken) return Promise.reject(error);
+    original._retried = true;
+    original.headers.Authorization = `Bearer ${newToken}`;
+    return apiClient(original);
+  }
+);
+
 export default apiClient;
\ No newline at end of file